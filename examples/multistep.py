@@ -1,7 +1,72 @@
 """ Advanced example illustrating a multi-step ETL process using the rpycpl package.
 
-In general consider using single steps and chaining them together with snakemake or another 
+The steps are run as a DAG by the Pipeline: loads and tech groups are independent and run
+concurrently, the capacities wait for the tech groups.
+
+In general consider using single steps and chaining them together with snakemake or another
 workflow manager.
 """
 
-raise NotImplementedError("This example is not implemented yet")
\ No newline at end of file
+import yaml
+import os.path
+import pandas as pd
+
+from rpycpl.readers import RemindExport
+from rpycpl.pipeline import Pipeline
+
+# the config, typically loaded from a yaml file.
+# dependencies map a frame name to an upstream step (or an external input)
+yaml_str = """
+etl_steps:
+  - name: loads
+    method: "convert_load"
+    frames:
+      ac_load: p32_load
+  - name: tech_groups
+    method: "build_tech_map"
+    dependencies:
+      tech_mapping: tech_mapping
+  - name: capacities
+    method: "convert_capacities"
+    frames:
+      capacities: p32_cap
+    dependencies:
+      tech_groups: tech_groups
+"""
+
+
+def make_example_data():
+    """mock remind export for testing"""
+    ac_load = pd.DataFrame({
+        'year': [2030, 2035, 2040, 2045, 2050],
+        'region': ['CHA'] * 5,
+        'value': [1.396324, 1.450305, 1.488186, 1.602782, 1.650218],
+    })
+    caps = pd.DataFrame({
+        'year': [2030, 2030, 2030],
+        'region': ['CHA'] * 3,
+        'technology': ['spv', 'windon', 'ngcc'],
+        'value': [0.4, 0.3, 0.2],
+    })
+    ac_load.to_csv("p32_load.csv", index=False)
+    caps.to_csv("p32_cap.csv", index=False)
+
+
+if __name__ == "__main__":
+    make_example_data()
+    data_dir = os.path.abspath(".")  # csvs were saved in the current directory
+
+    config = yaml.safe_load(yaml_str)
+    tech_mapping = pd.DataFrame({
+        'PyPSA_tech': ['solar', 'onwind', 'CCGT'],
+        'parameter': ['investment'] * 3,
+        'mapper': ['use_remind'] * 3,
+        'reference': ['spv', 'windon', 'ngcc'],
+    })
+
+    pipeline = Pipeline.from_config(config, loader=RemindExport(data_dir, regions="CHA"))
+    # region is only passed to the methods that take it
+    outputs = pipeline.run(inputs={"tech_mapping": tech_mapping}, region="CHA")
+
+    for name, outp in outputs.items():
+        print(f"{name}:\n{outp}\n")
@@ -0,0 +1,345 @@
+"""
+Benchmarks of the coupling hot paths at several input sizes, on synthetic data
+(see `rpycpl.synthetic`), so they run offline.
+
+Results are stored as json baselines. Comparing a run against a baseline flags the
+benchmarks that got slower than a threshold (relative to the best time of each).
+
+Example (command line):
+    python -m rpycpl.benchmark run -o baseline.json
+    # ... change the code
+    python -m rpycpl.benchmark run -o current.json --sizes small medium
+    python -m rpycpl.benchmark compare baseline.json current.json --threshold 0.2
+
+`compare` exits with 1 if a benchmark regressed, e.g. to fail a CI job. The steps are
+benchmarked without the step & csv caches and the profiler.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import timeit
+import inspect
+import logging
+import argparse
+import platform
+import tempfile
+import contextlib
+import statistics
+import numpy as np
+import pandas as pd
+
+from .synthetic import SyntheticScale, write_synthetic_inputs
+from .readers import RemindExport
+from .disagg import SpatialDisaggregator
+from .technoecon_etl import make_pypsa_like_costs, map_to_pypsa_tech, REMIND_PARAM_MAP
+from .cost_cube import CostCube
+from .capacities_etl import calc_paidoff_capacity
+from .etl import harmonize_capacities_all_years
+from .step_cache import STEP_CACHE_DIR_ENV, STEP_CACHE_LIMITS, configure_step_cache
+from .utils import (
+    CACHE_DIR_ENV,
+    GDX_POOL_LIMITS,
+    build_tech_map,
+    clear_gdx_pool,
+    configure_gdx_pool,
+    read_pypsa_costs,
+    read_remind_csv,
+    to_list,
+)
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_SIZES = {
+    "small": SyntheticScale(n_regions=3, n_years=6, n_techs=24, n_plants=1_000, n_nodes=10),
+    "medium": SyntheticScale(n_regions=12, n_years=12, n_techs=48, n_plants=10_000, n_nodes=50),
+    "large": SyntheticScale(n_regions=21, n_years=18, n_techs=96, n_plants=50_000, n_nodes=200),
+}
+# relative slowdown of the best time above which a benchmark is a regression
+REGRESSION_THRESHOLD = 0.2
+BENCHMARKS = {}
+
+
+def register_benchmark(name):
+    """decorator to register a benchmark. The decorated function prepares the inputs and
+    returns the zero-argument callable that is timed.
+
+    Args:
+        name (str): the benchmark name
+    """
+
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return decorator
+
+
+class BenchmarkData:
+    """Synthetic inputs for one size, written to disk once and shared by the benchmarks"""
+
+    def __init__(self, scale: SyntheticScale, work_dir: os.PathLike):
+        self.scale = scale
+        self.paths = write_synthetic_inputs(work_dir, scale)
+        self.mappings = pd.read_csv(self.paths["techmapping"])
+        cost_files = sorted(glob.glob(os.path.join(self.paths["pypsa_costs"], "*.csv")))
+        self.pypsa_costs = read_pypsa_costs(cost_files)
+        self.frames = RemindExport(self.paths["remind_export"]).load_technoeconomic_frames()
+        self.tech_groups = build_tech_map(self.mappings)
+        self.powerplants = pd.read_csv(self.paths["powerplants"])
+
+    def remind_capacities(self) -> pd.DataFrame:
+        """REMIND capacities in MW by tech group for the first region"""
+        path = os.path.join(self.paths["remind_export"], "p32_cap.csv")
+        caps = read_remind_csv(path, regions=self.scale.regions[0])
+        return pd.DataFrame({
+            "year": caps.year,
+            "capacity": caps.value * 1e6,
+            "tech_group": caps.technology.map(self.tech_groups.group),
+        })
+
+
+@register_benchmark("read_remind_csv")
+def _bench_read_remind_csv(data: BenchmarkData):
+    paths = [
+        os.path.join(data.paths["remind_export"], f"{symbol}.csv")
+        for symbol in REMIND_PARAM_MAP.values()
+    ]
+    return lambda: [read_remind_csv(path) for path in paths]
+
+
+@register_benchmark("make_pypsa_like_costs")
+def _bench_make_pypsa_like_costs(data: BenchmarkData):
+    func = inspect.unwrap(make_pypsa_like_costs)
+    return lambda: func(data.frames, by_region=True)
+
+
+@register_benchmark("map_to_pypsa_tech")
+def _bench_map_to_pypsa_tech(data: BenchmarkData):
+    # the inputs as prepared by technoeconomic_data
+    mappings = data.mappings.assign(reference=data.mappings.reference.apply(to_list))
+    weights = data.frames["weights_gen"].rename(columns={"value": "weight"})
+    weights = weights.assign(weight_type="weights_gen")
+    costs_remind = make_pypsa_like_costs(data.frames, by_region=True)
+    costs_remind = costs_remind.merge(weights, on=["technology", "year", "region"], how="left")
+    func = inspect.unwrap(map_to_pypsa_tech)
+    return lambda: func(
+        costs_remind,
+        data.pypsa_costs,
+        mappings,
+        weights,
+        years=data.frames["capex"].year.unique(),
+        currency_conversion=1.11,
+        by_region=True,
+    )
+
+
+@register_benchmark("map_to_pypsa_tech_cube")
+def _bench_map_to_pypsa_tech_cube(data: BenchmarkData):
+    # as technoeconomic_data: dense costs, weights are not merged
+    mappings = data.mappings.assign(reference=data.mappings.reference.apply(to_list))
+    weights = data.frames["weights_gen"].rename(columns={"value": "weight"})
+    cube = CostCube.from_costs(make_pypsa_like_costs(data.frames, by_region=True))
+    func = inspect.unwrap(map_to_pypsa_tech)
+    return lambda: func(
+        cube,
+        data.pypsa_costs,
+        mappings,
+        weights.assign(weight_type="weights_gen"),
+        years=data.frames["capex"].year.unique(),
+        currency_conversion=1.11,
+        by_region=True,
+    )
+
+
+@register_benchmark("harmonize_capacities_all_years")
+def _bench_harmonize_capacities(data: BenchmarkData):
+    func = inspect.unwrap(harmonize_capacities_all_years)
+    remind_caps = data.remind_capacities()
+    return lambda: func(data.powerplants, remind_caps)
+
+
+@register_benchmark("calc_paidoff_capacity")
+def _bench_calc_paidoff_capacity(data: BenchmarkData):
+    remind_caps = data.remind_capacities()
+    harmonized = inspect.unwrap(harmonize_capacities_all_years)(data.powerplants, remind_caps)
+    return lambda: calc_paidoff_capacity(remind_caps, harmonized)
+
+
+@register_benchmark("SpatialDisaggregator.use_static_reference")
+def _bench_use_static_reference(data: BenchmarkData):
+    rng = np.random.default_rng(data.scale.seed)
+    nodes = data.powerplants.bus.unique()
+    reference = pd.Series(rng.uniform(size=len(nodes)), index=nodes)
+    reference /= reference.sum()
+    # one series per REMIND tech
+    series = [
+        pd.Series(rng.uniform(size=len(data.scale.years)), index=data.scale.years)
+        for _ in data.scale.techs
+    ]
+    disaggregator = SpatialDisaggregator()
+    return lambda: [disaggregator.use_static_reference(s, reference) for s in series]
+
+
+@contextlib.contextmanager
+def _without_caches():
+    """disable the csv & step caches (env-configured or configured in code) and empty the GDX
+    pool, so that the timings are cold. The configurations are restored afterwards."""
+    saved = {k: os.environ.pop(k) for k in (CACHE_DIR_ENV, STEP_CACHE_DIR_ENV) if k in os.environ}
+    step_cache, gdx_pool = dict(STEP_CACHE_LIMITS), dict(GDX_POOL_LIMITS)
+    configure_step_cache(None, max_bytes=step_cache["max_bytes"])
+    clear_gdx_pool()
+    try:
+        yield
+    finally:
+        os.environ.update(saved)
+        configure_step_cache(**step_cache)
+        # the containers loaded by the benchmarks are dropped
+        clear_gdx_pool()
+        configure_gdx_pool(**gdx_pool)
+
+
+def time_call(func, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """Time a callable. Fast calls are looped so that each sample takes at least min_time.
+
+    Args:
+        func (callable): the zero-argument callable
+        repeat (int, optional): number of samples. Defaults to 5.
+        min_time (float, optional): min duration of a sample in seconds. Defaults to 0.05.
+    Returns:
+        dict: best, median and mean time per call (s), number of calls per sample & samples
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time and number < 1_000_000:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [elapsed / number] + [timer.timeit(number) / number for _ in range(repeat - 1)]
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_benchmarks(
+    sizes: list[str] = None, names: list[str] = None, repeat: int = 5, work_dir: os.PathLike = None
+) -> dict:
+    """Run the benchmarks
+
+    Args:
+        sizes (list[str], optional): keys of BENCHMARK_SIZES. Defaults to None (all).
+        names (list[str], optional): the benchmarks to run. Defaults to None (all).
+        repeat (int, optional): number of timing samples. Defaults to 5.
+        work_dir (os.PathLike, optional): where to write the synthetic inputs.
+            Defaults to None (a temporary folder).
+    Returns:
+        dict: the results {"meta": {...}, "results": {"name[size]": timings}}
+    """
+    sizes = sizes or list(BENCHMARK_SIZES)
+    names = names or list(BENCHMARKS)
+    unknown = set(names).difference(BENCHMARKS) | set(sizes).difference(BENCHMARK_SIZES)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks or sizes: {unknown}")
+
+    results = {}
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(_without_caches())
+        if work_dir is None:
+            work_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        for size in sizes:
+            data = BenchmarkData(BENCHMARK_SIZES[size], os.path.join(work_dir, size))
+            for name in names:
+                func = BENCHMARKS[name](data)
+                results[f"{name}[{size}]"] = time_call(func, repeat=repeat)
+                logger.info(f"{name}[{size}]: {results[f'{name}[{size}]']['min_s']:.4g}s")
+
+    meta = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "node": platform.node(),
+    }
+    return {"meta": meta, "results": results}
+
+
+def write_results(results: dict, path: os.PathLike):
+    """write benchmark results (a baseline) as json"""
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+
+
+def load_results(path: os.PathLike) -> dict:
+    """read benchmark results (a baseline) json"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(
+    baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD
+) -> pd.DataFrame:
+    """Compare the best times of two runs
+
+    Args:
+        baseline (dict): the baseline results
+        current (dict): the new results
+        threshold (float, optional): relative slowdown flagged as a regression.
+            Defaults to REGRESSION_THRESHOLD.
+    Returns:
+        pd.DataFrame: baseline & current time, ratio and regression flag by benchmark
+            (benchmarks of both runs only), slowest change first
+    """
+    common = sorted(baseline["results"].keys() & current["results"].keys())
+    comparison = pd.DataFrame(
+        {
+            "baseline_s": [baseline["results"][k]["min_s"] for k in common],
+            "current_s": [current["results"][k]["min_s"] for k in common],
+        },
+        index=pd.Index(common, name="benchmark"),
+    )
+    comparison["ratio"] = comparison.current_s / comparison.baseline_s
+    comparison["regression"] = comparison.ratio > 1 + threshold
+    return comparison.sort_values("ratio", ascending=False)
+
+
+def _main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the coupling hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("-o", "--output", help="write the results (json) here")
+    run.add_argument("--sizes", nargs="+", choices=list(BENCHMARK_SIZES))
+    run.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmark names")
+    run.add_argument("--repeat", type=int, default=5)
+    compare = commands.add_parser("compare", help="flag regressions against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, args.only, repeat=args.repeat)
+        if args.output:
+            write_results(results, args.output)
+        for name, timings in results["results"].items():
+            print(f"{name:60s} {timings['min_s']:.4g}s")
+        return 0
+
+    comparison = compare_results(
+        load_results(args.baseline), load_results(args.current), args.threshold
+    )
+    print(comparison.to_string(float_format="{:.4g}".format))
+    regressions = comparison.index[comparison.regression]
+    if len(regressions):
+        print(f"Regressions (> {args.threshold:.0%} slower): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(_main())
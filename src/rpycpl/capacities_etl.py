@@ -64,8 +64,10 @@ def scale_down_capacities(to_scale: pd.DataFrame, reference: pd.DataFrame) -> pd
 
     # group the target & ref capacities by tech group
     group_totals_ref = reference.groupby(["tech_group"]).capacity.sum()
-    to_scale.loc[:, "group_fraction"] = (
-        to_scale.groupby("tech_group")[capacity_col].transform(lambda x: x / x.sum()).values
+    to_scale = to_scale.assign(
+        group_fraction=to_scale.groupby("tech_group")[capacity_col]
+        .transform(lambda x: x / x.sum())
+        .values
     )
 
     missing = to_scale.query("tech_group == ''")[["Type"]].drop_duplicates()
@@ -0,0 +1,399 @@
+"""
+The `rpycpl` command line: run the ETL steps of a config, once or through a warm daemon.
+
+Every workflow rule that starts a new interpreter pays for importing pandas & rpycpl and
+re-reading the mapping & cost tables. `rpycpl serve` is a long-running local process
+listening on a unix socket. It keeps the registries imported and the inputs, configs and
+REMIND tables loaded (reloaded when the files change). `rpycpl run --socket` sends the
+request to the daemon and falls back to running in-process if no daemon is listening.
+
+Example:
+    rpycpl serve --socket /tmp/rpycpl.sock &
+    rpycpl run --socket /tmp/rpycpl.sock --config etl.yaml --export pypsa_export \\
+        --region CHA --step technoeconomic_data \\
+        --input mappings=data/techmapping_remind2py.csv \\
+        --input "pypsa_costs=pypsa_costs:costs/costs_*.csv" \\
+        --output technoeconomic_data=costs_CHA.csv
+    rpycpl stop --socket /tmp/rpycpl.sock
+
+Inputs are `name=[reader:]path`, with a reader of `utils.READERS_REGISTRY` (default: csv).
+Glob patterns are expanded to a sorted list of paths (csv files are concatenated). Outputs
+are `step=path` (.csv, .parquet or .pkl). The daemon protocol is one json request and one
+json response per line.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import socket
+import pickle
+import logging
+import argparse
+import threading
+import socketserver
+import yaml
+import pandas as pd
+from typing import Any
+
+from .pipeline import Pipeline
+from .readers import RemindExport
+from .utils import READERS_REGISTRY, atomic_write, validate_file_list
+
+logger = logging.getLogger(__name__)
+
+SOCKET_ENV = "RPYCPL_SOCKET"
+_BUFFER_SIZE = 1 << 16
+
+
+def parse_input(spec: str) -> tuple[str, str, str]:
+    """parse an input spec `name=[reader:]path` into (name, reader, path)"""
+    name, sep, source = spec.partition("=")
+    if not sep or not name or not source:
+        raise ValueError(f"Invalid input '{spec}', expected name=[reader:]path")
+    reader, sep, path = source.partition(":")
+    if not sep or reader not in READERS_REGISTRY:
+        reader, path = "csv", source
+    return name, reader, path
+
+
+def _file_state(paths: list[str]) -> tuple:
+    """(path, mtime, size) of the files, to detect changes"""
+    state = []
+    for path in paths:
+        stat = os.stat(path)
+        state.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(state)
+
+
+def write_output(obj: Any, path: os.PathLike):
+    """Write a step output (atomically) as csv, parquet or pickle by extension
+
+    Args:
+        obj (Any): the output (DataFrame or Series for csv and parquet)
+        path (os.PathLike): the destination
+    """
+    ext = os.path.splitext(os.fspath(path))[1]
+    if ext != ".pkl" and not isinstance(obj, (pd.DataFrame, pd.Series)):
+        raise TypeError(f"Can only write tables as {ext}, use .pkl for {type(obj).__name__}")
+    with atomic_write(path) as tmp_path:
+        if ext == ".pkl":
+            with open(tmp_path, "wb") as f:
+                pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+        else:
+            keep_index = not obj.index.equals(pd.RangeIndex(len(obj)))
+            if ext == ".parquet":
+                pd.DataFrame(obj).to_parquet(tmp_path, index=keep_index)
+            else:
+                obj.to_csv(tmp_path, index=keep_index)
+
+
+class WarmState:
+    """The loaded inputs, configs and REMIND tables, shared by the requests of a daemon.
+    Entries are reloaded when their files change."""
+
+    def __init__(self):
+        self._inputs = {}
+        self._configs = {}
+        self._frames = {}
+        self._lock = threading.Lock()
+        self.n_requests = 0
+        self.started = time.time()
+
+    def _cached(self, store: dict, key, files: list[str], load):
+        state = _file_state(files)
+        with self._lock:
+            hit = store.get(key)
+        if hit is not None and hit[0] == state:
+            return hit[1]
+        value = load()
+        with self._lock:
+            store[key] = (state, value)
+        return value
+
+    def read_input(self, spec: str) -> tuple[str, Any]:
+        """load an input `name=[reader:]path` (cached)"""
+        name, reader, path = parse_input(spec)
+        is_glob = glob.has_magic(path)
+        paths = sorted(glob.glob(path)) if is_glob else [path]
+        if not paths:
+            raise FileNotFoundError(f"No files match input {spec}")
+
+        def load():
+            if reader != "csv":
+                return READERS_REGISTRY[reader](paths if is_glob else path)
+            return pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+
+        return name, self._cached(self._inputs, (reader, path), paths, load)
+
+    def config(self, path: os.PathLike) -> dict:
+        """load a yaml config (cached)"""
+
+        def load():
+            with open(path) as f:
+                return yaml.safe_load(f)
+
+        return self._cached(self._configs, os.fspath(path), [path], load)
+
+    def loader(self, export: os.PathLike, region: str = None, **kwargs) -> "WarmExport":
+        """a REMIND export reader whose csv symbol tables are cached"""
+        return WarmExport(self, export, regions=region, **kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime_s": time.time() - self.started,
+                "requests": self.n_requests,
+                "inputs": len(self._inputs),
+                "configs": len(self._configs),
+                "remind_tables": len(self._frames),
+            }
+
+
+class WarmExport(RemindExport):
+    """RemindExport that keeps the loaded csv symbols in the WarmState"""
+
+    def __init__(self, state: WarmState, path: os.PathLike, **kwargs):
+        super().__init__(path, **kwargs)
+        self.state = state
+
+    def load_frames(self, symbols: dict[str, str]) -> dict[str, pd.DataFrame]:
+        if self.is_gdx:
+            return super().load_frames(symbols)
+        symbols = {k: v for k, v in symbols.items() if v}
+        validate_file_list([self.symbol_path(v) for v in symbols.values()])
+        frames, missing = {}, {}
+        for key, symbol in symbols.items():
+            cache_key = (os.fspath(self.path), symbol, str(self.regions), str(self.compact))
+            file_state = _file_state([self.symbol_path(symbol)])
+            with self.state._lock:
+                hit = self.state._frames.get(cache_key)
+            if hit is not None and hit[0] == file_state:
+                frames[key] = hit[1]
+            else:
+                missing[key] = (symbol, cache_key, file_state)
+        # read the changed symbols concurrently
+        loaded = super().load_frames({key: symbol for key, (symbol, _, _) in missing.items()})
+        with self.state._lock:
+            for key, (_, cache_key, file_state) in missing.items():
+                self.state._frames[cache_key] = (file_state, loaded[key])
+        return {**frames, **loaded}
+
+
+def _with_upstream(pipeline: Pipeline, steps: list[str], inputs: dict) -> list[str]:
+    """the steps and all the steps they (transitively) depend on"""
+    graph = pipeline.graph(inputs)
+    unknown = set(steps).difference(graph)
+    if unknown:
+        raise ValueError(f"Unknown steps {sorted(unknown)}")
+    selected, todo = set(), list(steps)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo.extend(graph[name])
+    return [name for name in pipeline.steps if name in selected]
+
+
+def execute(request: dict, state: WarmState) -> dict:
+    """Handle a request (the same in the daemon and in-process)
+
+    Args:
+        request (dict): {"command": "run" | "ping" | "stats", ...}. A run request has the
+            config path, the optional export path, region, steps, inputs (specs),
+            outputs ({step: path}) and params (arguments of the ETL methods)
+        state (WarmState): the loaded data
+    Returns:
+        dict: the response, {"ok": bool, ...}
+    """
+    command = request.get("command", "run")
+    if command in ("ping", "stats"):
+        return {"ok": True, **state.stats()}
+    if command != "run":
+        raise ValueError(f"Unknown command '{command}'")
+
+    start = time.perf_counter()
+    with state._lock:
+        state.n_requests += 1
+    # the loaded inputs are shared by the requests: steps get shallow copies (the steps do not
+    # modify values in place, added or dropped columns stay private to the request)
+    inputs = {
+        name: value.copy(deep=False) if isinstance(value, (pd.DataFrame, pd.Series)) else value
+        for name, value in map(state.read_input, request.get("inputs", []))
+    }
+    loader = None
+    if request.get("export"):
+        loader = state.loader(request["export"], request.get("region"))
+    pipeline = Pipeline.from_config(state.config(request["config"]), loader=loader)
+    if request.get("steps"):
+        names = _with_upstream(pipeline, request["steps"], inputs)
+        pipeline = Pipeline([pipeline.steps[n] for n in names], loader=loader)
+
+    params = {**request.get("params", {}), **inputs}
+    if request.get("region"):
+        params["region"] = request["region"]
+    outputs = pipeline.run(inputs=inputs, **params)
+
+    written = {}
+    for step, path in request.get("outputs", {}).items():
+        if step not in outputs:
+            raise ValueError(f"No output for step {step}, it was not run")
+        write_output(outputs[step], path)
+        written[step] = os.fspath(path)
+    return {"ok": True, "outputs": written, "elapsed_s": time.perf_counter() - start}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("command") == "shutdown":
+                    response = {"ok": True}
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    response = execute(request, self.server.state)
+            except Exception as e:
+                logger.exception("Request failed")
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: os.PathLike, preload: list[str] = None):
+    """Run the daemon until a shutdown request (blocking)
+
+    Args:
+        socket_path (os.PathLike): the unix socket to listen on
+        preload (list[str], optional): input specs to load at startup. Defaults to None.
+    """
+    if os.path.exists(socket_path):
+        if _connect(socket_path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        os.remove(socket_path)  # stale socket of a dead daemon
+    state = WarmState()
+    for spec in preload or []:
+        state.read_input(spec)
+    with _Server(os.fspath(socket_path), _RequestHandler) as server:
+        server.state = state
+        logger.info(f"rpycpl daemon {os.getpid()} listening on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+
+
+def _connect(socket_path: os.PathLike) -> socket.socket | None:
+    """connect to the daemon, None if no daemon listens on the socket"""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(os.fspath(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def send_request(socket_path: os.PathLike, request: dict) -> dict | None:
+    """Send a request to the daemon
+
+    Args:
+        socket_path (os.PathLike): the daemon socket
+        request (dict): the request, see `execute`
+    Returns:
+        dict | None: the response or None if no daemon is listening
+    """
+    sock = _connect(socket_path)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb", buffering=_BUFFER_SIZE) as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def _run_request(args: argparse.Namespace) -> dict:
+    def absolute(path):
+        return os.path.abspath(path) if path else path
+
+    outputs = dict(spec.split("=", 1) for spec in args.output)
+    inputs = []
+    for spec in args.input:
+        name, reader, path = parse_input(spec)
+        prefix = "" if reader == "csv" else f"{reader}:"
+        inputs.append(f"{name}={prefix}{absolute(path)}")
+    # the daemon may run in another working directory
+    return {
+        "command": "run",
+        "config": absolute(args.config),
+        "export": absolute(args.export),
+        "region": args.region,
+        "steps": args.step,
+        "inputs": inputs,
+        "outputs": {step: absolute(path) for step, path in outputs.items()},
+        "params": json.loads(args.params) if args.params else {},
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    """the `rpycpl` console entry point"""
+    parser = argparse.ArgumentParser(prog="rpycpl", description=__doc__.split("\n\n")[0])
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+    socket_help = f"the daemon socket. Defaults to the {SOCKET_ENV} env variable"
+
+    run = commands.add_parser("run", help="run ETL steps (through the daemon if listening)")
+    run.add_argument("--config", required=True, help="yaml config with the etl_steps")
+    run.add_argument("--export", help="the REMIND export (csv folder or gdx)")
+    run.add_argument("--region", help="the REMIND region")
+    run.add_argument("--step", nargs="+", help="only run these steps (and their upstream)")
+    run.add_argument("--input", action="append", default=[], help="name=[reader:]path")
+    run.add_argument("--output", action="append", default=[], help="step=path")
+    run.add_argument("--params", help="json dict of arguments for the ETL methods")
+    run.add_argument("--socket", default=os.environ.get(SOCKET_ENV), help=socket_help)
+
+    serve_cmd = commands.add_parser("serve", help="run the warm daemon")
+    serve_cmd.add_argument("--socket", default=os.environ.get(SOCKET_ENV), help=socket_help)
+    serve_cmd.add_argument("--preload", action="append", default=[], help="name=[reader:]path")
+    for name, help_text in [("status", "print the daemon stats"), ("stop", "stop the daemon")]:
+        cmd = commands.add_parser(name, help=help_text)
+        cmd.add_argument("--socket", default=os.environ.get(SOCKET_ENV), help=socket_help)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if args.command != "run" and not args.socket:
+        parser.error(f"--socket (or {SOCKET_ENV}) is required for {args.command}")
+
+    if args.command == "serve":
+        serve(args.socket, args.preload)
+        return 0
+    if args.command in ("status", "stop"):
+        command = "stats" if args.command == "status" else "shutdown"
+        response = send_request(args.socket, {"command": command})
+        if response is None:
+            print(f"No rpycpl daemon listening on {args.socket}", file=sys.stderr)
+            return 1
+        print(json.dumps(response, indent=1))
+        return 0
+
+    request = _run_request(args)
+    response = send_request(args.socket, request) if args.socket else None
+    if response is None:
+        if args.socket:
+            logger.warning(f"No daemon on {args.socket}, running in-process")
+        response = execute(request, WarmState())
+    if not response["ok"]:
+        print(response["error"], file=sys.stderr)
+        return 1
+    logger.info(f"Done in {response['elapsed_s']:.2f}s: {response['outputs']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+The pypsa-like REMIND costs (output of `technoecon_etl.make_pypsa_like_costs`) as a dense
+(region, technology, parameter, year) array. Labels are resolved to axis positions once, so
+lookups, slices (e.g. the regions or years of a scenario) and the weighting of tech baskets
+are plain array operations instead of merges on string keys. The long PyPSA costs layout is
+only built when writing.
+
+Example:
+    cube = CostCube.from_costs(make_pypsa_like_costs(frames, by_region=True))
+    cube.get("spv", "investment", 2030, region="CHA")
+    cube.sel(regions=["CHA"], years=[2030, 2035]).write("output/costs")
+"""
+
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+from .utils import is_compact, to_compact_schema, write_cost_data
+
+logger = logging.getLogger(__name__)
+
+# the array axes
+CUBE_AXES = ["region", "technology", "parameter", "year"]
+# added to the weights so that zero-weight baskets still average (as technoecon_etl)
+WEIGHT_EPSILON = 1e-12
+
+
+class CostCube:
+    """Dense REMIND cost array with labelled (categorical) axes"""
+
+    def __init__(
+        self,
+        values: np.ndarray,
+        present: np.ndarray,
+        axes: dict[str, pd.Index],
+        units: np.ndarray,
+        sources: np.ndarray,
+        by_region: bool = True,
+        compact: bool = False,
+    ):
+        """
+        Args:
+            values (np.ndarray): the (region, technology, parameter, year) values
+            present (np.ndarray): boolean mask of the cells with data
+            axes (dict[str, pd.Index]): the labels of each of the CUBE_AXES
+            units (np.ndarray): the (technology, parameter) units
+            sources (np.ndarray): the (technology, parameter) sources
+            by_region (bool, optional): whether the costs had a region column. Defaults to True.
+            compact (bool, optional): whether the costs used the compact schema.
+                Defaults to False.
+        """
+        self.values = values
+        self.present = present
+        self.axes = {axis: pd.Index(axes[axis]) for axis in CUBE_AXES}
+        self.units = units
+        self.sources = sources
+        self.by_region = by_region
+        self.compact = compact
+
+    @classmethod
+    def from_costs(cls, costs: pd.DataFrame) -> "CostCube":
+        """Build the cube from the pypsa-like REMIND costs
+
+        Args:
+            costs (pd.DataFrame): output of make_pypsa_like_costs (other columns are ignored)
+        Returns:
+            CostCube: the costs as a cube
+        Raises:
+            ValueError: if a (technology, parameter) has several units or sources or if a key
+                is duplicated
+        """
+        by_region = "region" in costs.columns
+        if not by_region:
+            costs = costs.assign(region=None)
+        # sorted as make_pypsa_like_costs, so that to_frame reproduces the row order
+        axes = {axis: np.sort(pd.unique(costs[axis].to_numpy())) for axis in CUBE_AXES}
+        axes["technology"] = sorted(axes["technology"], key=str.lower)
+        axes = {axis: pd.Index(labels) for axis, labels in axes.items()}
+        codes = [axes[axis].get_indexer(costs[axis]) for axis in CUBE_AXES]
+        shape = tuple(len(axes[axis]) for axis in CUBE_AXES)
+        flat = np.ravel_multi_index(codes, shape)
+        if len(np.unique(flat)) < len(flat):
+            raise ValueError("Duplicate (region, technology, parameter, year) keys in the costs")
+
+        values = np.full(shape, np.nan, dtype=costs.value.dtype)
+        present = np.zeros(shape, dtype=bool)
+        values.flat[flat] = costs.value.to_numpy()
+        present.flat[flat] = True
+
+        # units & sources are per tech and parameter
+        tech_param = np.ravel_multi_index(codes[1:3], shape[1:3])
+        first = np.unique(tech_param, return_index=True)[1]
+        tables = {}
+        for col in ["unit", "source"]:
+            column = costs[col].to_numpy(dtype=object)
+            table = np.full(shape[1:3], None, dtype=object)
+            table.flat[tech_param[first]] = column[first]
+            if (table.flat[tech_param] != column).any():
+                raise ValueError(f"The {col} of the REMIND costs varies by region or year")
+            tables[col] = table
+
+        return cls(
+            values,
+            present,
+            axes,
+            tables["unit"],
+            tables["source"],
+            by_region=by_region,
+            compact=is_compact(costs),
+        )
+
+    @property
+    def regions(self) -> pd.Index:
+        return self.axes["region"]
+
+    @property
+    def technologies(self) -> pd.Index:
+        return self.axes["technology"]
+
+    @property
+    def parameters(self) -> pd.Index:
+        return self.axes["parameter"]
+
+    @property
+    def years(self) -> pd.Index:
+        return self.axes["year"]
+
+    @property
+    def shape(self) -> tuple[int]:
+        return self.values.shape
+
+    def positions(self, axis: str, labels) -> np.ndarray:
+        """the positions of labels on an axis
+
+        Raises:
+            KeyError: if a label is not on the axis
+        """
+        positions = self.axes[axis].get_indexer(np.atleast_1d(labels))
+        if (positions < 0).any():
+            missing = np.atleast_1d(labels)[positions < 0]
+            raise KeyError(f"{list(missing)} not in the {axis} axis")
+        return positions
+
+    def get(self, technology: str, parameter: str, year: int, region: str = None) -> float:
+        """the value of a cell (NaN if no data)"""
+        return self.values[
+            self.axes["region"].get_loc(region),
+            self.axes["technology"].get_loc(technology),
+            self.axes["parameter"].get_loc(parameter),
+            self.axes["year"].get_loc(year),
+        ]
+
+    def sel(
+        self,
+        regions: list = None,
+        technologies: list = None,
+        parameters: list = None,
+        years: list = None,
+    ) -> "CostCube":
+        """Select labels (in axis order), e.g. the regions & years of a scenario
+
+        Args:
+            regions (list, optional): Defaults to None (all).
+            technologies (list, optional): Defaults to None (all).
+            parameters (list, optional): Defaults to None (all).
+            years (list, optional): Defaults to None (all).
+        Returns:
+            CostCube: the sub-cube
+        Raises:
+            KeyError: if a label is not in the cube
+        """
+        selection = dict(zip(CUBE_AXES, [regions, technologies, parameters, years]))
+        index = [
+            np.arange(n) if labels is None else np.sort(self.positions(axis, labels))
+            for n, (axis, labels) in zip(self.shape, selection.items())
+        ]
+        region, tech, param, year = np.ix_(*index)
+        tech_param = np.ix_(index[1], index[2])
+        return CostCube(
+            self.values[region, tech, param, year],
+            self.present[region, tech, param, year],
+            {axis: self.axes[axis][idx] for axis, idx in zip(CUBE_AXES, index)},
+            self.units[tech_param],
+            self.sources[tech_param],
+            by_region=self.by_region,
+            compact=self.compact,
+        )
+
+    def align(self, table: pd.DataFrame, value_col: str = "value") -> np.ndarray:
+        """Put a per technology & year table (e.g. REMIND weights) on the cube axes
+
+        Args:
+            table (pd.DataFrame): with technology, year and optionally region columns
+            value_col (str, optional): the column to align. Defaults to "value".
+        Returns:
+            np.ndarray: (region, technology, year) values, NaN where the table has no data.
+                Tables without region apply to all regions.
+        """
+        aligned = np.full(self.shape[:2] + self.shape[3:], np.nan)
+        techs = self.axes["technology"].get_indexer(table["technology"])
+        years = self.axes["year"].get_indexer(table["year"])
+        values = table[value_col].to_numpy()
+        if "region" in table.columns and self.by_region:
+            regions = self.axes["region"].get_indexer(table["region"])
+            valid = (techs >= 0) & (years >= 0) & (regions >= 0)
+            aligned[regions[valid], techs[valid], years[valid]] = values[valid]
+        else:
+            valid = (techs >= 0) & (years >= 0)
+            aligned[:, techs[valid], years[valid]] = values[valid]
+        return aligned
+
+    def take(self, technologies, parameters) -> pd.DataFrame:
+        """The long rows of (technology, parameter) pairs, e.g. one pair per mapping row
+
+        Args:
+            technologies (list-like): the technology of each pair
+            parameters (list-like): the parameter of each pair
+        Returns:
+            pd.DataFrame: the (region,) year, value, unit and source of the cells with data,
+                indexed by the position of their pair
+        Raises:
+            KeyError: if a technology or parameter is not in the cube
+        """
+        techs = self.positions("technology", technologies)
+        params = self.positions("parameter", parameters)
+        # (pair, region, year) cells
+        present = self.present[:, techs, params, :].transpose(1, 0, 2)
+        pair, region, year = np.nonzero(present)
+        tech, param = techs[pair], params[pair]
+        taken = pd.DataFrame(
+            {
+                "region": self.axes["region"].to_numpy()[region],
+                "year": self.axes["year"].to_numpy()[year],
+                "value": self.values[region, tech, param, year],
+                "unit": self.units[tech, param],
+                "source": self.sources[tech, param],
+            },
+            index=pair,
+        )
+        if not self.by_region:
+            taken.drop(columns="region", inplace=True)
+        return taken
+
+    def has_data(self, technologies, parameters) -> np.ndarray:
+        """whether (technology, parameter) pairs have data and no NaNs (unknown labels: False)"""
+        techs = self.axes["technology"].get_indexer(np.atleast_1d(technologies))
+        params = self.axes["parameter"].get_indexer(np.atleast_1d(parameters))
+        known = (techs >= 0) & (params >= 0)
+        present = self.present[:, techs[known], params[known], :]
+        with_nans = present & np.isnan(self.values[:, techs[known], params[known], :])
+        has_data = np.zeros(len(techs), dtype=bool)
+        has_data[known] = present.any(axis=(0, 2)) & ~with_nans.any(axis=(0, 2))
+        return has_data
+
+    def _members(self, baskets: list[list], parameters) -> tuple[np.ndarray]:
+        """the basket, technology and parameter positions of the members of tech baskets"""
+        lengths = np.fromiter(map(len, baskets), dtype=int, count=len(baskets))
+        basket = np.repeat(np.arange(len(baskets)), lengths)
+        techs = self.positions("technology", [tech for techs in baskets for tech in techs])
+        params = self.positions("parameter", np.asarray(parameters, dtype=object)[basket])
+        return basket, techs, params
+
+    def weigh(self, baskets: list[list], parameters, weights: np.ndarray) -> np.ndarray:
+        """Weighted mean of a parameter over tech baskets
+
+        Args:
+            baskets (list[list]): the techs of each basket
+            parameters (list-like): the parameter of each basket
+            weights (np.ndarray): the (region, technology, year) weights, see `align`
+        Returns:
+            np.ndarray: the (basket, region, year) means. Techs without data or weight are
+                skipped.
+        Raises:
+            KeyError: if a technology or parameter is not in the cube
+        """
+        basket, techs, params = self._members(baskets, parameters)
+        values = self.values[:, techs, params, :]
+        weights = np.where(self.present[:, techs, params, :], weights[:, techs, :], np.nan)
+        shape = (self.shape[0], len(baskets), self.shape[3])
+        weighted, total = np.zeros(shape), np.zeros(shape)
+        # sum the members into their basket (nansum)
+        members = (slice(None), basket)
+        np.add.at(weighted, members, np.nan_to_num(values * (weights + WEIGHT_EPSILON)))
+        np.add.at(total, members, np.nan_to_num(weights))
+        return (weighted / (total + WEIGHT_EPSILON)).transpose(1, 0, 2)
+
+    def n_units(self, baskets: list[list], parameters) -> np.ndarray:
+        """the (basket, region, year) number of distinct units of the members with data
+        (0 where no member has data)"""
+        basket, techs, params = self._members(baskets, parameters)
+        units, labels = pd.factorize(pd.Series(self.units[techs, params], dtype=object))
+        # members with data by (region, basket & unit, year)
+        slots = np.zeros((self.shape[0], len(baskets) * len(labels), self.shape[3]), dtype=int)
+        members = (slice(None), basket * len(labels) + units)
+        np.add.at(slots, members, self.present[:, techs, params, :])
+        slots = slots.reshape(self.shape[0], len(baskets), len(labels), self.shape[3])
+        return (slots > 0).sum(axis=2).transpose(1, 0, 2)
+
+    def to_frame(self) -> pd.DataFrame:
+        """the long pypsa-like layout (as make_pypsa_like_costs), cells with data only"""
+        # long rows are ordered by region, technology, year, parameter
+        present = self.present.transpose(0, 1, 3, 2)
+        region, tech, year, param = np.nonzero(present)
+        costs = pd.DataFrame({
+            "region": self.axes["region"].to_numpy()[region],
+            "technology": self.axes["technology"].to_numpy()[tech],
+            "year": self.axes["year"].to_numpy()[year],
+            "parameter": self.axes["parameter"].to_numpy()[param],
+            "value": self.values.transpose(0, 1, 3, 2)[present],
+            "unit": self.units[tech, param],
+            "source": self.sources[tech, param],
+        })
+        if not self.by_region:
+            costs.drop(columns="region", inplace=True)
+        if self.compact:
+            costs = to_compact_schema(costs, value_dtype=self.values.dtype)
+        return costs
+
+    def write(self, output_dir: os.PathLike, **kwargs) -> list[str]:
+        """write the costs in the long layout, one file per year (see utils.write_cost_data)"""
+        return write_cost_data(self.to_frame(), output_dir, **kwargs)
+
+    def __len__(self) -> int:
+        return int(self.present.sum())
+
+    def __repr__(self) -> str:
+        dims = ", ".join(f"{axis}: {n}" for axis, n in zip(CUBE_AXES, self.shape))
+        return f"CostCube({dims}; {len(self)} values)"
@@ -24,8 +24,7 @@ if __name__ == "__main__":
 
     # load relevant data
     co2_p = (
-        read_remind_csv(os.path.join(base_p, "p_priceCO2.csv"))
-        .query("region == @region")
+        read_remind_csv(os.path.join(base_p, "p_priceCO2.csv"), regions=region)
         .drop(columns=["region"])
         .set_index("year")
     )
@@ -0,0 +1,248 @@
+"""
+Run the ETL steps of a config for scenario ensembles: many (scenario, region) pairs on a
+process pool.
+
+Large read-only inputs (e.g. PyPSA costs, tech mapping, powerplantmatching tables) are placed
+in shared memory once. The workers only receive a small handle and rebuild the tables from the
+shared buffer (once per worker process), instead of each job pickling (or re-reading) them.
+
+Example:
+    with EnsembleExecutor(config, {"mappings": mappings, "pypsa_costs": costs}) as executor:
+        outputs = executor.run({"SSP2-PkBudg1000": export_dir}, regions=["CHA", "EUR"])
+    outputs["SSP2-PkBudg1000", "CHA"]["technoeconomic_data"]
+"""
+
+import os
+import yaml
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+from .pipeline import Pipeline
+from .pypsa_costs import PypsaCostDB
+from .readers import RemindExport
+
+logger = logging.getLogger(__name__)
+
+# shared memory blocks attached by this (worker) process, by name
+_ATTACHED = {}
+# tables rebuilt by this (worker) process, by shared memory block name
+_REBUILT = {}
+
+
+@dataclass
+class SharedFrame:
+    """Picklable handle to a DataFrame stored in shared memory. Numeric columns are stored
+    as raw arrays, string-like columns as integer codes and the pickled unique values."""
+
+    shm_name: str
+    n_rows: int
+    # (name, kind, dtype, (offset, nbytes) of the values, (offset, nbytes) of the categories)
+    columns: list = field(default_factory=list)
+    index_names: list = None
+    wrapper: str = None  # rebuild as e.g. PypsaCostDB
+
+    def to_frame(self) -> pd.DataFrame | PypsaCostDB:
+        """Rebuild the table from shared memory, once per process. Numeric columns are read-only
+        views on the shared block (in-place writes raise), the table is shared by the jobs of
+        the process (see `_job_inputs`)."""
+        if self.shm_name not in _REBUILT:
+            _REBUILT[self.shm_name] = self._rebuild()
+        return _REBUILT[self.shm_name]
+
+    def _rebuild(self) -> pd.DataFrame | PypsaCostDB:
+        buffer = _attach(self.shm_name).buf
+        data = {}
+        for name, kind, dtype, (offset, nbytes), categories in self.columns:
+            raw = buffer[offset : offset + nbytes]
+            if kind == "pickle":
+                data[name] = pickle.loads(raw)
+                continue
+            arr = np.frombuffer(raw, dtype=dtype, count=self.n_rows)
+            arr.flags.writeable = False
+            if kind == "array":
+                data[name] = arr
+                continue
+            cat_offset, cat_nbytes = categories
+            uniques = pickle.loads(buffer[cat_offset : cat_offset + cat_nbytes])
+            data[name] = pd.Categorical.from_codes(arr, dtype=uniques)
+            if kind == "object":
+                data[name] = np.asarray(data[name], dtype=object)
+                data[name].flags.writeable = False
+        df = pd.DataFrame(data, columns=[c[0] for c in self.columns], copy=False)
+        if self.index_names is not None:
+            df = df.set_index(self.index_names)
+        if self.wrapper == "PypsaCostDB":
+            return PypsaCostDB(df)
+        return df
+
+
+def _attach(shm_name: str) -> shared_memory.SharedMemory:
+    """attach a shared memory block once per process"""
+    if shm_name not in _ATTACHED:
+        _ATTACHED[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    return _ATTACHED[shm_name]
+
+
+def _encode_column(col: pd.Series) -> tuple[str, str, bytes, bytes]:
+    """encode a column as (kind, dtype, values bytes, categories bytes)"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        codes = col.cat.codes.to_numpy()
+        categories = pickle.dumps(col.dtype, pickle.HIGHEST_PROTOCOL)
+        return "category", codes.dtype.str, codes.tobytes(), categories
+    if col.dtype.kind in "biufcmM":
+        arr = np.ascontiguousarray(col.to_numpy())
+        return "array", arr.dtype.str, arr.tobytes(), b""
+    try:
+        codes, uniques = pd.factorize(col, use_na_sentinel=True)
+    except TypeError:
+        # unhashable cells (e.g. lists)
+        return "pickle", None, pickle.dumps(col.to_numpy(), pickle.HIGHEST_PROTOCOL), b""
+    codes = codes.astype(np.int32)
+    categories = pickle.dumps(pd.CategoricalDtype(uniques), pickle.HIGHEST_PROTOCOL)
+    return "object", codes.dtype.str, codes.tobytes(), categories
+
+
+def share_frame(
+    table: pd.DataFrame | PypsaCostDB,
+) -> tuple[SharedFrame, shared_memory.SharedMemory]:
+    """Copy a table to a new shared memory block.
+
+    Args:
+        table (pd.DataFrame | PypsaCostDB): the table
+    Returns:
+        tuple[SharedFrame, SharedMemory]: the handle for the workers and the block. The
+            caller owns the block and must close & unlink it when done.
+    """
+    wrapper = None
+    if isinstance(table, PypsaCostDB):
+        table, wrapper = table.to_frame(), "PypsaCostDB"
+    index_names = None
+    if not table.index.equals(pd.RangeIndex(len(table))) or table.index.name is not None:
+        names = table.index.names
+        index_names = [n if n is not None else f"level_{i}" for i, n in enumerate(names)]
+        table = table.rename_axis(index_names).reset_index()
+
+    encoded = [(name, *_encode_column(table[name])) for name in table.columns]
+    size = sum(len(raw) + len(cats) for _, _, _, raw, cats in encoded)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    columns, offset = [], 0
+    for name, kind, dtype, raw, cats in encoded:
+        shm.buf[offset : offset + len(raw)] = raw
+        shm.buf[offset + len(raw) : offset + len(raw) + len(cats)] = cats
+        columns.append(
+            (name, kind, dtype, (offset, len(raw)), (offset + len(raw), len(cats)))
+        )
+        offset += len(raw) + len(cats)
+    handle = SharedFrame(shm.name, len(table), columns, index_names, wrapper)
+    return handle, shm
+
+
+def _job_inputs(inputs: dict) -> dict:
+    """the inputs of a job: shallow copies of the shared tables (the values are not copied,
+    added or dropped columns stay private to the job)"""
+    tables = {k: v.to_frame() if isinstance(v, SharedFrame) else v for k, v in inputs.items()}
+    return {
+        k: v.copy(deep=False) if isinstance(v, pd.DataFrame) else v for k, v in tables.items()
+    }
+
+
+def _run_job(config: dict, export_path: os.PathLike, region: str, inputs: dict, kwargs: dict):
+    """worker: run the pipeline for one (scenario, region)"""
+    inputs = _job_inputs(inputs)
+    loader = RemindExport(export_path, regions=region, **kwargs.pop("loader_kwargs"))
+    pipeline = Pipeline.from_config(config, loader=loader)
+    # the inputs can be upstream dependencies or keyword arguments of the ETL methods
+    return pipeline.run(inputs=inputs, **{**inputs, **kwargs, "region": region})
+
+
+class EnsembleExecutor:
+    """Run the ETL steps of a config across (scenario, region) pairs on a process pool"""
+
+    def __init__(
+        self,
+        config: dict | os.PathLike,
+        shared_inputs: dict[str, Any] = None,
+        n_workers: int = None,
+        mp_context=None,
+        **loader_kwargs,
+    ):
+        """
+        Args:
+            config (dict | os.PathLike): the config with the etl_steps (or path to the yaml)
+            shared_inputs (dict[str, Any], optional): read-only inputs by name, passed to the
+                steps as dependencies or keyword arguments. DataFrames and PypsaCostDBs are
+                placed in shared memory, other objects are pickled. Defaults to None.
+            n_workers (int, optional): number of worker processes. Defaults to None (n cpus).
+            mp_context (optional): the multiprocessing context. Defaults to None.
+            **loader_kwargs: arguments for the RemindExport of each job (e.g. cache_dir)
+        """
+        # validates the config before starting the workers
+        if not isinstance(config, dict):
+            with open(config) as f:
+                config = yaml.safe_load(f)
+        self.config = config
+        Pipeline.from_config(config).graph(shared_inputs)
+        self.loader_kwargs = loader_kwargs
+        self._blocks = []
+        self._pool = None
+        self.inputs = {}
+        try:
+            for name, value in (shared_inputs or {}).items():
+                if isinstance(value, (pd.DataFrame, PypsaCostDB)):
+                    handle, shm = share_frame(value)
+                    self._blocks.append(shm)
+                    value = handle
+                self.inputs[name] = value
+            self._pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context)
+        except BaseException:
+            # release the blocks shared so far
+            self.close()
+            raise
+
+    def run(
+        self, exports: dict[str, os.PathLike], regions: list[str], **kwargs
+    ) -> dict[tuple[str, str], dict[str, Any]]:
+        """Run the ETL steps for all (scenario, region) pairs
+
+        Args:
+            exports (dict[str, os.PathLike]): the REMIND export (folder or gdx) by scenario
+            regions (list[str]): the REMIND regions
+            **kwargs: additional arguments for the ETL methods (see `Pipeline.run`)
+        Returns:
+            dict[tuple[str, str], dict[str, Any]]: the step outputs by (scenario, region)
+        """
+        futures = {
+            (scenario, region): self._pool.submit(
+                _run_job,
+                self.config,
+                path,
+                region,
+                self.inputs,
+                {**kwargs, "loader_kwargs": self.loader_kwargs},
+            )
+            for scenario, path in exports.items()
+            for region in regions
+        }
+        logger.info(f"Submitted {len(futures)} (scenario, region) ETL jobs")
+        return {key: future.result() for key, future in futures.items()}
+
+    def close(self):
+        """stop the workers and release the shared memory"""
+        if self._pool is not None:
+            self._pool.shutdown()
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,34 +1,48 @@
 """ETL TOOL BOX
 
 - Abstracted transformations (Transformation, register_etl)
-- ETL registry (list of named conversions)
+- read-only ETL inputs (FramesBundle)
+- ETL registry (list of named conversions), optionally cached (see step_cache)
+  and profiled (see profiling)
 - pre-defined conversions (convert_loads, technoeconomic_data)"""
 
 import pandas as pd
 import logging
+from collections.abc import Mapping, Iterator
 from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 
-from .utils import build_tech_map
+from .utils import build_tech_map, to_compact_schema
 from .technoecon_etl import (
-    validate_mappings,
     validate_remind_data,
     map_to_pypsa_tech,
-    to_list,
     make_pypsa_like_costs,
 )
+from .pypsa_costs import PypsaCostDB
+from .cost_cube import CostCube
+from .mapping_plan import MappingPlan
+from .step_cache import cached_step
+from .profiling import profiled_step
 from .capacities_etl import scale_down_capacities, calc_paidoff_capacity
 
 logger = logging.getLogger(__name__)
 ETL_REGISTRY = {}
 
 
-def register_etl(name):
-    """decorator factory to register ETL functions"""
+def register_etl(name, version: str = None):
+    """decorator factory to register ETL functions. Calls to registered functions are
+    cached when the step cache is enabled (see `step_cache.configure_step_cache`) and
+    recorded when profiling is enabled (see `profiling.profile_steps`).
+
+    Args:
+        name (str): the registry name
+        version (str, optional): version of the function, part of the cache key.
+    """
 
     def decorator(func):
-        ETL_REGISTRY[name] = func
-        return func
+        ETL_REGISTRY[name] = profiled_step(cached_step(func, version=version), name)
+        return ETL_REGISTRY[name]
 
     return decorator
 
@@ -47,6 +61,50 @@ class Transformation:
     dependencies: Dict[str, Any] = field(default_factory=dict)
 
 
+class FramesBundle(Mapping):
+    """Read-only bundle of named ETL input frames, shared between steps without defensive
+    copies. Steps get shallow copies of the frames: adding, dropping or renaming columns never
+    alters the bundle, but the values are shared. Steps must not modify them in place (with
+    pandas copy-on-write, the default from pandas 3, such changes are not shared either).
+
+    Example:
+        frames = FramesBundle(RemindExport(path).load_technoeconomic_frames())
+        costs = make_pypsa_like_costs(frames)
+        frames = frames.replace(capex=new_capex)  # new bundle, shares the other frames
+    """
+
+    def __init__(self, frames: Mapping[str, Any] = None, **kwargs):
+        """
+        Args:
+            frames (Mapping[str, Any], optional): the frames by name. Defaults to None.
+            **kwargs: more frames by name
+        """
+        self._frames = MappingProxyType({**(frames or {}), **kwargs})
+
+    def __getitem__(self, key: str) -> Any:
+        frame = self._frames[key]
+        if isinstance(frame, (pd.DataFrame, pd.Series)):
+            return frame.copy(deep=False)
+        return frame
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._frames)
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __repr__(self) -> str:
+        return f"FramesBundle({list(self._frames)})"
+
+    def shared_items(self):
+        """the stored frames without copies, only for read-only inspection (e.g. hashing)"""
+        return self._frames.items()
+
+    def replace(self, **frames) -> "FramesBundle":
+        """a new bundle with some frames added or replaced"""
+        return FramesBundle({**self._frames, **frames})
+
+
 @register_etl("build_tech_map")
 def build_tech_groups(frames, map_param="investment") -> pd.DataFrame:
     """Wrapper for the utils.build_tech_map function"""
@@ -66,10 +124,10 @@ def convert_loads(loads: dict[str, pd.DataFrame], region: str = None) -> pd.Data
     TWYR2MWH = 365 * 24 * 1e6
     outp = pd.DataFrame()
     for k, df in loads.items():
-        df["load"] = k.split("_")[0]
+        df = df.assign(load=k.split("_")[0])
         if ("region" in df.columns) & (region is not None):
             df = df.query("region == @region").drop(columns=["region"])
-        df.value *= TWYR2MWH
+        df = df.assign(value=df.value * TWYR2MWH)
         outp = pd.concat([outp, df], axis=0)
     return outp.set_index("year")
 
@@ -89,7 +147,7 @@ def convert_remind_capacities(
     """
     TW2MW = 1e6
     caps = frames["capacities"]
-    caps.loc[:, "value"] *= TW2MW
+    caps = caps.assign(value=caps.value * TW2MW)
 
     if ("region" in caps.columns) & (region is not None):
         caps = caps.query("region == @region").drop(columns=["region"])
@@ -107,19 +165,29 @@ def convert_remind_capacities(
 @register_etl("technoeconomic_data")
 def technoeconomic_data(
     frames: Dict[str, pd.DataFrame],
-    mappings: pd.DataFrame,
-    pypsa_costs: pd.DataFrame,
+    mappings: pd.DataFrame | MappingPlan,
+    pypsa_costs: pd.DataFrame | PypsaCostDB,
     currency_conversion: 1.11,
     years: Optional[list] = None,
+    by_region: bool = False,
+    proxy_learning_mode: str = "ratio",
+    proxy_ref_years: Optional[list] = None,
 ) -> pd.DataFrame:
     """Mapping adapted from Johannes Hemp, based on csv mapping table
 
     Args:
         frames (Dict[str, pd.DataFrame]): dictionary of remind frames
-        mappings (pd.DataFrame): the mapping dataframe
-        pypsa_costs (pd.DataFrame): pypsa costs dataframe
+        mappings (pd.DataFrame | MappingPlan): the mapping dataframe or the compiled plan
+            (validated once, see `mapping_plan.MappingPlan`)
+        pypsa_costs (pd.DataFrame | PypsaCostDB): pypsa costs (indexed or long dataframe)
         currency_conversion (float): conversion factor for the currency (PyPSA to REMIND)
         years (Optional[list]): years to consider, if None REMIND capex years is used
+        by_region (bool): map all REMIND regions in one pass instead of a region-filtered
+            export. The output then has a region column and is sorted by region.
+        proxy_learning_mode (str): "ratio" (default) or "delta" learning from the REMIND proxy
+            for use_remind_with_learning_from
+        proxy_ref_years (Optional[list]): years anchoring the proxy learning to the pypsa
+            costs. Defaults to the first year.
     Returns:
         pd.DataFrame: dataframe with the mapped techno-economic data
     Raises:
@@ -130,11 +198,8 @@ def technoeconomic_data(
 
     """
 
-    # explode multiple references into rows
-    mappings.loc[:, "reference"] = mappings["reference"].apply(to_list)
-
-    # check the data & mappings
-    validate_mappings(mappings)
+    # split the reference lists & check the mappings (once for a compiled plan)
+    mappings = MappingPlan.compile(mappings)
 
     if years is None:
         years = frames["capex"].year.unique()
@@ -144,13 +209,11 @@ def technoeconomic_data(
         [df.rename(columns={"carrier": "technology", "value": "weight"}) for df in weight_frames]
     )
 
-    costs_remind = make_pypsa_like_costs(frames)
-    costs_remind = costs_remind.merge(weights, on=["technology", "year"], how="left")
+    # dense costs: lookups & basket weighing by array position instead of merges
+    costs_remind = CostCube.from_costs(make_pypsa_like_costs(frames, by_region=by_region))
 
     validate_remind_data(costs_remind, mappings)
 
-    mappings.loc[:, "reference"] = mappings["reference"].apply(to_list)
-
     # apply the mappings to pypsa tech
     mapped_costs = map_to_pypsa_tech(
         remind_costs_formatted=costs_remind,
@@ -159,9 +222,15 @@ def technoeconomic_data(
         weights=weights,
         years=years,
         currency_conversion=currency_conversion,
+        by_region=by_region,
+        proxy_learning_mode=proxy_learning_mode,
+        proxy_ref_years=proxy_ref_years,
     )
-    mapped_costs["value"].fillna(0, inplace=True)
+    mapped_costs.fillna({"value": 0}, inplace=True)
     mapped_costs.fillna(" ", inplace=True)
+    # keep the compact schema of the remind frames
+    if costs_remind.compact:
+        mapped_costs = to_compact_schema(mapped_costs, value_dtype=costs_remind.values.dtype)
 
     return mapped_costs
 
@@ -187,7 +256,7 @@ def harmonize_capacities_all_years(
     end_date_candidates = ["DateOut", "Retired year"]
     start_col = [c for c in start_date_candidates if c in pypsa_capacities][0]
     end_col = [c for c in end_date_candidates if c in pypsa_capacities][0]
-    pypsa_capacities.fillna({end_col:1e9}, inplace=True)
+    pypsa_capacities = pypsa_capacities.fillna({end_col: 1e9})
 
     years = remind_capacities.year.unique()
     harmonized = pd.DataFrame()
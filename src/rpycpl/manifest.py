@@ -0,0 +1,166 @@
+"""
+Symbol-level change detection between coupling iterations.
+
+A manifest holds a fingerprint per REMIND symbol of an export (csv folder or gdx file).
+Diffing the manifests of two exports gives the changed symbols, and with the ETL config
+the steps that depend on them. Only these need to be recomputed (see `Pipeline.rerun`).
+
+Example:
+    diff = diff_exports("iteration_1/pypsa_export", "iteration_2/pypsa_export")
+    pipeline = Pipeline.from_config(config, loader=RemindExport("iteration_2/pypsa_export"))
+    pipeline.affected_steps(diff.symbols)
+    outputs = pipeline.rerun(previous_outputs, diff.symbols, region="CHA")
+"""
+
+import os
+import glob
+import json
+import hashlib
+import logging
+import pandas as pd
+from dataclasses import dataclass, field
+
+from .utils import atomic_write, gdx_container
+
+logger = logging.getLogger(__name__)
+
+# manifest file written next to the csv symbols
+MANIFEST_FILE = "rpycpl_manifest.json"
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+@dataclass
+class SymbolDiff:
+    """The symbols that differ between two exports"""
+
+    changed: set = field(default_factory=set)
+    added: set = field(default_factory=set)
+    removed: set = field(default_factory=set)
+
+    @property
+    def symbols(self) -> set:
+        """all symbols that differ"""
+        return self.changed | self.added | self.removed
+
+    def __bool__(self) -> bool:
+        return bool(self.symbols)
+
+
+def _file_fingerprint(path: os.PathLike) -> str:
+    """hash of the file content"""
+    hasher = hashlib.sha1()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _csv_manifest(
+    export_dir: os.PathLike, previous: dict, symbols: list[str] = None
+) -> dict[str, dict]:
+    """fingerprint the csv symbols. Entries of files with unchanged size & mtime are reused"""
+    manifest = {}
+    for path in sorted(glob.glob(os.path.join(export_dir, "*.csv"))):
+        symbol = os.path.basename(path)[: -len(".csv")]
+        if symbols is not None and symbol not in symbols:
+            continue
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        known = previous.get(symbol, {})
+        if all(known.get(k) == v for k, v in entry.items()) and "sha1" in known:
+            entry["sha1"] = known["sha1"]
+        else:
+            entry["sha1"] = _file_fingerprint(path)
+        manifest[symbol] = entry
+    return manifest
+
+
+def _gdx_manifest(gdx_path: os.PathLike, symbols: list[str] = None) -> dict[str, dict]:
+    """fingerprint the symbol tables of a gdx file (only reads the given symbols)"""
+    if symbols is not None:
+        symbols = sorted(set(symbols))
+    manifest = {}
+    for symbol, data in gdx_container(gdx_path, symbols=symbols).data.items():
+        if symbols is not None and symbol not in symbols:
+            continue
+        records = data.records
+        hasher = hashlib.sha1(repr(list(getattr(records, "columns", []))).encode())
+        if records is not None:
+            hasher.update(pd.util.hash_pandas_object(records, index=False).values.tobytes())
+        manifest[symbol] = {"sha1": hasher.hexdigest()}
+    return manifest
+
+
+def build_manifest(
+    export_path: os.PathLike, write: bool = False, symbols: list[str] = None
+) -> dict[str, dict]:
+    """Fingerprint the symbols of a REMIND export.
+
+    Args:
+        export_path (os.PathLike): the export folder with one csv per symbol or a gdx file
+        write (bool, optional): save the manifest to the export folder (csv exports and all
+            symbols only), where it is reused for files that did not change. Defaults to False.
+        symbols (list[str], optional): only fingerprint these symbols (e.g. those of the ETL
+            config). Gdx files then only read them. Defaults to None (all symbols, a gdx
+            file is loaded whole).
+    Returns:
+        dict[str, dict]: the manifest {symbol: {"sha1": fingerprint, ...}}
+    """
+    if str(export_path).endswith(".gdx"):
+        return _gdx_manifest(export_path, symbols)
+
+    manifest_path = os.path.join(export_path, MANIFEST_FILE)
+    previous = load_manifest(manifest_path) if os.path.isfile(manifest_path) else {}
+    manifest = _csv_manifest(export_path, previous, symbols)
+    if write and symbols is None:
+        write_manifest(manifest, manifest_path)
+    return manifest
+
+
+def load_manifest(path: os.PathLike) -> dict[str, dict]:
+    """read a manifest json"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest: dict[str, dict], path: os.PathLike):
+    """write a manifest json (atomically)"""
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def diff_manifests(old: dict[str, dict], new: dict[str, dict]) -> SymbolDiff:
+    """Compare the symbol fingerprints of two manifests
+
+    Args:
+        old (dict[str, dict]): the manifest of the previous export
+        new (dict[str, dict]): the manifest of the new export
+    Returns:
+        SymbolDiff: the changed, added and removed symbols
+    """
+    common = old.keys() & new.keys()
+    return SymbolDiff(
+        changed={s for s in common if old[s]["sha1"] != new[s]["sha1"]},
+        added=set(new.keys() - old.keys()),
+        removed=set(old.keys() - new.keys()),
+    )
+
+
+def diff_exports(
+    old_path: os.PathLike, new_path: os.PathLike, symbols: list[str] = None
+) -> SymbolDiff:
+    """Compare the symbols of two REMIND exports (e.g. of two coupling iterations)
+
+    Args:
+        old_path (os.PathLike): the previous export (folder or gdx)
+        new_path (os.PathLike): the new export (folder or gdx)
+        symbols (list[str], optional): only compare these symbols, see `build_manifest`.
+            Defaults to None (all).
+    Returns:
+        SymbolDiff: the changed, added and removed symbols
+    """
+    diff = diff_manifests(
+        build_manifest(old_path, symbols=symbols), build_manifest(new_path, symbols=symbols)
+    )
+    logger.info(f"{len(diff.symbols)} REMIND symbols differ: {sorted(diff.symbols)}")
+    return diff
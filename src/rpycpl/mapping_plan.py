@@ -0,0 +1,113 @@
+"""
+The REMIND -> PyPSA tech mapping (`techmapping_remind2py.csv`) compiled once: validated, with
+the reference lists split and the rows of each mapper indexed. The plan can be saved and reused
+across years, regions and coupling iterations instead of re-parsing the table for every call.
+
+Example:
+    plan = MappingPlan.compile("data/techmapping_remind2py.csv")
+    plan.save("techmapping.plan.pkl")
+    plan = MappingPlan.load("techmapping.plan.pkl")
+    costs = technoeconomic_data(frames, plan, pypsa_costs, currency_conversion=1.11)
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+from .utils import atomic_write, register_reader, to_list
+from .technoecon_etl import MAPPING_FUNCTIONS, validate_mappings
+
+logger = logging.getLogger(__name__)
+
+# bump when the pickled layout changes
+PLAN_FORMAT = 1
+
+
+class MappingPlan:
+    """A validated tech mapping with the rows indexed by mapper"""
+
+    def __init__(self, mappings: pd.DataFrame, fingerprint: str = None):
+        """
+        Args:
+            mappings (pd.DataFrame): the mapping table (references may be list-like strings)
+            fingerprint (str, optional): hash of the source table. Defaults to None (computed).
+        Raises:
+            ValueError: if the mapping is invalid, see `technoecon_etl.validate_mappings`
+        """
+        self.fingerprint = fingerprint or _table_fingerprint(mappings)
+        data = mappings.assign(reference=mappings["reference"].apply(to_list))
+        validate_mappings(data)
+        self.data = data.reset_index(drop=True)
+        # integer row positions per mapper
+        self.positions = {
+            mapper: np.flatnonzero(self.data.mapper.to_numpy() == mapper)
+            for mapper in MAPPING_FUNCTIONS
+        }
+
+    @classmethod
+    def compile(cls, mappings: pd.DataFrame | os.PathLike) -> "MappingPlan":
+        """Compile a mapping table or csv file (pass plans through unchanged)"""
+        if isinstance(mappings, cls):
+            return mappings
+        if not isinstance(mappings, pd.DataFrame):
+            mappings = pd.read_csv(mappings)
+        return cls(mappings)
+
+    def rows(self, *mappers: str) -> pd.DataFrame:
+        """the mapping rows of the mappers (in table order)"""
+        positions = np.sort(np.concatenate([self.positions.get(m, []) for m in mappers]))
+        return self.data.iloc[positions.astype(int)]
+
+    def to_frame(self) -> pd.DataFrame:
+        """the validated mapping table (references as lists)"""
+        return self.data.copy()
+
+    def save(self, path: os.PathLike):
+        """write the plan (pickle, atomically)"""
+        with atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+            pickle.dump((PLAN_FORMAT, self), f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: os.PathLike) -> "MappingPlan":
+        """read a saved plan
+
+        Raises:
+            ValueError: if the plan was saved in another format version
+        """
+        with open(path, "rb") as f:
+            plan_format, plan = pickle.load(f)
+        if plan_format != PLAN_FORMAT:
+            raise ValueError(
+                f"Mapping plan {path} has format {plan_format}, expected {PLAN_FORMAT}"
+            )
+        return plan
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        counts = {m: len(p) for m, p in self.positions.items() if len(p)}
+        return f"MappingPlan({len(self)} rows, {counts})"
+
+
+def _table_fingerprint(mappings: pd.DataFrame) -> str:
+    hasher = hashlib.sha1(repr(list(mappings.columns)).encode())
+    hasher.update(mappings.astype(str).to_csv(index=False).encode())
+    return hasher.hexdigest()
+
+
+@register_reader("mapping_plan")
+def read_mapping_plan(path: os.PathLike) -> MappingPlan:
+    """read a tech mapping csv (compiled) or a saved plan (.pkl)
+
+    Args:
+        path (os.PathLike): the mapping csv or plan file
+    Returns:
+        MappingPlan: the compiled mapping
+    """
+    if str(path).endswith(".pkl"):
+        return MappingPlan.load(path)
+    return MappingPlan.compile(path)
@@ -0,0 +1,212 @@
+"""
+Run the ETL steps of a config as a DAG: steps run as soon as their dependencies are done,
+independent steps run concurrently.
+
+The `dependencies` of a step map a frame name to the name of an upstream step (or to
+an external input passed to `Pipeline.run`). The upstream output is passed to the
+step as part of its frames.
+
+Example:
+```yaml
+etl_steps:
+  - name: tech_groups
+    method: build_tech_map
+    dependencies:
+      tech_mapping: tech_mapping # external input, Pipeline.run(inputs={"tech_mapping": df})
+  - name: capacities
+    method: convert_capacities
+    frames:
+      capacities: p32_cap
+    dependencies:
+      tech_groups: tech_groups
+```
+"""
+
+import os
+import inspect
+import logging
+import yaml
+import pandas as pd
+from graphlib import TopologicalSorter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any
+
+from .etl import ETL_REGISTRY, Transformation, FramesBundle
+
+logger = logging.getLogger(__name__)
+
+
+class Pipeline:
+    """DAG scheduled ETL steps"""
+
+    def __init__(self, steps: list[Transformation], loader=None, n_workers: int = None):
+        """
+        Args:
+            steps (list[Transformation]): the ETL steps
+            loader (optional): reader for the REMIND frames of the steps, with a
+                `load_frames({key: symbol})` method (e.g `readers.RemindExport`)
+            n_workers (int, optional): number of worker threads. Defaults to None (python default)
+        """
+        self.steps = {step.name: step for step in steps}
+        if len(self.steps) != len(steps):
+            raise ValueError("ETL step names must be unique")
+        self.loader = loader
+        self.n_workers = n_workers
+
+    @classmethod
+    def from_config(cls, config: dict | os.PathLike, **kwargs) -> "Pipeline":
+        """Build the pipeline from the `etl_steps` of a config (dict or yaml path)
+
+        Args:
+            config (dict | os.PathLike): the config or path to the yaml config
+            **kwargs: see `Pipeline.__init__`
+        """
+        if not isinstance(config, dict):
+            with open(config) as f:
+                config = yaml.safe_load(f)
+        steps = [Transformation(**step) for step in config.get("etl_steps", [])]
+        return cls(steps, **kwargs)
+
+    def graph(self, inputs: dict = None) -> dict[str, set]:
+        """the step dependency graph {step: upstream steps}
+
+        Args:
+            inputs (dict, optional): external inputs that dependencies may refer to.
+        Raises:
+            ValueError: if a dependency is neither a step nor an input
+        """
+        inputs = inputs or {}
+        graph = {}
+        for name, step in self.steps.items():
+            upstream = set()
+            for key, dep in (step.dependencies or {}).items():
+                if dep in self.steps:
+                    upstream.add(dep)
+                elif dep not in inputs:
+                    raise ValueError(f"Step {name}: dependency {key}={dep} is not a step or input")
+            graph[name] = upstream
+        return graph
+
+    def run(self, inputs: dict = None, **kwargs) -> dict[str, Any]:
+        """Run all steps, concurrently where the dependencies allow
+
+        Args:
+            inputs (dict, optional): external inputs that dependencies may refer to.
+            **kwargs: arguments for the ETL methods (e.g region). Each method only gets
+                the arguments in its signature. Also available to the frame filters as @name
+        Returns:
+            dict[str, Any]: the outputs by step name
+        Raises:
+            graphlib.CycleError: if the dependencies are circular
+        """
+        inputs = inputs or {}
+        sorter = TopologicalSorter(self.graph(inputs))
+        sorter.prepare()
+        outputs, running = {}, {}
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            while sorter.is_active():
+                for name in sorter.get_ready():
+                    upstream = {**inputs, **outputs}
+                    future = pool.submit(self.run_step, self.steps[name], upstream, **kwargs)
+                    running[future] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name] = future.result()
+                    sorter.done(name)
+        return outputs
+
+    def affected_steps(self, changed: set) -> set[str]:
+        """The steps to recompute when REMIND symbols or external inputs changed: the steps
+        reading them and all their downstream steps.
+
+        Args:
+            changed (set): names of the changed REMIND symbols and/or inputs
+                (e.g. `manifest.diff_exports(old, new).symbols`)
+        Returns:
+            set[str]: the affected step names
+        """
+        affected = {
+            name
+            for name, step in self.steps.items()
+            if set((step.frames or {}).values()) & set(changed)
+            or set((step.dependencies or {}).values()) & set(changed)
+        }
+        # propagate downstream
+        n_affected = None
+        while n_affected != len(affected):
+            n_affected = len(affected)
+            affected |= {
+                name
+                for name, step in self.steps.items()
+                if set((step.dependencies or {}).values()) & affected
+            }
+        return affected
+
+    def rerun(
+        self, previous: dict[str, Any], changed: set, inputs: dict = None, **kwargs
+    ) -> dict[str, Any]:
+        """Only recompute the steps affected by changed symbols or inputs, reuse the
+        previous outputs of the other steps.
+
+        Args:
+            previous (dict[str, Any]): the outputs of the previous run by step name
+            changed (set): names of the changed REMIND symbols and/or inputs
+            inputs (dict, optional): external inputs that dependencies may refer to.
+            **kwargs: arguments for the ETL methods, see `run`
+        Returns:
+            dict[str, Any]: the outputs by step name
+        """
+        affected = self.affected_steps(changed)
+        missing = set(self.steps).difference(affected, previous)
+        if missing:
+            raise ValueError(f"No previous output for the unchanged steps {sorted(missing)}")
+        reused = {name: previous[name] for name in self.steps if name not in affected}
+        logger.info(f"Recomputing steps {sorted(affected)}, reusing {sorted(reused)}")
+
+        subset = Pipeline(
+            [self.steps[name] for name in affected], loader=self.loader, n_workers=self.n_workers
+        )
+        outputs = subset.run(inputs={**(inputs or {}), **reused}, **kwargs)
+        return {name: reused.get(name, outputs.get(name)) for name in self.steps}
+
+    def run_step(self, step: Transformation, upstream: dict = None, **kwargs) -> Any:
+        """Run a single ETL step
+
+        Args:
+            step (Transformation): the step
+            upstream (dict, optional): upstream outputs & inputs by name. Defaults to None.
+            **kwargs: arguments for the ETL method, filtered by its signature
+        Returns:
+            Any: the step output
+        """
+        method = step.method or step.name
+        func = ETL_REGISTRY.get(method)
+        if not func:
+            raise ValueError(f"ETL method '{method}' not found in registry.")
+
+        frames = self.load_frames(step)
+        upstream = upstream or {}
+        frames.update({key: upstream[dep] for key, dep in (step.dependencies or {}).items()})
+        for key, query in (step.filters or {}).items():
+            frames[key] = frames[key].query(query, local_dict=kwargs)
+        # upstream outputs are shared with other steps
+        frames = FramesBundle(frames)
+
+        params = inspect.signature(func).parameters.values()
+        step_kwargs = {**(step.params or {}), **kwargs}
+        if not any(p.kind == p.VAR_KEYWORD for p in params):
+            accepted = {p.name for p in params}
+            step_kwargs = {k: v for k, v in step_kwargs.items() if k in accepted}
+        step_kwargs.update(step.kwargs or {})
+
+        logger.info(f"Running ETL step {step.name} ({method})")
+        return func(frames, **step_kwargs)
+
+    def load_frames(self, step: Transformation) -> dict[str, pd.DataFrame]:
+        """load the REMIND frames of a step"""
+        if not any((step.frames or {}).values()):
+            return {}
+        if self.loader is None:
+            raise ValueError(f"Step {step.name} needs REMIND frames but no loader was given")
+        return self.loader.load_frames(step.frames)
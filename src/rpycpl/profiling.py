@@ -0,0 +1,233 @@
+"""
+Per-step profiling of the ETL functions.
+
+Each registered ETL function (and the main transforms, e.g. make_pypsa_like_costs) reports
+its wall time, CPU time, peak RSS and tracemalloc delta, plus the row counts and memory of
+its input and output frames. Profiling is off by default and enabled either
+
+- for a block of code: `with profile_steps("trace.json") as profiler: ...`
+- for a whole run: set the RPYCPL_PROFILE env variable to the trace path
+
+The trace is written as json (or csv if the path ends with .csv) together with a Chrome trace
+timeline (`<trace>.chrome.json`, open in chrome://tracing or https://ui.perfetto.dev).
+The tracemalloc delta is only recorded when tracemalloc is tracing (PYTHONTRACEMALLOC=1 or
+`profile_steps(trace_memory=True)`), as it slows down the run.
+"""
+
+import os
+import csv
+import json
+import time
+import atexit
+import logging
+import threading
+import functools
+import tracemalloc
+import contextlib
+import pandas as pd
+from collections.abc import Mapping
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "RPYCPL_PROFILE"
+TRACE_FIELDS = [
+    "name",
+    "start",
+    "wall_s",
+    "cpu_s",
+    "max_rss_mb",
+    "tracemalloc_delta_mb",
+    "in_rows",
+    "in_mb",
+    "out_rows",
+    "out_mb",
+    "thread",
+]
+
+_ACTIVE = []
+_ACTIVE_LOCK = threading.Lock()
+_ENV_PROFILER = None
+
+
+class StepProfiler:
+    """Collects the step records of a profiled run"""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+    def to_frame(self) -> pd.DataFrame:
+        """the records as a table, one row per step call"""
+        return pd.DataFrame(self.records, columns=TRACE_FIELDS)
+
+    def summary(self) -> pd.DataFrame:
+        """total & mean wall/cpu time by step, slowest first"""
+        df = self.to_frame()
+        summary = df.groupby("name")[["wall_s", "cpu_s"]].agg(["count", "sum", "mean"])
+        return summary.sort_values(("wall_s", "sum"), ascending=False)
+
+    def write(self, path: os.PathLike):
+        """Write the trace (json or csv by extension) and the Chrome trace timeline
+
+        Args:
+            path (os.PathLike): the trace path, the timeline goes to <stem>.chrome.json
+        """
+        stem, ext = os.path.splitext(os.fspath(path))
+        if ext == ".csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            with open(path, "w") as f:
+                json.dump(self.records, f, indent=1)
+        with open(stem + ".chrome.json", "w") as f:
+            json.dump(self.chrome_trace(), f)
+        logger.info(f"Wrote ETL profile to {path}")
+
+    def chrome_trace(self) -> dict:
+        """the records as Chrome trace complete events"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": rec["name"],
+                "ph": "X",
+                "ts": rec["start"] * 1e6,
+                "dur": rec["wall_s"] * 1e6,
+                "pid": pid,
+                "tid": rec["thread"],
+                "args": {k: v for k, v in rec.items() if k not in ("name", "start", "thread")},
+            }
+            for rec in self.records
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _env_profiler() -> StepProfiler | None:
+    """the run-wide profiler of the RPYCPL_PROFILE env variable, written at exit"""
+    global _ENV_PROFILER
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        return None
+    with _ACTIVE_LOCK:
+        if _ENV_PROFILER is None:
+            _ENV_PROFILER = StepProfiler()
+            atexit.register(_ENV_PROFILER.write, path)
+    return _ENV_PROFILER
+
+
+def _active_profilers() -> list[StepProfiler]:
+    profilers = list(_ACTIVE)
+    env = _env_profiler()
+    if env is not None:
+        profilers.append(env)
+    return profilers
+
+
+@contextlib.contextmanager
+def profile_steps(trace_path: os.PathLike = None, trace_memory: bool = False):
+    """Profile the ETL steps run inside the block
+
+    Args:
+        trace_path (os.PathLike, optional): write the trace here on exit. Defaults to None.
+        trace_memory (bool, optional): record the tracemalloc delta (slow). Defaults to False.
+    Yields:
+        StepProfiler: the collected records
+    """
+    profiler = StepProfiler()
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    with _ACTIVE_LOCK:
+        _ACTIVE.append(profiler)
+    try:
+        yield profiler
+    finally:
+        with _ACTIVE_LOCK:
+            _ACTIVE.remove(profiler)
+        if started_tracing:
+            tracemalloc.stop()
+        if trace_path:
+            profiler.write(trace_path)
+
+
+def _frame_stats(obj) -> tuple[int, int]:
+    """total rows and (shallow) memory bytes of the frames in an argument"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj), int(obj.memory_usage(index=True, deep=False).sum())
+    if isinstance(obj, Mapping):
+        obj = [value for _, value in getattr(obj, "shared_items", obj.items)()]
+    if isinstance(obj, (list, tuple)):
+        stats = [_frame_stats(item) for item in obj]
+        return sum(s[0] for s in stats), sum(s[1] for s in stats)
+    if hasattr(obj, "to_frame") and hasattr(obj, "data"):
+        # indexed tables, e.g. PypsaCostDB
+        return _frame_stats(obj.data)
+    return 0, 0
+
+
+def _max_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profiled_step(func, name: str = None):
+    """Wrap a function so that its calls are recorded when profiling is enabled.
+    The wrapper keeps the signature of the function.
+
+    Args:
+        func (callable): the function
+        name (str, optional): the step name in the trace. Defaults to the function name.
+    Returns:
+        callable: the wrapped function
+    """
+    name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profilers = _active_profilers()
+        if not profilers:
+            return func(*args, **kwargs)
+
+        in_rows, in_bytes = _frame_stats([args, kwargs])
+        tracing = tracemalloc.is_tracing()
+        mem_start = tracemalloc.get_traced_memory()[0] if tracing else None
+        mem_delta = None
+        start, wall, cpu = time.time(), time.perf_counter(), time.thread_time()
+
+        result = func(*args, **kwargs)
+
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+        if tracing:
+            mem_delta = (tracemalloc.get_traced_memory()[0] - mem_start) / 1024**2
+        out_rows, out_bytes = _frame_stats(result)
+        record = {
+            "name": name,
+            "start": start,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "max_rss_mb": _max_rss_mb(),
+            "tracemalloc_delta_mb": mem_delta,
+            "in_rows": in_rows,
+            "in_mb": in_bytes / 1024**2,
+            "out_rows": out_rows,
+            "out_mb": out_bytes / 1024**2,
+            "thread": threading.get_ident(),
+        }
+        for profiler in profilers:
+            profiler.add(record)
+        logger.debug(f"Step {name}: {wall:.3f}s wall, {cpu:.3f}s cpu")
+        return result
+
+    return wrapper
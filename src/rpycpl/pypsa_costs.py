@@ -0,0 +1,102 @@
+"""
+Indexed access to the PyPSA techno-economic data (the `costs_{year}.csv` files)
+
+Example:
+    pypsa_costs = PypsaCostDB.from_dir("resources/data/costs")
+    pypsa_costs.values(["OCGT", "CCGT"], "investment", 2030)
+"""
+
+import os
+import glob
+import logging
+import pandas as pd
+
+from .utils import read_pypsa_costs
+
+logger = logging.getLogger(__name__)
+
+INDEX_COLS = ["technology", "parameter", "year"]
+
+
+class PypsaCostDB:
+    """The PyPSA cost data indexed by (technology, parameter, year)"""
+
+    def __init__(self, costs: pd.DataFrame):
+        """
+        Args:
+            costs (pd.DataFrame): the stitched pypsa costs (long format, all years)
+        """
+        data = costs.set_index(INDEX_COLS).sort_index()
+        duplicated = data.index.duplicated()
+        if duplicated.any():
+            logger.warning(
+                f"Dropping duplicated PyPSA cost entries: {data.index[duplicated].tolist()[:10]}"
+            )
+            data = data[~duplicated]
+        self.data = data
+
+    @classmethod
+    def from_files(cls, cost_files: list, n_workers: int = None, **kwargs) -> "PypsaCostDB":
+        """Read the cost files concurrently
+
+        Args:
+            cost_files (list): paths to the pypsa costs files
+            n_workers (int, optional): number of reader threads. Defaults to None.
+            **kwargs: additional arguments for pd.read_csv
+        """
+        return cls(read_pypsa_costs(cost_files, n_workers=n_workers, **kwargs))
+
+    @classmethod
+    def from_dir(
+        cls, costs_dir: os.PathLike, pattern: str = "costs_*.csv", **kwargs
+    ) -> "PypsaCostDB":
+        """Read all cost files matching the pattern in a folder, see `from_files`"""
+        cost_files = sorted(glob.glob(os.path.join(costs_dir, pattern)))
+        if not cost_files:
+            raise FileNotFoundError(f"No PyPSA cost files {pattern} in {costs_dir}")
+        return cls.from_files(cost_files, **kwargs)
+
+    @property
+    def years(self) -> pd.Index:
+        return self.data.index.unique("year")
+
+    def to_frame(self) -> pd.DataFrame:
+        """the cost data in the long (costs.csv) format"""
+        return self.data.reset_index()
+
+    def values(
+        self, technologies: list, parameter: str, year: int, column: str = "value"
+    ) -> pd.Series:
+        """Look up the values of several technologies for a parameter & year
+
+        Args:
+            technologies (list): the pypsa technologies
+            parameter (str): the techno-economic parameter
+            year (int): the data year
+            column (str, optional): the data column, e.g. "unit". Defaults to "value".
+        Returns:
+            pd.Series: the values by technology (NaN if missing)
+        """
+        technologies = list(technologies)
+        keys = pd.MultiIndex.from_arrays(
+            [technologies, [parameter] * len(technologies), [year] * len(technologies)],
+            names=INDEX_COLS,
+        )
+        return self.data[column].reindex(keys).droplevel(["parameter", "year"])
+
+    def lookup(self, keys: pd.DataFrame, tech_col: str = "technology") -> pd.DataFrame:
+        """Left join the cost data (all years) on (technology, parameter) keys. The result is
+        the same as a merge of the keys and the long cost table (suffixes _x, _y).
+
+        Args:
+            keys (pd.DataFrame): table with a technology and a parameter column
+            tech_col (str, optional): the technology column of keys. Defaults to "technology".
+        Returns:
+            pd.DataFrame: the keys with the matching cost rows, one per year
+        """
+        by_tech_param = self.data.reset_index("year")
+        found = keys.join(
+            by_tech_param, on=[tech_col, "parameter"], how="left", lsuffix="_x", rsuffix="_y"
+        ).reset_index(drop=True)
+        found["technology"] = found[tech_col].where(found["year"].notna())
+        return found
@@ -0,0 +1,103 @@
+"""
+Readers for complete REMIND exports (a folder of csv symbol tables or a gdx file).
+
+Example:
+    export = RemindExport("path/to/pypsa_export")
+    frames = export.load_technoeconomic_frames()
+    costs = make_pypsa_like_costs(frames)
+"""
+
+import os
+import logging
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import read_remind_csv, read_gdx_symbols, validate_file_list, to_compact_schema
+from .technoecon_etl import REMIND_PARAM_MAP
+
+logger = logging.getLogger(__name__)
+
+
+class RemindExport:
+    """A REMIND export, read symbol by symbol in parallel (csv) or in one pass (gdx)"""
+
+    def __init__(
+        self,
+        path: os.PathLike,
+        n_workers: int = None,
+        cache_dir: os.PathLike = None,
+        regions: list[str] | str = None,
+        compact: bool | str = False,
+    ):
+        """
+        Args:
+            path (os.PathLike): the export folder with one csv per symbol or a gdx file
+            n_workers (int, optional): number of reader threads. Defaults to None (python default)
+            cache_dir (os.PathLike, optional): the csv cache dir, see `utils.read_remind_csv`
+            regions (list[str] | str, optional): only read these REMIND regions. Defaults to None.
+            compact (bool | str, optional): use the compact schema, see `utils.read_remind_csv`.
+        """
+        self.path = path
+        self.n_workers = n_workers
+        self.cache_dir = cache_dir
+        self.regions = regions
+        self.compact = compact
+
+    @property
+    def is_gdx(self) -> bool:
+        return str(self.path).endswith(".gdx")
+
+    def symbol_path(self, symbol: str) -> str:
+        """path to the csv export of a symbol"""
+        return os.path.join(self.path, symbol + ".csv")
+
+    def load_frames(self, symbols: dict[str, str]) -> dict[str, pd.DataFrame]:
+        """Load the symbols, reading files concurrently
+
+        Args:
+            symbols (dict[str, str]): the {key: remind symbol name} to load. Null symbols
+                are skipped (as in the etl_steps yaml frames).
+        Returns:
+            dict[str, pd.DataFrame]: the tables by key
+        """
+        symbols = {k: v for k, v in symbols.items() if v}
+        if self.is_gdx:
+            return read_gdx_symbols(
+                self.path, symbols, regions=self.regions, compact=self.compact
+            )
+
+        paths = {k: self.symbol_path(v) for k, v in symbols.items()}
+        validate_file_list(paths.values())
+        with ThreadPoolExecutor(max_workers=self.n_workers) as pool:
+            futures = {
+                k: pool.submit(
+                    read_remind_csv,
+                    p,
+                    cache_dir=self.cache_dir,
+                    regions=self.regions,
+                    compact=self.compact,
+                )
+                for k, p in paths.items()
+            }
+            return {k: fut.result() for k, fut in futures.items()}
+
+    def load_technoeconomic_frames(self) -> dict[str, pd.DataFrame]:
+        """Load all symbols of the REMIND_PARAM_MAP, as expected by make_pypsa_like_costs.
+        The efficiencies split across two REMIND tables are merged into `eta`.
+
+        Returns:
+            dict[str, pd.DataFrame]: the technoeconomic frames
+        """
+        frames = self.load_frames(REMIND_PARAM_MAP)
+        # special case, eff split across two tables
+        eta_part2 = frames.pop("eta_part2")
+        frames["eta"] = pd.concat([frames["eta"], eta_part2]).drop_duplicates()
+        frames["eta"].reset_index(drop=True, inplace=True)
+        if self.compact:
+            frames["eta"] = to_compact_schema(frames["eta"], eta_part2.value.dtype)
+        return frames
+
+    def read_version(self) -> str:
+        """read the REMIND model version from the export (c_model_version.csv)"""
+        with open(self.symbol_path("c_model_version"), "r") as f:
+            return f.read().split("\n")[1].replace(",", "").replace(" ", "")
@@ -0,0 +1,225 @@
+"""
+Opt-in on-disk cache for the registered ETL steps.
+
+Results are stored under a content-addressed key: a fingerprint of the input frames
+(`pd.util.hash_pandas_object`), the other arguments and the source (and optional version)
+of the ETL function. Between coupling iterations most REMIND symbols do not change, so
+steps with unchanged inputs are loaded from disk instead of recomputed.
+
+The cache is off by default. Enable it with `configure_step_cache(cache_dir)` or by setting
+the RPYCPL_STEP_CACHE_DIR env variable. Least recently used entries are evicted when the
+cache exceeds its size bound.
+
+Example:
+    configure_step_cache("/tmp/rpycpl_steps", max_bytes=2e9)
+    costs = ETL_REGISTRY["technoeconomic_data"](frames, mappings, pypsa_costs, 1.11)
+"""
+
+import os
+import glob
+import pickle
+import hashlib
+import inspect
+import logging
+import functools
+import threading
+import numpy as np
+from collections.abc import Mapping
+import pandas as pd
+
+from .utils import atomic_write, package_fingerprint
+
+logger = logging.getLogger(__name__)
+
+STEP_CACHE_DIR_ENV = "RPYCPL_STEP_CACHE_DIR"
+STEP_CACHE_LIMITS = {"cache_dir": None, "max_bytes": 2 * 1024**3}
+_STEP_CACHE_LOCK = threading.RLock()
+
+
+class UnhashableInput(TypeError):
+    """The step arguments can not be fingerprinted (the call is not cached)"""
+
+
+def configure_step_cache(cache_dir: os.PathLike = None, max_bytes: int = 2 * 1024**3):
+    """Enable (or disable) the ETL step cache.
+
+    Args:
+        cache_dir (os.PathLike, optional): where to store the results. Defaults to None
+            (disabled unless the RPYCPL_STEP_CACHE_DIR env variable is set).
+        max_bytes (int, optional): max total size of the cached results. Defaults to 2 GB.
+    """
+    if max_bytes is not None and max_bytes <= 0:
+        raise ValueError("The step cache size bound must be positive")
+    with _STEP_CACHE_LOCK:
+        STEP_CACHE_LIMITS.update({"cache_dir": cache_dir, "max_bytes": max_bytes})
+        if cache_dir:
+            _evict_step_cache(cache_dir)
+
+
+def step_cache_dir() -> str | None:
+    """the active cache folder (None if the cache is disabled)"""
+    return STEP_CACHE_LIMITS["cache_dir"] or os.environ.get(STEP_CACHE_DIR_ENV)
+
+
+def clear_step_cache(cache_dir: os.PathLike = None):
+    """Delete all cached results.
+
+    Args:
+        cache_dir (os.PathLike, optional): the cache folder. Defaults to the active one.
+    """
+    cache_dir = cache_dir or step_cache_dir()
+    if not cache_dir:
+        return
+    with _STEP_CACHE_LOCK:
+        for path in glob.glob(os.path.join(cache_dir, "*.pkl")):
+            os.remove(path)
+
+
+def _update_hash(hasher, obj):
+    """feed an argument to the hasher (frames by content, containers recursively)"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        hasher.update(type(obj).__name__.encode())
+        hasher.update(repr(obj.dtypes.to_dict() if obj.ndim == 2 else obj.dtype).encode())
+        hasher.update(repr(list(obj.columns) if obj.ndim == 2 else obj.name).encode())
+        hasher.update(repr(list(obj.index.names)).encode())
+        try:
+            hasher.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        except TypeError:
+            # unhashable cells (e.g. lists)
+            _update_hash(hasher, pickle.dumps(obj))
+    elif isinstance(obj, Mapping):
+        items = dict(getattr(obj, "shared_items", obj.items)())
+        hasher.update(f"dict{len(items)}".encode())
+        for key in sorted(items, key=repr):
+            _update_hash(hasher, key)
+            _update_hash(hasher, items[key])
+    elif isinstance(obj, (list, tuple)):
+        hasher.update(f"{type(obj).__name__}{len(obj)}".encode())
+        for item in obj:
+            _update_hash(hasher, item)
+    elif isinstance(obj, np.ndarray):
+        hasher.update(repr((obj.dtype, obj.shape)).encode())
+        hasher.update(pd.util.hash_array(obj.ravel()).tobytes())
+    elif obj is None or isinstance(obj, (str, bytes, bool, int, float, np.generic)):
+        hasher.update(repr((type(obj).__name__, obj)).encode())
+    elif hasattr(obj, "to_frame"):
+        # indexed tables, e.g. PypsaCostDB
+        hasher.update(type(obj).__name__.encode())
+        _update_hash(hasher, obj.to_frame())
+    else:
+        try:
+            hasher.update(pickle.dumps(obj))
+        except Exception as e:
+            raise UnhashableInput(f"Can not fingerprint {type(obj).__name__}") from e
+
+
+def function_fingerprint(func, version: str = None) -> str:
+    """fingerprint of an ETL function: its qualified name, source and version
+    (and the rpycpl sources)"""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = ""
+    ident = f"{func.__module__}.{func.__qualname__}|{version}|{source}|{package_fingerprint()}"
+    return hashlib.sha1(ident.encode()).hexdigest()
+
+
+def fingerprint(func, args: tuple, kwargs: dict, version: str = None) -> str:
+    """Content-addressed key of a step call.
+
+    Args:
+        func (callable): the ETL function
+        args (tuple): the positional arguments
+        kwargs (dict): the keyword arguments
+        version (str, optional): the version of the ETL function. Defaults to None.
+    Returns:
+        str: the hex key
+    Raises:
+        UnhashableInput: if an argument can not be fingerprinted
+    """
+    hasher = hashlib.sha1(function_fingerprint(func, version).encode())
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    _update_hash(hasher, dict(bound.arguments))
+    return hasher.hexdigest()
+
+
+def _evict_step_cache(cache_dir: os.PathLike):
+    """delete least recently used results until within the size bound (keeps the newest)"""
+    max_bytes = STEP_CACHE_LIMITS["max_bytes"]
+    if max_bytes is None:
+        return
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, "*.pkl")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    entries.sort()
+    n_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in entries[:-1]:
+        if n_bytes <= max_bytes:
+            break
+        logger.debug(f"Evicting {path} from the step cache")
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        n_bytes -= size
+
+
+def _load_result(path: str):
+    with open(path, "rb") as f:
+        result = pickle.load(f)
+    # mark as recently used for the eviction
+    os.utime(path)
+    return result
+
+
+def _store_result(result, cache_dir: os.PathLike, path: str):
+    """write the result (atomically) and evict old entries"""
+    os.makedirs(cache_dir, exist_ok=True)
+    with atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with _STEP_CACHE_LOCK:
+        _evict_step_cache(cache_dir)
+
+
+def cached_step(func, version: str = None):
+    """Wrap an ETL function so that its results are cached when the step cache is enabled.
+    The wrapper keeps the signature of the function.
+
+    Args:
+        func (callable): the ETL function
+        version (str, optional): bump to invalidate results, e.g. when a helper outside
+            rpycpl that the function calls changes. Defaults to None.
+    Returns:
+        callable: the wrapped function
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache_dir = step_cache_dir()
+        if not cache_dir:
+            return func(*args, **kwargs)
+        try:
+            key = fingerprint(func, args, kwargs, version)
+        except UnhashableInput as e:
+            logger.debug(f"Not caching {func.__name__}: {e}")
+            return func(*args, **kwargs)
+
+        path = os.path.join(cache_dir, f"{func.__name__}_{key}.pkl")
+        if os.path.isfile(path):
+            try:
+                result = _load_result(path)
+                logger.debug(f"Loaded {func.__name__} result from the step cache {path}")
+                return result
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning(f"Ignoring unreadable step cache entry {path}: {e}")
+
+        result = func(*args, **kwargs)
+        _store_result(result, cache_dir, path)
+        return result
+
+    wrapper.version = version
+    return wrapper
@@ -0,0 +1,354 @@
+"""
+Synthetic REMIND & PyPSA inputs at configurable scale, e.g. to measure the scaling of the ETL
+steps without access to REMIND outputs.
+
+The data is random but consistent: the REMIND export has all `REMIND_PARAM_MAP` symbols
+(with the GAMS set names of the csv exports), the tech mapping only references available
+data and validates, the PyPSA costs cover the mapped technologies and the power plants are
+assigned to the tech groups of the mapping.
+
+Example:
+    scale = SyntheticScale(n_regions=21, n_years=18, n_techs=60, n_plants=50_000)
+    paths = write_synthetic_inputs("synthetic_inputs", scale)
+    frames = RemindExport(paths["remind_export"], regions="CHA").load_technoeconomic_frames()
+
+or from the command line: `python -m rpycpl.synthetic synthetic_inputs --n-regions 21`
+"""
+
+import os
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from .utils import build_tech_map
+from .technoecon_etl import REMIND_PARAM_MAP
+
+logger = logging.getLogger(__name__)
+
+REMIND_REGIONS = [
+    "CAZ", "CHA", "EUR", "IND", "JPN", "LAM", "MEA", "NEU", "OAS", "REF", "SSA", "USA",
+    "DEU", "ECE", "ECS", "ENC", "ESC", "ESW", "EWN", "FRA", "UKI",
+]
+# REMIND technologies and their primary energy carrier (None: no fuel)
+REMIND_TECHS = {
+    "spv": None, "csp": None, "windon": None, "windoff": None, "hydro": None, "geohdr": None,
+    "ngcc": "pegas", "ngccc": "pegas", "gaschp": "pegas", "ngt": "pegas",
+    "pc": "pecoal", "igcc": "pecoal", "igccc": "pecoal", "coalchp": "pecoal",
+    "biochp": "pebiolc", "bioigcc": "pebiolc", "bioigccc": "pebiolc",
+    "dot": "peoil", "oilchp": "peoil", "tnrs": "peur", "fnrs": "peur",
+    "btin": None, "elh2": None, "h2turb": None,
+}
+FOSSIL_CARRIERS = ["pegas", "pecoal", "peoil"]
+# sizes of the REMIND tech baskets mapped to one PyPSA tech (1: use_remind, >1: weighed),
+# cycled through
+BASKET_PATTERN = [1, 1, 3]
+PPM_FUELTYPES = {
+    None: "Other", "pegas": "Natural Gas", "pecoal": "Hard Coal", "pebiolc": "Bioenergy",
+    "peoil": "Oil", "peur": "Nuclear",
+}
+
+
+@dataclass
+class SyntheticScale:
+    """The size of the synthetic inputs"""
+
+    n_regions: int = 12
+    n_years: int = 10
+    n_techs: int = 24
+    n_plants: int = 1_000
+    n_nodes: int = 30
+    start_year: int = 2025
+    year_step: int = 5
+    seed: int = 0
+
+    @property
+    def regions(self) -> list[str]:
+        extra = [f"R{i:02d}" for i in range(len(REMIND_REGIONS), self.n_regions)]
+        return (REMIND_REGIONS + extra)[: self.n_regions]
+
+    @property
+    def years(self) -> list[int]:
+        return [self.start_year + i * self.year_step for i in range(self.n_years)]
+
+    @property
+    def techs(self) -> dict[str, str | None]:
+        """the REMIND technologies with their fuel carrier"""
+        known = list(REMIND_TECHS.items())
+        extra = [
+            (f"{name}_{i // len(known)}", carrier)
+            for i, (name, carrier) in enumerate(known * (self.n_techs // len(known) + 1))
+        ]
+        return dict((known + extra[len(known) :])[: self.n_techs])
+
+
+def _grid(**axes) -> pd.DataFrame:
+    """cartesian product of the axes as a table"""
+    index = pd.MultiIndex.from_product(list(axes.values()), names=list(axes))
+    return index.to_frame(index=False)
+
+
+def make_remind_frames(scale: SyntheticScale) -> dict[str, pd.DataFrame]:
+    """Make the REMIND symbol tables, with the set names of the GAMS csv export
+
+    Args:
+        scale (SyntheticScale): the size of the data
+    Returns:
+        dict[str, pd.DataFrame]: the tables by REMIND symbol name
+    """
+    rng = np.random.default_rng(scale.seed)
+    techs = scale.techs
+    te_names = list(techs)
+    years, regions = scale.years, scale.regions
+    symbols = {}
+
+    # costs fall over time with tech specific learning
+    capex = _grid(ttot=years, all_regi=regions, all_te=te_names)
+    base = dict(zip(te_names, rng.uniform(0.5, 5, len(te_names))))
+    learning = dict(zip(te_names, rng.uniform(0, 0.03, len(te_names))))
+    elapsed = capex.ttot - scale.start_year
+    capex["value"] = capex.all_te.map(base) * (1 - capex.all_te.map(learning)) ** elapsed
+    capex["value"] *= rng.uniform(0.9, 1.1, len(capex))
+    symbols[REMIND_PARAM_MAP["capex"]] = capex
+
+    chars = ["omf", "omv", "lifetime", "inco0", "tech_stat"]
+    tech_data = _grid(all_regi=regions, char=chars, all_te=te_names)
+    ranges = {
+        "omf": (0.01, 0.05), "omv": (1e-4, 1e-2), "lifetime": (20, 60),
+        "inco0": (500, 5000), "tech_stat": (0, 3),
+    }
+    low = tech_data.char.map({k: v[0] for k, v in ranges.items()})
+    high = tech_data.char.map({k: v[1] for k, v in ranges.items()})
+    tech_data["value"] = rng.uniform(low, high)
+    tech_data.loc[tech_data.char == "lifetime", "value"] = tech_data.value.round()
+    symbols[REMIND_PARAM_MAP["tech_data"]] = tech_data[["all_regi", "char", "all_te", "value"]]
+
+    # the efficiencies are split across two symbols
+    eta = _grid(tall=years, all_regi=regions, all_te=te_names)
+    has_fuel = eta.all_te.map(techs).notna()
+    eta["value"] = np.where(has_fuel, rng.uniform(0.3, 0.6, len(eta)), 1.0)
+    part2 = eta.all_te.isin(te_names[1::2])
+    symbols[REMIND_PARAM_MAP["eta"]] = eta[~part2]
+    symbols[REMIND_PARAM_MAP["eta_part2"]] = eta[part2]
+
+    carriers = sorted({c for c in techs.values() if c})
+    fuels = _grid(ttot=years, all_regi=regions, all_enty=carriers)
+    fuels["value"] = rng.uniform(0.01, 0.05, len(fuels))
+    fuels.loc[fuels.all_enty == "peur", "value"] *= 5
+    symbols[REMIND_PARAM_MAP["fuel_costs"]] = fuels
+
+    symbols[REMIND_PARAM_MAP["discount_r"]] = pd.DataFrame({"ttot": years, "value": 0.05})
+
+    # pm_emifac(tall, all_regi, all_enty, all_enty, all_te, all_enty): the csv export repeats
+    # the set name, which pandas reads as all_enty, all_enty.1, all_enty.2
+    fossil = [te for te, carrier in techs.items() if carrier in FOSSIL_CARRIERS]
+    emi = _grid(tall=years, all_regi=regions, all_te=fossil)
+    emi.insert(2, "all_enty", emi.all_te.map(techs))
+    emi.insert(3, "all_enty.1", "seel")
+    emi["all_enty.2"] = "co2"
+    emi["value"] = rng.uniform(0.3, 0.8, len(emi))
+    symbols[REMIND_PARAM_MAP["co2_intensity"]] = emi
+
+    weights = _grid(ttot=years, all_regi=regions, all_te=te_names)
+    weights["value"] = rng.uniform(0.01, 1, len(weights))
+    symbols[REMIND_PARAM_MAP["weights_gen"]] = weights
+
+    caps = _grid(ttot=years, all_regi=regions, all_te=te_names)
+    caps["value"] = rng.uniform(0, 0.5, len(caps))
+    symbols["p32_cap"] = caps
+    load = _grid(ttot=years, all_regi=regions)
+    load["value"] = rng.uniform(0.1, 2, len(load))
+    symbols["p32_load"] = load
+    return symbols
+
+
+def _tech_baskets(techs: dict[str, str | None]) -> list[list[str]]:
+    """split the techs into baskets of the same carrier (weighed baskets need matching units)"""
+    by_carrier = {}
+    for te, carrier in techs.items():
+        by_carrier.setdefault(carrier, []).append(te)
+    baskets = []
+    for carrier, te_names in by_carrier.items():
+        i = 0
+        while i < len(te_names):
+            # nuclear efficiencies have their own unit
+            size = 1 if carrier == "peur" else BASKET_PATTERN[len(baskets) % len(BASKET_PATTERN)]
+            baskets.append(te_names[i : i + size])
+            i += size
+    return baskets
+
+
+def make_techmapping(scale: SyntheticScale) -> pd.DataFrame:
+    """Make a valid REMIND -> PyPSA tech mapping for the synthetic REMIND techs:
+    tech baskets (use_remind or weigh_remind_by_gen), fuels from REMIND, PyPSA-only techs
+    (use_pypsa & set_value) and a tech with proxy learning.
+
+    Args:
+        scale (SyntheticScale): the size of the data
+    Returns:
+        pd.DataFrame: the mapping (same format as data/techmapping_remind2py.csv)
+    """
+    techs = scale.techs
+    te_names = list(techs)
+    rows = []
+
+    def add(pypsa_tech, parameter, mapper, reference, unit="-"):
+        rows.append((pypsa_tech, parameter, mapper, reference, unit, "synthetic"))
+
+    for n_basket, basket in enumerate(_tech_baskets(techs), start=1):
+        pypsa_tech = f"{basket[0]} (pypsa)" if len(basket) == 1 else f"basket {n_basket}"
+        mapper = "use_remind" if len(basket) == 1 else "weigh_remind_by_gen"
+        reference = basket[0] if len(basket) == 1 else "[" + ", ".join(basket) + "]"
+        params = ["investment", "FOM", "VOM", "lifetime", "efficiency"]
+        carriers = {techs[te] for te in basket}
+        if carriers <= set(FOSSIL_CARRIERS):
+            params.append("CO2 intensity")
+        for param in params:
+            add(pypsa_tech, param, mapper, reference)
+        if len(carriers) == 1 and None not in carriers:
+            add(pypsa_tech, "fuel", "use_remind", carriers.pop())
+
+    for j in range(max(1, len(te_names) // 5)):
+        add(f"pypsa only {j}", "investment", "use_pypsa", "-")
+        add(f"pypsa only {j}", "lifetime", "use_pypsa", "-")
+        add(f"pypsa only {j}", "CO2 intensity", "set_value", "0", "tCO2/MWh_th")
+    add("learned offwind", "investment", "use_remind_with_learning_from", te_names[0])
+
+    columns = ["PyPSA_tech", "parameter", "mapper", "reference", "unit", "comment"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def make_pypsa_costs(scale: SyntheticScale, mappings: pd.DataFrame = None) -> pd.DataFrame:
+    """Make the PyPSA costs (long format with a year column) for all mapped PyPSA techs.
+
+    Args:
+        scale (SyntheticScale): the size of the data
+        mappings (pd.DataFrame, optional): the tech mapping. Defaults to make_techmapping.
+    Returns:
+        pd.DataFrame: the costs for the REMIND years up to 2050
+    """
+    rng = np.random.default_rng(scale.seed + 1)
+    if mappings is None:
+        mappings = make_techmapping(scale)
+    units = {
+        "investment": ("EUR/MW", (3e5, 3e6)), "FOM": ("%/year", (1, 5)),
+        "VOM": ("EUR/MWh", (0, 10)), "lifetime": ("years", (20, 60)),
+        "efficiency": ("per unit", (0.3, 1)), "CO2 intensity": ("tCO2/MWh_th", (0, 0.4)),
+    }
+    years = [yr for yr in scale.years if yr <= 2050] or scale.years[:1]
+    costs = _grid(
+        technology=mappings.PyPSA_tech.unique(), year=years, parameter=list(units)
+    )
+    low = costs.parameter.map({k: v[1][0] for k, v in units.items()})
+    high = costs.parameter.map({k: v[1][1] for k, v in units.items()})
+    costs["value"] = rng.uniform(low, high).round(4)
+    costs["unit"] = costs.parameter.map({k: v[0] for k, v in units.items()})
+    costs["source"] = "synthetic"
+    costs["further description"] = "random"
+    costs["currency_year"] = 2020
+    return costs
+
+
+def make_powerplants(scale: SyntheticScale, mappings: pd.DataFrame = None) -> pd.DataFrame:
+    """Make a powerplantmatching-style unit table with plants across nodes. The plants are
+    assigned to the PyPSA techs (Type) and tech groups of the REMIND-mapped techs.
+
+    Args:
+        scale (SyntheticScale): the size of the data
+        mappings (pd.DataFrame, optional): the tech mapping. Defaults to make_techmapping.
+    Returns:
+        pd.DataFrame: the power plants (capacities in MW)
+    """
+    rng = np.random.default_rng(scale.seed + 2)
+    if mappings is None:
+        mappings = make_techmapping(scale)
+    tech_groups = build_tech_map(mappings)
+    groups = tech_groups.drop_duplicates("PyPSA_tech").set_index("PyPSA_tech").group
+    carriers = {
+        pypsa_tech: scale.techs.get(remind_tech)
+        for remind_tech, pypsa_tech in tech_groups.PyPSA_tech.items()
+    }
+
+    n = scale.n_plants
+    types = rng.choice(groups.index.to_numpy(), n)
+    date_in = rng.integers(1970, scale.start_year + 1, n)
+    plants = pd.DataFrame({
+        "Name": [f"plant {i}" for i in range(n)],
+        "Fueltype": pd.Series(types).map(carriers).map(PPM_FUELTYPES).to_numpy(),
+        "Technology": types,
+        "Set": "PP",
+        "Country": "CN",
+        "Capacity": rng.lognormal(4, 1.2, n).round(1),
+        "Efficiency": rng.uniform(0.3, 0.6, n).round(3),
+        "DateIn": date_in,
+        "DateRetrofit": date_in,
+        "DateOut": date_in + rng.integers(25, 60, n),
+        "lat": rng.uniform(20, 50, n).round(4),
+        "lon": rng.uniform(80, 130, n).round(4),
+        "bus": [f"node {j}" for j in rng.integers(0, scale.n_nodes, n)],
+        "Type": types,
+        "tech_group": groups.reindex(types).to_numpy(),
+    })
+    return plants
+
+
+def write_remind_export(output_dir: os.PathLike, scale: SyntheticScale) -> str:
+    """Write the synthetic REMIND symbols as a csv export (one file per symbol)
+
+    Args:
+        output_dir (os.PathLike): the export folder
+        scale (SyntheticScale): the size of the data
+    Returns:
+        str: the export folder
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for symbol, df in make_remind_frames(scale).items():
+        # GAMS repeats the set names in the header
+        header = [col.split(".")[0] for col in df.columns]
+        df.to_csv(os.path.join(output_dir, f"{symbol}.csv"), index=False, header=header)
+    with open(os.path.join(output_dir, "c_model_version.csv"), "w") as f:
+        f.write("c_model_version\n3.5.0-synthetic\n")
+    return os.fspath(output_dir)
+
+
+def write_synthetic_inputs(output_dir: os.PathLike, scale: SyntheticScale) -> dict[str, str]:
+    """Write a complete set of synthetic inputs:
+
+    - remind_export/: the REMIND csv export
+    - techmapping_remind2py.csv: the tech mapping
+    - costs/costs_{year}.csv: the PyPSA costs
+    - powerplants.csv: the powerplantmatching-style units
+
+    Args:
+        output_dir (os.PathLike): the output folder
+        scale (SyntheticScale): the size of the data
+    Returns:
+        dict[str, str]: the paths by input name
+    """
+    paths = {
+        "remind_export": os.path.join(output_dir, "remind_export"),
+        "techmapping": os.path.join(output_dir, "techmapping_remind2py.csv"),
+        "pypsa_costs": os.path.join(output_dir, "costs"),
+        "powerplants": os.path.join(output_dir, "powerplants.csv"),
+    }
+    write_remind_export(paths["remind_export"], scale)
+    mappings = make_techmapping(scale)
+    mappings.to_csv(paths["techmapping"], index=False)
+
+    os.makedirs(paths["pypsa_costs"], exist_ok=True)
+    for year, costs in make_pypsa_costs(scale, mappings).groupby("year"):
+        costs.to_csv(os.path.join(paths["pypsa_costs"], f"costs_{year}.csv"), index=False)
+    make_powerplants(scale, mappings).to_csv(paths["powerplants"], index=False)
+    logger.info(f"Wrote synthetic inputs for {scale} to {output_dir}")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic REMIND & PyPSA inputs")
+    parser.add_argument("output_dir")
+    for name, default in vars(SyntheticScale()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+    args = vars(parser.parse_args())
+    output_dir = args.pop("output_dir")
+    write_synthetic_inputs(output_dir, SyntheticScale(**args))
@@ -9,8 +9,10 @@ Extract data from Remind, transform it for pypsa PyPSA and write it to files
 # TODO add remind model version to the cost provenance
 
 import pandas as pd
+import numpy as np
 import os
 from collections.abc import Iterable
+from typing import TYPE_CHECKING
 import logging
 
 from .utils import (
@@ -19,7 +21,15 @@ from .utils import (
     key_sort,
     expand_years,
     to_list,
+    to_compact_schema,
+    is_compact,
 )
+from .pypsa_costs import PypsaCostDB
+from .cost_cube import CostCube
+from .profiling import profiled_step
+
+if TYPE_CHECKING:
+    from .mapping_plan import MappingPlan
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +44,10 @@ UNIT_CONVERSION = {
 }
 
 STOR_TECHS = ["h2stor", "btstor", "phs"]
+# use_remind_with_learning_from: scale the pypsa cost by the REMIND cost ratio or add its delta
+PROXY_LEARNING_MODES = ["ratio", "delta"]
+# investment units per MW (per MWh for storage), for the delta proxy learning
+INVESTMENT_UNIT_SCALE = {"kw": 1e-3, "mw": 1.0, "gw": 1e3}
 REMIND_PARAM_MAP = {
     "tech_data": "pm_data",
     "capex": "p32_capCost",
@@ -56,6 +70,9 @@ MAPPING_FUNCTIONS = [
     "weigh_remind_by_gen",
     "weigh_remind_by_capacity",
 ]
+WEIGHING_MAPPERS = [m for m in MAPPING_FUNCTIONS if m.startswith("weigh_remind_by_")]
+# mappers that need REMIND data
+REMIND_MAPPERS = [m for m in MAPPING_FUNCTIONS if "remind" in m]
 
 # pypsa costs column names
 OUTP_COLS = [
@@ -69,28 +86,62 @@ OUTP_COLS = [
 ]
 
 
+def _mapper_rows(mappings: "pd.DataFrame | MappingPlan", *mappers: str) -> pd.DataFrame:
+    """the mapping rows of the mappers, from the table or the indexed rows of a MappingPlan"""
+    if isinstance(mappings, pd.DataFrame):
+        return mappings[mappings.mapper.isin(mappers)]
+    return mappings.rows(*mappers)
+
+
+def _region_keys(by_region: bool) -> list[str]:
+    """the key columns in addition to technology, parameter & year"""
+    return ["region"] if by_region else []
+
+
+def _expand_regions(df: pd.DataFrame, regions: Iterable) -> pd.DataFrame:
+    """broadcast region-independent data to all regions (see utils.expand_years)"""
+    if "region" in df.columns:
+        return df
+    # region-major: the rows of the first region, then of the second, ...
+    regions = np.asarray(regions)
+    expanded = df.iloc[np.tile(np.arange(len(df)), len(regions))]
+    return expanded.assign(region=np.repeat(regions, len(df)))
+
+
 # TODO: soft-coe remind names
+@profiled_step
 def make_pypsa_like_costs(
     frames: dict[pd.DataFrame],
+    by_region: bool = False,
 ) -> pd.DataFrame:
-    """translate the REMIND costs into pypsa format for a single region.
+    """translate the REMIND costs into pypsa format for a single region or all regions at once.
 
     Args:
         frames: dictionary with the REMIND data tables to be transformed. Region-filtered
+            unless by_region.
+        by_region (bool, optional): keep the REMIND regions as key (all regions in one pass).
+            Tables without a region column apply to all regions. Defaults to False.
     Returns:
-        pd.DataFrame: DataFrame containing cost data for a region.
+        pd.DataFrame: DataFrame containing cost data for a region (or with a region column).
     """
 
+    compact = is_compact(frames["capex"])
+    value_dtype = frames["capex"].value.dtype
+
     # check single region or region already removed
     regions_filtered = not any(["region" in df.columns for df in frames.values()])
-    if not regions_filtered and any(
+    if by_region:
+        if "region" not in frames["capex"].columns:
+            raise ValueError("by_region requires a region column in the capex data")
+    elif not regions_filtered and any(
         [df.region.nunique() > 1 for df in frames.values() if "region" in df.columns]
     ):
         raise Warning("The dataframes are not region-filtered. Not supported.")
     elif not regions_filtered:
-        frames.update(
-            {k: df.drop(columns=["region"]) for k, df in frames.items() if "region" in df.columns}
-        )
+        frames = {
+            k: df.drop(columns=["region"]) if "region" in df.columns else df
+            for k, df in frames.items()
+        }
 
     years = frames["capex"].year.unique()
     capex = transform_capex(frames["capex"])
@@ -119,26 +170,84 @@ def make_pypsa_like_costs(
         "discount_rate": discount_rate,
     }
 
-    # TODO Can do more efficient operations with join
-    # add years to table with time-indep data
-    for label, frame in cost_frames.items():
-        if "year" not in frame.columns:
-            cost_frames[label] = expand_years(frame, capex.year.unique())
-    # add missing techs for tech agnostic data
-    for label, frame in cost_frames.items():
-        if "technology" not in frame.columns:
-            cost_frames[label] = pd.concat(
-                [frame.assign(technology=tech) for tech in capex.technology.unique()]
-            )
-    column_order = ["technology", "year", "parameter", "value", "unit", "source"]
-
-    # merge the dataframes for the region
-    costs_remind = pd.concat(
-        [frame[column_order] for frame in cost_frames.values()], axis=0
-    ).reset_index(drop=True)
-    costs_remind.sort_values(by=["technology", "year", "parameter"], key=key_sort, inplace=True)
+    # broadcast tech & region agnostic and time-indep data to the capex keys
+    keys = _region_keys(by_region) + ["technology", "year", "parameter"]
+    axes = {key: _cost_axis(cost_frames.values(), key) for key in keys}
+    axes["technology"] = pd.Index(sorted(axes["technology"], key=str.lower))
+    # only the capex years are kept
+    axes["year"] = pd.Index(np.sort(years))
+    broadcast = {key: axes[key].get_indexer(capex[key].unique()) for key in keys[:-1]}
+    costs_remind = _assemble_costs(cost_frames.values(), axes, broadcast)
+
+    if compact:
+        costs_remind = to_compact_schema(costs_remind, value_dtype=value_dtype)
+    return costs_remind
 
-    return costs_remind.query("year in @years")
+
+def _cost_axis(frames: Iterable[pd.DataFrame], key: str) -> pd.Index:
+    """the sorted labels of a key column across the cost frames"""
+    labels = [frame[key].unique() for frame in frames if key in frame.columns]
+    return pd.Index(np.unique(np.concatenate(labels).astype(object)))
+
+
+def _assemble_costs(
+    frames: Iterable[pd.DataFrame], axes: dict[str, pd.Index], broadcast: dict[str, np.ndarray]
+) -> pd.DataFrame:
+    """Place the cost frames in a dense (keys...) grid, whose order is the output order.
+
+    Frames missing a key column are broadcast to the positions in `broadcast` (no copies per
+    year or tech). Rows with labels outside the axes are dropped.
+
+    Args:
+        frames (Iterable[pd.DataFrame]): the pypsa-like cost tables
+        axes (dict[str, pd.Index]): the sorted labels of each key, in key order
+        broadcast (dict[str, np.ndarray]): axis positions to use for a missing key
+    Returns:
+        pd.DataFrame: the long table with the key, value, unit & source columns
+    Raises:
+        ValueError: if several frames or rows give the same key
+    """
+    shape = tuple(len(axis) for axis in axes.values())
+    strides = np.cumprod((shape[1:] + (1,))[::-1])[::-1]
+    frames = list(frames)
+    value = np.full(np.prod(shape), np.nan, np.result_type(*[f.value.dtype for f in frames]))
+    unit = np.empty(len(value), dtype=object)
+    source = np.empty(len(value), dtype=object)
+    filled = np.zeros(len(value), dtype=bool)
+
+    for frame in frames:
+        rows = np.zeros(len(frame), dtype=np.intp)
+        valid = np.ones(len(frame), dtype=bool)
+        spread = np.zeros(1, dtype=np.intp)
+        for (key, axis), stride in zip(axes.items(), strides):
+            if key in frame.columns:
+                codes = axis.get_indexer(frame[key])
+                valid &= codes >= 0
+                rows += codes * stride
+            else:
+                spread = np.add.outer(spread, broadcast[key] * stride).ravel()
+        slots = np.add.outer(rows[valid], spread).ravel()
+        n_filled = np.count_nonzero(filled)
+        filled[slots] = True
+        if np.count_nonzero(filled) - n_filled < len(slots):
+            raise ValueError(f"Duplicate cost entries for {frame.parameter.unique().tolist()}")
+        for target, col in ((value, "value"), (unit, "unit"), (source, "source")):
+            target[slots] = np.repeat(frame[col].to_numpy()[valid], len(spread))
+
+    slots = np.flatnonzero(filled)
+    # write the text columns into one block, which pandas then uses without consolidating
+    text_cols = [key for key in axes if key != "year"] + ["unit", "source"]
+    text = np.empty((len(text_cols), len(slots)), dtype=object)
+    for (key, axis), codes in zip(axes.items(), np.unravel_index(slots, shape)):
+        if key == "year":
+            year = axis.to_numpy()[codes]
+        else:
+            text[text_cols.index(key)] = axis.to_numpy()[codes]
+    text[-2], text[-1] = unit[slots], source[slots]
+    costs = pd.DataFrame(text.T, columns=text_cols, copy=False)
+    costs.insert(list(axes).index("year"), "year", year)
+    costs.insert(len(axes), "value", value[slots])
+    return costs
 
 
 def transform_capex(capex: pd.DataFrame) -> pd.DataFrame:
@@ -149,8 +258,12 @@ def transform_capex(capex: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Transformed capex data.
     """
-    capex.loc[:, "value"] *= UNIT_CONVERSION["capex"]
-    capex = capex.assign(source="REMIND " + capex.technology, parameter="investment", unit="USD/MW")
+    capex = capex.assign(
+        value=capex.value * UNIT_CONVERSION["capex"],
+        source="REMIND " + capex.technology.astype(str),
+        parameter="investment",
+        unit="USD/MW",
+    )
     store_techs = STOR_TECHS
     for stor in store_techs:
         capex.loc[capex["technology"] == stor, "unit"] = "USD/MWh"
@@ -188,7 +301,7 @@ def transform_co2_intensity(co2_intensity: pd.DataFrame, years: list | pd.Index)
     co2_intens = co2_intens.assign(
         parameter="CO2 intensity",
         unit="t_CO2/MWh_th",
-        source=co2_intens.technology + " REMIND",
+        source=co2_intens.technology.astype(str) + " REMIND",
     )
     co2_intens.loc[:, "value"] *= UNIT_CONVERSION["co2_intensity"]
     return co2_intens
@@ -209,7 +322,9 @@ def transform_efficiency(eff_data: pd.DataFrame, years: list | pd.Index) -> pd.D
         pd.DataFrame: Transformed efficiency data.
     """
     eta = eff_data.query("year in @years")
-    eta = eta.assign(source=eta.technology + " REMIND", unit="p.u.", parameter="efficiency")
+    eta = eta.assign(
+        source=eta.technology.astype(str) + " REMIND", unit="p.u.", parameter="efficiency"
+    )
 
     # Special treatment for nuclear: Efficiencies are in TWa/Mt=8760 TWh/Tg_U
     #  -> convert to MWh/g_U to match with fuel costs in USD/g_U
@@ -229,8 +344,9 @@ def transform_fom(fom: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Transformed FOM data.
     """
-    fom.loc[:, "value"] *= UNIT_CONVERSION["FOM"]
-    fom = fom.assign(source=fom.technology + " REMIND")
+    fom = fom.assign(
+        value=fom.value * UNIT_CONVERSION["FOM"], source=fom.technology.astype(str) + " REMIND"
+    )
     fom = fom.assign(unit="percent", parameter="FOM")
 
     return fom
@@ -241,9 +357,13 @@ def transform_fuels(fuels: pd.DataFrame) -> pd.DataFrame:
     # Unit conversion from TUSD/TWa to USD/MWh
     # Special treatment for nuclear fuel uranium (peur):
     #   Fuel costs are originally in TUSD/Mt = USD/g_U (TUSD/Tg) -> adjust unit
-    fuels.loc[~(fuels["carrier"] == "peur"), "value"] *= 1e6 / 8760
-    fuels = fuels.assign(parameter="fuel", unit="USD/MWh_th")
-    fuels = fuels.assign(source=fuels.carrier + " REMIND")
+    is_uranium = fuels["carrier"] == "peur"
+    fuels = fuels.assign(
+        value=fuels.value.where(is_uranium, fuels.value * 1e6 / 8760),
+        parameter="fuel",
+        unit="USD/MWh_th",
+    )
+    fuels = fuels.assign(source=fuels.carrier.astype(str) + " REMIND")
     fuels.loc[fuels["carrier"] == "peur", "unit"] = "USD/g_U"
     fuels = fuels.assign(technology=fuels.carrier)
     return fuels
@@ -257,7 +377,9 @@ def transform_lifetime(lifetime: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Transformed lifetime data.
     """
-    lifetime = lifetime.assign(unit="years", source=lifetime.technology + " REMIND", inplace=True)
+    lifetime = lifetime.assign(
+        unit="years", source=lifetime.technology.astype(str) + " REMIND", inplace=True
+    )
     return lifetime
 
 
@@ -268,50 +390,75 @@ def transform_vom(vom: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: Transformed VOM data.
     """
-    vom.loc[:, "value"] *= UNIT_CONVERSION["VOM"]
-    vom = vom.assign(unit="USD/MWh", source=vom.technology + " REMIND", parameter="VOM")
+    vom = vom.assign(
+        value=vom.value * UNIT_CONVERSION["VOM"],
+        unit="USD/MWh",
+        source=vom.technology.astype(str) + " REMIND",
+        parameter="VOM",
+    )
     return vom
 
 
+@profiled_step
 def map_to_pypsa_tech(
-    remind_costs_formatted: pd.DataFrame,
-    pypsa_costs: pd.DataFrame,
-    mappings: pd.DataFrame,
+    remind_costs_formatted: pd.DataFrame | CostCube,
+    pypsa_costs: pd.DataFrame | PypsaCostDB,
+    mappings: "pd.DataFrame | MappingPlan",
     weights: pd.DataFrame,
     years: list | Iterable = None,
     currency_conversion: float = 0.90,
+    by_region: bool = False,
+    proxy_learning_mode: str = "ratio",
+    proxy_ref_years: list[int] = None,
 ) -> pd.DataFrame:
     """Map the REMIND technology names to pypsa technoloies using the conversions specified in the
     map config
 
     Args:
-        remind_costs_formatted (pd.DataFrame): DataFrame containing REMIND cost data.
-        pypsa_costs (pd.DataFrame): DataFrame containing pypsa cost data.
-        mappings (pd.DataFrame): DataFrame containing the mapping funcs and names from
-            REMIND to pypsa technologies.
+        remind_costs_formatted (pd.DataFrame | CostCube): the pypsa-like REMIND costs. A cube
+            is looked up by axis position and weighs the baskets as arrays.
+        pypsa_costs (pd.DataFrame | PypsaCostDB): pypsa cost data.
+        mappings (pd.DataFrame | MappingPlan): the (validated) mapping funcs and names from
+            REMIND to pypsa technologies, e.g. a compiled `mapping_plan.MappingPlan`.
         weights (pd.DataFrame): DataFrame containing the weights.
         years (Iterable, optional): years to be used. Defaults to None (use remidn dat)
         currency_conversion (float, optional): conversion factor for currency (REMIND to PyPSA).
+        by_region (bool, optional): the REMIND costs have a region column, map all regions
+            at once (output sorted by region first). Defaults to False.
+        proxy_learning_mode (str, optional): "ratio" or "delta" learning for
+            use_remind_with_learning_from, see `_learn_investment_from_proxy`.
+        proxy_ref_years (list[int], optional): the years at which the proxy learning is
+            anchored to the pypsa costs. Defaults to None (the first year).
     Returns:
         pd.DataFrame: DataFrame with mapped technology names.
     """
-    if years is None:
-        years = remind_costs_formatted.year.unique()
+    keys = _region_keys(by_region)
+    if isinstance(remind_costs_formatted, CostCube):
+        regions, remind_years = remind_costs_formatted.regions, remind_costs_formatted.years
     else:
-        years = pd.Index(years, dtype=int)
+        regions = remind_costs_formatted.region.unique() if by_region else None
+        remind_years = remind_costs_formatted.year.unique()
+    years = remind_years if years is None else pd.Index(years, dtype=int)
+    # index once for the keyed lookups
+    if not isinstance(pypsa_costs, PypsaCostDB):
+        pypsa_costs = PypsaCostDB(pypsa_costs)
 
     # direct mapping of remind
-    use_remind = (
-        mappings.query("mapper == 'use_remind'")
-        .drop("unit", axis=1)
-        .merge(
+    use_remind = _mapper_rows(mappings, "use_remind").drop("unit", axis=1)
+    if isinstance(remind_costs_formatted, CostCube):
+        # look the cells up by axis position
+        use_remind = use_remind.reset_index(drop=True)
+        taken = remind_costs_formatted.take(use_remind.reference, use_remind.parameter)
+        use_remind = use_remind.iloc[taken.index].reset_index(drop=True)
+        use_remind = pd.concat([use_remind, taken.reset_index(drop=True)], axis=1)
+    else:
+        use_remind = use_remind.merge(
             remind_costs_formatted,
             left_on=["reference", "parameter"],
             right_on=["technology", "parameter"],
             how="left",
         )
-    )
-    use_remind.drop(columns=["technology"], inplace=True)
+        use_remind.drop(columns=["technology"], inplace=True)
     # convert currency to pypsa eur. Fix units or pypsa will convert again
     mask = use_remind.query("unit.str.lower().str.contains('usd')").index
     use_remind.loc[mask, "value"] *= currency_conversion
@@ -319,7 +466,7 @@ def map_to_pypsa_tech(
         use_remind.loc[mask, "unit"].str.lower().str.replace("usd", "EUR")
     )
 
-    direct_input = mappings.query("mapper == 'set_value'").rename(columns={"reference": "value"})
+    direct_input = _mapper_rows(mappings, "set_value").rename(columns={"reference": "value"})
     direct_input = direct_input.assign(source="direct_input from coupling mapping")
     direct_input = expand_years(direct_input, years)
 
@@ -327,15 +474,28 @@ def map_to_pypsa_tech(
     from_pypsa = _use_pypsa(mappings, pypsa_costs, years, "constant", currency_conversion=1)
     from_pypsa.drop(columns=["technology"], inplace=True)
 
+    # region independent values apply to all regions
+    if by_region:
+        direct_input = _expand_regions(direct_input, regions)
+        from_pypsa = _expand_regions(from_pypsa, regions)
+
     # techs with proxy learnign
     proxy_learning = _learn_investment_from_proxy(
-        mappings, pypsa_costs, remind_costs_formatted, ref_year=years.min()
+        mappings,
+        pypsa_costs,
+        remind_costs_formatted,
+        ref_year=proxy_ref_years if proxy_ref_years is not None else years.min(),
+        by_region=by_region,
+        mode=proxy_learning_mode,
+        currency_conversion=currency_conversion,
     )
     if not proxy_learning.empty:
         proxy_learning.loc[:, "further description"] = "proxy learning from REMIND"
     # TODO check weighing is by right quantities
     # weighed by remind tech basket
-    weighed_basket = _weigh_remind_by(remind_costs_formatted, weights, mappings)
+    weighed_basket = _weigh_remind_by(
+        remind_costs_formatted, weights, mappings, by_region=by_region
+    )
     # format for output
     direct_input.rename(
         columns={"PyPSA_tech": "technology", "comment": "further description"},
@@ -371,83 +531,160 @@ def map_to_pypsa_tech(
         proxy_learning,
         weighed_basket,
     ]
-    output = pd.concat([df[OUTP_COLS] for df in output_frames if not df.empty], axis=0)
+    output = pd.concat([df[keys + OUTP_COLS] for df in output_frames if not df.empty], axis=0)
     output = output.assign(year=output.year.astype(int))
 
-    return output.sort_values(["year", "technology", "parameter"], key=key_sort).reset_index(
-        drop=True
-    )
+    return output.sort_values(
+        keys + ["year", "technology", "parameter"], key=key_sort
+    ).reset_index(drop=True)
 
 
-# TODO ? move to a class
 def _learn_investment_from_proxy(
     mappings: pd.DataFrame,
-    pypsa_costs: pd.DataFrame,
-    remind_costs_formatted: pd.DataFrame,
-    ref_year: int,
+    pypsa_costs: pd.DataFrame | PypsaCostDB,
+    remind_costs_formatted: pd.DataFrame | CostCube,
+    ref_year: int | list[int],
+    by_region: bool = False,
+    mode: str = "ratio",
+    currency_conversion: float = 1,
 ):
     """For techs missing in REMIND, take a pypsa tech and apply learning from a proxy REMIND tech
 
+    The proxy learning is anchored to the pypsa investment at the reference year(s): each year
+    uses the latest reference year before it (the first one for earlier years). With several
+    reference years the curve is re-anchored to the pypsa data at each of them.
+
     Args:
         mappings (pd.DataFrame): DataFrame containing the tech mappings from REMIND to pypsa.
-        pypsa_costs (pd.DataFrame): DataFrame containing pypsa cost data.
-        remind_costs_formatted (pd.DataFrame): DataFrame containing REMIND cost data (pypsa-like).
-        ref_year (int): reference year for scaling
+        pypsa_costs (pd.DataFrame | PypsaCostDB): pypsa cost data.
+        remind_costs_formatted (pd.DataFrame | CostCube): REMIND cost data (pypsa-like).
+        ref_year (int | list[int]): reference year(s) for scaling
+        by_region (bool, optional): learn per region (region column). Defaults to False.
+        mode (str, optional): "ratio" scales the pypsa cost by the REMIND cost relative to the
+            reference year, "delta" adds the absolute REMIND cost change. Defaults to "ratio".
+        currency_conversion (float, optional): REMIND to pypsa currency, for the delta mode.
     Returns:
-        pd.DataFrame: DataFrame with scaled investment costs.
+        pd.DataFrame: DataFrame with scaled investment costs (in the pypsa unit).
+    Raises:
+        ValueError: if the REMIND or pypsa investment is missing at a reference year or, for
+            the delta mode, if the REMIND and pypsa units can not be converted
     """
+    if mode not in PROXY_LEARNING_MODES:
+        raise ValueError(f"Unknown proxy learning mode {mode}, use one of {PROXY_LEARNING_MODES}")
 
-    ref_tech_names = mappings.query("mapper == 'use_remind_with_learning_from'")[
+    ref_tech_names = _mapper_rows(mappings, "use_remind_with_learning_from")[
         ["PyPSA_tech", "reference"]
-    ].set_index("reference")
+    ]
     # if mapping is empty for use_reminfd_with_learning_from, return empty
     if not ref_tech_names.shape[0]:
         return pd.DataFrame()
+    ref_tech_names = ref_tech_names.rename(columns={"reference": "technology"})
 
-    ref_tech_names.reset_index(inplace=True)
-    ref_tech_names.rename(columns={"reference": "technology"}, inplace=True)
+    # TODO check all references are available
+    if isinstance(remind_costs_formatted, CostCube):
+        proxies = ref_tech_names.technology.unique()
+        scaling = remind_costs_formatted.take(proxies, ["investment"] * len(proxies))
+        scaling = scaling.assign(technology=proxies[scaling.index], parameter="investment")
+        scaling.reset_index(drop=True, inplace=True)
+    else:
+        scaling = remind_costs_formatted.query(
+            "technology in @ref_tech_names.technology & parameter == 'investment'"
+        )
 
-    base_yr_investmnt = pypsa_costs.query(
-        "technology in @ref_tech_names.PyPSA_tech.unique() & year == @ref_year"
-        + " & parameter == 'investment'"
-    ).set_index("technology")
-    base_yr_investmnt = base_yr_investmnt.value.to_dict()
+    # anchor each year to the latest reference year before it
+    ref_years = np.sort(np.atleast_1d(ref_year))
+    position = np.searchsorted(ref_years, scaling.year.to_numpy(), side="right") - 1
+    anchor = pd.Series(ref_years[position.clip(min=0)], index=scaling.index)
+
+    # normalise by the REMIND value at the anchor (the first REMIND year from the anchor)
+    groups = [scaling[k] for k in _region_keys(by_region) + ["technology"]] + [anchor]
+    base_year = scaling.year.where(scaling.year >= anchor)
+    base_year = base_year.groupby(groups, observed=True).transform("min")
+    base_value = scaling.value.where(scaling.year == base_year)
+    base_value = base_value.groupby(groups, observed=True).transform("first")
+    if base_value.isna().any():
+        missing = scaling[base_value.isna()].assign(reference_year=anchor)
+        raise ValueError(
+            "No REMIND investment for the proxy learning at the reference year:\n"
+            f"{missing[['technology', 'reference_year']].drop_duplicates()}"
+        )
+    if mode == "ratio":
+        learning = scaling.value / base_value
+    else:
+        learning = (scaling.value - base_value) * currency_conversion
+    scaling = scaling.assign(value=learning, anchor=anchor)
+
+    proxy_invest = scaling.merge(ref_tech_names, on="technology", how="left")
+    proxy_invest = proxy_invest.assign(technology=proxy_invest.PyPSA_tech)
+
+    # the pypsa investment at the anchor years
+    if not isinstance(pypsa_costs, PypsaCostDB):
+        pypsa_costs = PypsaCostDB(pypsa_costs)
+    techs = ref_tech_names.PyPSA_tech.unique()
+    base_invest = {
+        (yr, tech): value
+        for yr in ref_years
+        for tech, value in pypsa_costs.values(techs, "investment", yr).items()
+    }
+    keys = pd.MultiIndex.from_frame(proxy_invest[["anchor", "technology"]])
+    base_invest = keys.map(base_invest).to_numpy(dtype=float)
+    if np.isnan(base_invest).any():
+        missing = proxy_invest[np.isnan(base_invest)].rename(columns={"anchor": "reference_year"})
+        raise ValueError(
+            "No pypsa investment for the proxy learning at the reference year:\n"
+            f"{missing[['technology', 'reference_year']].drop_duplicates()}"
+        )
+    pypsa_units = {
+        (yr, tech): unit
+        for yr in ref_years
+        for tech, unit in pypsa_costs.values(techs, "investment", yr, column="unit").items()
+    }
+    pypsa_units = keys.map(pypsa_units)
+    if mode == "ratio":
+        value = base_invest * proxy_invest.value
+    else:
+        if "unit" not in proxy_invest.columns:
+            raise ValueError("The delta proxy learning needs the unit of the REMIND costs")
+        # the REMIND delta is in (converted) USD/MW(h)
+        unit_pairs = pd.MultiIndex.from_arrays([proxy_invest.unit, pypsa_units])
+        factors = {pair: _delta_unit_factor(*pair) for pair in unit_pairs.unique()}
+        value = base_invest + proxy_invest.value * unit_pairs.map(factors).to_numpy(dtype=float)
 
-    # TODO check all references are available
-    scaling = remind_costs_formatted.query(
-        "technology in @ref_tech_names.technology & parameter == 'investment'"
-    )
+    proxy_invest = proxy_invest.assign(value=value, unit=pypsa_units)
+    return proxy_invest.drop(columns=["PyPSA_tech", "anchor"])
 
-    scaling.loc[:, "value"] = (
-        scaling.set_index(["technology"])
-        .groupby(level=[0])
-        .apply(lambda x: x.value / x[x.year == x.year.min()].value)
-        .T.values
-    )
 
-    # merge
-    proxy_invest = scaling.merge(
-        ref_tech_names,
-        left_on="technology",
-        right_on="technology",
-        how="left",
-        right_index=False,
-        left_index=False,
-    )
-    proxy_invest.technology = proxy_invest.PyPSA_tech
-    proxy_invest.drop(columns=["PyPSA_tech"], inplace=True)
+def _delta_unit_factor(remind_unit: str, pypsa_unit: str) -> float:
+    """factor from a currency-converted REMIND investment delta to the pypsa unit
 
-    # multiply the scaling factor with the base year investment
-    proxy_invest.loc[:, "value"] = (
-        proxy_invest.technology.map(base_yr_investmnt) * proxy_invest.value
+    Args:
+        remind_unit (str): the REMIND unit, e.g. "USD/MW" or "USD/MWh"
+        pypsa_unit (str): the pypsa unit, e.g. "EUR/kW"
+    Returns:
+        float: the factor, e.g. 1e-3 from USD/MW to EUR/kW
+    Raises:
+        ValueError: if the units are not currency per power (energy) or do not match
+    """
+    units = [str(unit).strip().lower().split("/") for unit in (remind_unit, pypsa_unit)]
+    if all(len(unit) == 2 for unit in units):
+        (remind_currency, remind_per), (pypsa_currency, pypsa_per) = units
+        remind_scale = INVESTMENT_UNIT_SCALE.get(remind_per.removesuffix("h"))
+        pypsa_scale = INVESTMENT_UNIT_SCALE.get(pypsa_per.removesuffix("h"))
+        if (
+            remind_currency.startswith("usd")
+            and pypsa_currency.startswith("eur")
+            and remind_per.endswith("h") == pypsa_per.endswith("h")
+            and None not in (remind_scale, pypsa_scale)
+        ):
+            return pypsa_scale / remind_scale
+    raise ValueError(
+        f"Can not add a REMIND {remind_unit} investment delta to a pypsa {pypsa_unit} investment"
     )
 
-    return proxy_invest
-
 
 def _use_pypsa(
     mappings: pd.DataFrame,
-    pypsa_costs: pd.DataFrame,
+    pypsa_costs: pd.DataFrame | PypsaCostDB,
     years: Iterable,
     extrapolation="constant",
     currency_conversion=1,
@@ -456,7 +693,7 @@ def _use_pypsa(
 
     Args:
         mappings (pd.DataFrame): DataFrame containing the tech REMIND to pypsa mapping
-        pypsa_costs (pd.DataFrame): DataFrame containing pypsa cost data.
+        pypsa_costs (pd.DataFrame | PypsaCostDB): pypsa cost data.
         years (Iterable): data years to be used
         extrpolation (str, Optional): how to handle missing years.
             Defaults to "constant_extrapolation" (last data yr used for missing)
@@ -466,12 +703,9 @@ def _use_pypsa(
         pd.DataFrame: DataFrame with mapped technology data.
     """
 
-    from_pypsa = mappings.query("mapper == 'use_pypsa'").merge(
-        pypsa_costs,
-        left_on=["PyPSA_tech", "parameter"],
-        right_on=["technology", "parameter"],
-        how="left",
-    )
+    if not isinstance(pypsa_costs, PypsaCostDB):
+        pypsa_costs = PypsaCostDB(pypsa_costs)
+    from_pypsa = pypsa_costs.lookup(_mapper_rows(mappings, "use_pypsa"), tech_col="PyPSA_tech")
 
     from_pypsa.rename(columns={"unit_x": "expected_unit", "unit_y": "unit"}, inplace=True)
     from_pypsa.reference = from_pypsa.source
@@ -517,29 +751,41 @@ def _use_pypsa(
 
 
 def _weigh_remind_by(
-    remind_costs_formatted: pd.DataFrame, weights: pd.DataFrame, mappings: pd.DataFrame
+    remind_costs_formatted: pd.DataFrame | CostCube,
+    weights: pd.DataFrame,
+    mappings: pd.DataFrame,
+    by_region: bool = False,
 ) -> pd.DataFrame:
     """Weigh the REMIND costs by the weights
 
     Args:
-        remind_costs_formatted (pd.DataFrame): DataFrame containing REMIND cost data.
+        remind_costs_formatted (pd.DataFrame | CostCube): DataFrame containing REMIND cost data
+            or the cost cube (weighed with array arithmetic, see `_weigh_cube_by`).
         weights (pd.DataFrame): DataFrame containing the weights.
         mappings (pd.DataFrame): DataFrame containing the tech mappings from REMIND to pypsa.
+        by_region (bool, optional): weigh per region (region column). Defaults to False.
 
     Returns:
         pd.DataFrame: DataFrame with weighed technology names.
     """
+    if isinstance(remind_costs_formatted, CostCube):
+        return _weigh_cube_by(remind_costs_formatted, weights, mappings, by_region=by_region)
 
     # entries that need to be weighted accross remind techs
-    to_weigh = mappings.query("mapper.str.startswith('weigh_remind_by_')")
+    to_weigh = _mapper_rows(mappings, *WEIGHING_MAPPERS)
     to_weigh = to_weigh.assign(weigh_by=to_weigh["mapper"].str.split("weigh_remind_by_").str[1])
+    keys = _region_keys(by_region)
     # merge with remind costs as needed
     if "weight" not in remind_costs_formatted.columns:
-        weights = weights.merge(remind_costs_formatted, on=["technology", "year"], how="left")
+        weight_keys = ["technology", "year"] + (keys if "region" in weights.columns else [])
+        remind_costs_formatted = remind_costs_formatted.merge(
+            weights[weight_keys + ["weight"]], on=weight_keys, how="left"
+        )
 
-    to_weigh = expand_years(to_weigh, years=remind_costs_formatted.year.unique()).reset_index(
-        drop=True
-    )
+    to_weigh = expand_years(to_weigh, years=remind_costs_formatted.year.unique())
+    if by_region:
+        to_weigh = _expand_regions(to_weigh, remind_costs_formatted.region.unique())
+    to_weigh = to_weigh.reset_index(drop=True)
     # explode list of weight techs (rows dim)
     weightings = to_weigh.explode("reference").reset_index()
     weightings.rename(columns={"index": "id_weight", "unit": "map_unit"}, inplace=True)
@@ -547,30 +793,77 @@ def _weigh_remind_by(
     # merge with remind costs
     weightings = weightings.merge(
         remind_costs_formatted,
-        left_on=["reference", "parameter", "year"],
-        right_on=["technology", "parameter", "year"],
+        left_on=["reference", "parameter", "year"] + keys,
+        right_on=["technology", "parameter", "year"] + keys,
         how="left",
     )
 
-    # apply the weights (use the original row id as grouping)
-    to_weigh.loc[:, "value"] = weightings.groupby(["id_weight"])[["value", "weight"]].apply(
-        lambda x: (x.value * (x.weight + 1e-12)).sum() / (x.weight.sum() + 1e-12)
+    # weighted mean & unit count in one grouped pass (the original row id is the group)
+    weighted = weightings.assign(
+        weighted_value=weightings.value * (weightings.weight + 1e-12)
+    ).groupby("id_weight")
+    totals = weighted.agg(
+        weighted_value=("weighted_value", "sum"),
+        weight=("weight", "sum"),
+        n_units=("unit", "nunique"),
     )
+    # validate that units matched (unique) # !! should check nans too
+    mismatched = totals.index[totals.n_units != 1]
+    if len(mismatched):
+        named = to_weigh.loc[mismatched, ["PyPSA_tech", "parameter", "reference", "year"] + keys]
+        raise ValueError(f"Units do not match for weights:\n{named}")
+    to_weigh.loc[:, "value"] = totals.weighted_value / (totals.weight + 1e-12)
     # validate the years (check no years are full nans)
     # TODO
 
-    # validate that units matched (unique) # !! should check nans too
-    units_ok = weightings.groupby("id_weight").unit.apply(pd.Series.nunique) == 1
-    if not units_ok.all():
-        named_unit_check = pd.concat([to_weigh, units_ok], axis=1)[["PyPSA_tech", "unit"]]
-        raise ValueError(
-            "Units not do not match for weights:",
-            named_unit_check[~named_unit_check["unit"]],
-        )
     to_weigh.loc[:, "source"] = to_weigh.mapper + " " + to_weigh.reference.astype(str)
     return to_weigh
 
 
+def _weigh_cube_by(
+    cube: CostCube, weights: pd.DataFrame, mappings: pd.DataFrame, by_region: bool = False
+) -> pd.DataFrame:
+    """Weigh the REMIND tech baskets of a cost cube, as `_weigh_remind_by`
+
+    Args:
+        cube (CostCube): the REMIND costs
+        weights (pd.DataFrame): DataFrame containing the weights.
+        mappings (pd.DataFrame): DataFrame containing the tech mappings from REMIND to pypsa.
+        by_region (bool, optional): weigh per region. Defaults to False.
+    Returns:
+        pd.DataFrame: the weighed mapping rows by (region and) year
+    """
+    to_weigh = _mapper_rows(mappings, *WEIGHING_MAPPERS).reset_index(drop=True)
+    to_weigh = to_weigh.assign(weigh_by=to_weigh["mapper"].str.split("weigh_remind_by_").str[1])
+    named = ["PyPSA_tech", "parameter", "reference"]
+
+    # every basket tech & parameter must be in REMIND
+    members = to_weigh[["reference", "parameter"]].explode("reference")
+    unknown = ~members.reference.isin(cube.technologies) | ~members.parameter.isin(cube.parameters)
+    if unknown.any():
+        missing = to_weigh.loc[members.index[unknown].unique(), named]
+        raise ValueError(f"Weighed techs or parameters missing in REMIND:\n{missing}")
+    baskets, parameters = to_weigh.reference.tolist(), to_weigh.parameter.to_numpy()
+    # as the merge: each region & year is weighed over the techs with data, of one unit
+    mismatched = (cube.n_units(baskets, parameters) != 1).any(axis=(1, 2))
+    if mismatched.any():
+        raise ValueError(f"Units do not match for weights:\n{to_weigh.loc[mismatched, named]}")
+    # (mapping row, region, year) means
+    means = cube.weigh(baskets, parameters, cube.align(weights, value_col="weight"))
+
+    # rows by region, year, mapping row (as the expanded table)
+    n_rows, n_regions, n_years = means.shape
+    weighed = to_weigh.iloc[np.tile(np.arange(n_rows), n_regions * n_years)]
+    weighed = weighed.assign(
+        year=np.tile(np.repeat(cube.years.to_numpy(), n_rows), n_regions),
+        value=means.transpose(1, 2, 0).ravel(),
+    )
+    if by_region:
+        weighed = weighed.assign(region=np.repeat(cube.regions.to_numpy(), n_rows * n_years))
+    weighed = weighed.reset_index(drop=True)
+    return weighed.assign(source=weighed.mapper + " " + weighed.reference.astype(str))
+
+
 # TODO make mappings a dataclass not a pandas
 def validate_mappings(mappings: pd.DataFrame):
     """validate the mapping of the technologies to pypsa technologies
@@ -627,33 +920,43 @@ def validate_mappings(mappings: pd.DataFrame):
 
 
 # TODO rename
-def validate_remind_data(costs_remind: pd.DataFrame, mappings: pd.DataFrame):
+def validate_remind_data(costs_remind: pd.DataFrame | CostCube, mappings: pd.DataFrame):
     """validate the remind cost data
     Args:
-        remind_data (pd.DataFrame): DataFrame containing the remind data
+        remind_data (pd.DataFrame | CostCube): DataFrame containing the remind data
     """
+    requested_data = _mapper_rows(mappings, *REMIND_MAPPERS)[
+        ["PyPSA_tech", "parameter", "reference"]
+    ].explode("reference")
+    if isinstance(costs_remind, CostCube):
+        # look the pairs up by axis position
+        has_data = costs_remind.has_data(requested_data.reference, requested_data.parameter)
+        missing = requested_data[~has_data]
+    else:
+        missing = _missing_remind_rows(costs_remind, requested_data)
+    if not missing.empty:
+        raise ValueError(
+            f"Missing data in REMIND for (first <10 rows)\n{missing.drop_duplicates().head(10)}"
+            "\nCheck the mappings and the remind data."
+            " Hint: are your reference lists consistently separated by ',' or ', '?"
+        )
+
+
+def _missing_remind_rows(costs_remind: pd.DataFrame, requested_data: pd.DataFrame):
+    """the requested (tech, parameter) rows without REMIND data (or with NaNs)"""
     if not {"technology", "parameter", "year", "value"} <= set(costs_remind.columns):
         raise ValueError(
             "Remind data does not have the expected columns: "
             "technology, parameter, year, value. "
             f"Found columns: {costs_remind.columns}"
         )
-    requested_data = mappings.query("mapper.str.contains('remind')")[
-        ["PyPSA_tech", "parameter", "reference"]
-    ].explode("reference")
     data = requested_data.explode("reference").merge(
         costs_remind.rename(columns={"technology": "reference"}),
         on=["parameter", "reference"],
         how="left",
     )
     data = data[["PyPSA_tech", "reference", "year", "parameter", "value"]]
-    missing = data[(data.isna()).any(axis=1)]
-    if not missing.empty:
-        raise ValueError(
-            f"Missing data in REMIND for (first <10 rows)\n{missing.drop_duplicates().head(10)}"
-            "\nCheck the mappings and the remind data."
-            " Hint: are your reference lists consistently separated by ',' or ', '?"
-        )
+    return data[(data.isna()).any(axis=1)]
 
 
 def validate_output(df_out: pd.DataFrame, costs_remind: pd.DataFrame):
@@ -676,6 +979,8 @@ def validate_output(df_out: pd.DataFrame, costs_remind: pd.DataFrame):
 
 
 if __name__ == "__main__":
+    from .readers import RemindExport
+
     root_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
     region = "CHA"  # China w Maccau, Taiwan
 
@@ -685,22 +990,16 @@ if __name__ == "__main__":
     base_path = os.path.expanduser(
         "/p/tmp/ivanra/REMIND/output/SSP2-PkBudg1000-PyPSAxprt_2025-05-09_19.01.34/pypsa_export"
     )
-    paths = {
-        key: os.path.join(base_path, value + ".csv") for key, value in REMIND_PARAM_MAP.items()
-    }
-
     # load the data
-    frames = {k: read_remind_csv(v) for k, v in paths.items()}
+    export = RemindExport(base_path, regions=region)
+    frames = export.load_technoeconomic_frames()
     frames = {
         k: (df.query("region == @region").drop(columns="region") if "region" in df.columns else df)
         for k, df in frames.items()
     }
-    # special case, eff split across two tables
-    frames["eta"] = pd.concat([frames["eta"], frames["eta_part2"]]).drop_duplicates().reset_index()
 
     # get remind version
-    with open(os.path.join(base_path, "c_model_version.csv"), "r") as f:
-        remind_v = f.read().split("\n")[1].replace(",", "").replace(" ", "")
+    remind_v = export.read_version()
 
     # make the stitched weight frames
     weight_frames = [frames[k].assign(weight_type=k) for k in frames if k.startswith("weights")]
@@ -730,12 +1029,7 @@ if __name__ == "__main__":
         os.path.abspath(root_dir + "/.."), "PyPSA-China-PIK/resources/data/costs"
     )
     logger.info(f"Loading pypsa costs from {pypsa_costs_dir}")
-    pypsa_cost_files = [
-        os.path.join(pypsa_costs_dir, f) for f in os.listdir(pypsa_costs_dir) if f.endswith(".csv")
-    ]
-    pypsa_costs = pd.read_csv(pypsa_cost_files.pop())
-    for f in pypsa_cost_files:
-        pypsa_costs = pd.concat([pypsa_costs, pd.read_csv(f)])
+    pypsa_costs = PypsaCostDB.from_dir(pypsa_costs_dir, pattern="*.csv")
 
     # apply the mappings to pypsa tech
     mapped_costs = map_to_pypsa_tech(
@@ -1,21 +1,53 @@
 """ Utility functions for the REMIND-PyPSA coupling"""
 
 import os
-import pandas as pd
-import country_converter as coco
+import io
+import re
+import glob
+import hashlib
 import functools
+import pandas as pd
 import logging
+import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-try:
-    import gamspy
-except ImportError:
-    logging.warning("Gamspy not installed - GDX reading not available.")
+logger = logging.getLogger(__name__)
 
 READERS_REGISTRY = {}
+# env variable pointing to the columnar cache of normalised REMIND csv exports
+CACHE_DIR_ENV = "RPYCPL_CACHE_DIR"
+# rows per chunk when filtering regions while parsing csvs
+REGION_FILTER_CHUNKSIZE = 200_000
+# set columns stored as categoricals in the compact schema
+COMPACT_SET_COLUMNS = ["region", "technology", "carrier", "parameter"]
+
+# file suffixes of the compressed csv cost data
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "bz2": ".bz2", "xz": ".xz", "zstd": ".zst"}
+
+# ISO3 codes not in the precomputed table, converted by country_converter
+_ISO2_FALLBACK = {}
+
+# process-wide pool of loaded GDX containers {(path, mtime): (container, file size)}, LRU ordered
+_GDX_POOL = OrderedDict()
+_GDX_POOL_LOCK = threading.RLock()
+GDX_POOL_LIMITS = {"max_files": 2, "max_bytes": None}
 
 # TODO write classes ro separate into files (readers/validators/etc)
 
 
+def _import_gamspy():
+    """lazy import of the optional GDX backend (slow to import, only needed for gdx files)"""
+    try:
+        import gamspy
+    except ImportError as e:
+        raise ImportError(
+            "Gamspy not installed - GDX reading not available. Install the 'gdx' extra."
+        ) from e
+    return gamspy
+
+
 def register_reader(name):
     """decorator factory to register ETL functions"""
 
@@ -81,41 +113,215 @@ def build_tech_map(remind2pypsa_map: pd.DataFrame, map_param="investment") -> pd
 
 
 @register_reader("pypsa_costs")
-def read_pypsa_costs(cost_files, **kwargs: dict) -> pd.DataFrame:
-    """Read & stitch the pypsa costs files
+def read_pypsa_costs(cost_files, n_workers: int = None, **kwargs: dict) -> pd.DataFrame:
+    """Read & stitch the pypsa costs files (read concurrently)
 
     Args:
         cost_files (list): list of paths to the pypsa costs files
+        n_workers (int, optional): number of reader threads. Defaults to None (python default)
         **kwargs: additional arguments for pd.read_csv
     Returns:
         pd.DataFrame: the techno-economic data for all years.
     """
-    pypsa_costs = pd.read_csv(cost_files.pop(), **kwargs)
-    for f in cost_files:
-        pypsa_costs = pd.concat([pypsa_costs, pd.read_csv(f)])
-    return pypsa_costs
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        frames = list(pool.map(lambda f: pd.read_csv(f, **kwargs), cost_files))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _normalise_remind_table(df: pd.DataFrame) -> pd.DataFrame:
+    """translate the GAMS set column names to pypsa-like names & cast values to float"""
+    # in case the parameter depended on the same set, all columns are suffixed with _1, _2, etc.
+    df.columns = df.columns.str.replace(r"_\d$", "", regex=True)
+    df.rename(columns=REMIND_NAME_MAP, inplace=True)
+
+    df.columns = _fix_repeated_columns(df.columns)
+
+    if "value" in df.columns:
+        df.loc[:, "value"] = df.value.astype(float)
+    return df
+
+
+def to_compact_schema(
+    df: pd.DataFrame, value_dtype: str = "float64", set_columns: list = COMPACT_SET_COLUMNS
+) -> pd.DataFrame:
+    """Memory-lean dtypes for REMIND tables: categorical set columns, int16 years and a
+    configurable float width for the values. Missing columns are ignored.
+
+    Args:
+        df (pd.DataFrame): the REMIND table (pypsa-like column names)
+        value_dtype (str, optional): the float type of the value column. Defaults to "float64".
+        set_columns (list, optional): columns to make categorical. Defaults to COMPACT_SET_COLUMNS.
+    Returns:
+        pd.DataFrame: the table with compact dtypes
+    """
+    dtypes = {col: "category" for col in set_columns if col in df.columns}
+    if "year" in df.columns and pd.api.types.is_integer_dtype(df["year"]):
+        dtypes["year"] = "int16"
+    if "value" in df.columns:
+        dtypes["value"] = value_dtype
+    return df.astype(dtypes)
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    """check whether a table uses the compact schema (categorical set columns)"""
+    return any(
+        isinstance(df[col].dtype, pd.CategoricalDtype)
+        for col in COMPACT_SET_COLUMNS
+        if col in df.columns
+    )
+
+
+def _compact_value_dtype(compact: bool | str) -> str:
+    """the value dtype requested by the readers' compact argument"""
+    return compact if isinstance(compact, str) else "float64"
+
+
+def _region_column(columns) -> str | None:
+    """find the (GAMS named) column holding the REMIND region, if any"""
+    for col in columns:
+        name = re.sub(r"_\d$", "", str(col))
+        if name == "region" or REMIND_NAME_MAP.get(name) == "region":
+            return col
+    return None
+
+
+def _filter_regions(df: pd.DataFrame, regions: list[str] | None) -> pd.DataFrame:
+    """keep only the requested regions (tables without region column are returned as is)"""
+    region_col = _region_column(df.columns)
+    if regions is None or region_col is None:
+        return df
+    return df[df[region_col].isin(regions)].reset_index(drop=True)
+
+
+def _read_csv_regions(file_path: os.PathLike, regions: list[str], **kwargs) -> pd.DataFrame:
+    """read a csv in chunks, dropping the rows of other regions as they are parsed"""
+    header = pd.read_csv(file_path, nrows=0, **kwargs)
+    region_col = _region_column(header.columns)
+    if region_col is None:
+        return pd.read_csv(file_path, **kwargs)
+
+    chunks = [
+        chunk[chunk[region_col].isin(regions)]
+        for chunk in pd.read_csv(file_path, chunksize=REGION_FILTER_CHUNKSIZE, **kwargs)
+    ]
+    if not chunks:
+        return header
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _read_cache(cache_path: os.PathLike, regions: list[str] = None) -> pd.DataFrame:
+    """read the cached table, pushing the region filter down to the parquet reader"""
+    if regions is None:
+        return pd.read_parquet(cache_path)
+    import pyarrow.parquet as pq
+
+    if "region" not in pq.read_schema(cache_path).names:
+        return pd.read_parquet(cache_path)
+    df = pd.read_parquet(cache_path, filters=[("region", "in", list(regions))])
+    return df.reset_index(drop=True)
+
+
+@functools.lru_cache(maxsize=1)
+def package_fingerprint() -> str:
+    """hash of the rpycpl sources, so that code changes invalidate the on-disk caches"""
+    hasher = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+        with open(path, "rb") as f:
+            hasher.update(f.read())
+    return hasher.hexdigest()
+
+
+def _csv_cache_path(file_path: os.PathLike, cache_dir: os.PathLike, read_kwargs: dict) -> str:
+    """Path of the cached (parquet) table for a csv. The key changes with the file
+    size, modification time, the reader arguments and the package sources (the
+    normalisation code), so stale entries are never served."""
+    stat = os.stat(file_path)
+    key = repr(
+        (
+            os.path.abspath(file_path),
+            stat.st_size,
+            stat.st_mtime_ns,
+            sorted(read_kwargs.items()),
+            package_fingerprint(),
+        )
+    )
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{name}-{digest}.parquet")
+
+
+@contextlib.contextmanager
+def atomic_write(path: os.PathLike):
+    """Write a file atomically, so that concurrent readers never see partial files. Yields a
+    temporary path that replaces `path` when the block succeeds and is removed otherwise.
+
+    Example:
+        with atomic_write("costs.parquet") as tmp_path:
+            costs.to_parquet(tmp_path)
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_cache(df: pd.DataFrame, cache_path: os.PathLike):
+    """write the cached table (atomically), failures only disable the cache"""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    try:
+        with atomic_write(cache_path) as tmp_path:
+            df.to_parquet(tmp_path)
+    except ImportError:
+        logger.warning("pyarrow not installed - REMIND csv cache not available.")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not cache {cache_path}: {e}")
 
 
 @register_reader("remind_csv")
-def read_remind_csv(file_path: os.PathLike, **kwargs: dict) -> pd.DataFrame:
+def read_remind_csv(
+    file_path: os.PathLike,
+    cache_dir: os.PathLike = None,
+    regions: list[str] | str = None,
+    compact: bool | str = False,
+    **kwargs: dict,
+) -> pd.DataFrame:
     """read an exported csv from remind (a single table of the gam db)
 
     Args:
         file_path (os.PathLike): path to the csv file
+        cache_dir (os.PathLike, optional): directory for a columnar (parquet) cache of the
+            normalised table. Defaults to the RPYCPL_CACHE_DIR env variable (no cache if unset).
+        regions (list[str] | str, optional): only keep these REMIND regions (rows of other
+            regions are dropped while reading). Defaults to None (all regions).
+        compact (bool | str, optional): use the compact schema (see `to_compact_schema`).
+            Pass a float dtype (e.g. "float32") to also set the value width. Defaults to False.
         **kwargs: additional arguments for pd.read_csv
     Returns:
         pd.DataFrame: the data.
     """
-    df = pd.read_csv(file_path, **kwargs)
-    # in case the parameter depended on the same set, all columns are suffixed with _1, _2, etc.
-    df.columns = df.columns.str.replace(r"_\d$", "", regex=True)
-    df.rename(columns=REMIND_NAME_MAP, inplace=True)
-
-    df.columns = _fix_repeated_columns(df.columns)
-
-    if "value" in df.columns:
-        df.loc[:, "value"] = df.value.astype(float)
+    if isinstance(regions, str):
+        regions = [regions]
+
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    cache_path = _csv_cache_path(file_path, cache_dir, kwargs) if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        logger.debug(f"Reading {file_path} from cache {cache_path}")
+        df = _read_cache(cache_path, regions)
+    elif cache_path:
+        # the cache holds all regions, filter after writing it
+        df = _normalise_remind_table(pd.read_csv(file_path, **kwargs))
+        _write_cache(df, cache_path)
+        df = _filter_regions(df, regions)
+    elif regions is not None:
+        df = _normalise_remind_table(_read_csv_regions(file_path, regions, **kwargs))
+    else:
+        df = _normalise_remind_table(pd.read_csv(file_path, **kwargs))
 
+    if compact:
+        df = to_compact_schema(df, value_dtype=_compact_value_dtype(compact))
     return df
 
 
@@ -132,10 +338,34 @@ def read_remind_regions_csv(mapping_path: os.PathLike, separator=",") -> pd.Data
     """
     regions = pd.read_csv(mapping_path)
     regions.drop(columns="element_text", inplace=True)
-    regions["iso2"] = coco.convert(regions["iso"], to="ISO2")
+    regions["iso2"] = iso3_to_iso2(regions["iso"])
     return regions
 
 
+def iso3_to_iso2(iso3: pd.Series) -> pd.Series:
+    """Convert ISO3 to ISO2 country codes with the precomputed table. Unknown codes
+    fall back to (the slow) country_converter, the results are cached.
+
+    Args:
+        iso3 (pd.Series): the ISO3 codes
+    Returns:
+        pd.Series: the ISO2 codes
+    """
+    from ._iso_codes import ISO3_TO_ISO2
+
+    unknown = set(iso3.dropna().unique()).difference(ISO3_TO_ISO2, _ISO2_FALLBACK)
+    if unknown:
+        import country_converter as coco
+
+        unknown = sorted(unknown)
+        converted = coco.convert(unknown, to="ISO2")
+        # coco returns a str for a single code
+        converted = [converted] if isinstance(converted, str) else converted
+        _ISO2_FALLBACK.update(zip(unknown, converted))
+
+    return iso3.map(lambda code: ISO3_TO_ISO2.get(code, _ISO2_FALLBACK.get(code)))
+
+
 @register_reader("remind_descriptions")
 def read_remind_descriptions_csv(file_path: os.PathLike) -> pd.DataFrame:
     """read the exported description from remind
@@ -151,39 +381,160 @@ def read_remind_descriptions_csv(file_path: os.PathLike) -> pd.DataFrame:
     return descriptors.rename(columns={"Unnamed: 0": "symbol"}).fillna("")
 
 
+def configure_gdx_pool(max_files: int = 2, max_bytes: int = None):
+    """Set the bounds of the process-wide GDX container pool. Least recently used
+    containers are dropped first when a bound is exceeded.
+
+    Args:
+        max_files (int, optional): max number of GDX files kept loaded. Defaults to 2.
+        max_bytes (int, optional): max total size on disk of the loaded GDX files
+            (proxy for memory). Defaults to None (no size bound).
+    """
+    if max_files < 1:
+        raise ValueError("The GDX pool must hold at least one file")
+    with _GDX_POOL_LOCK:
+        GDX_POOL_LIMITS.update({"max_files": max_files, "max_bytes": max_bytes})
+        _evict_gdx_pool()
+
+
+def clear_gdx_pool(file_path: os.PathLike = None):
+    """Invalidate the GDX container pool.
+
+    Args:
+        file_path (os.PathLike, optional): only drop this file. Defaults to None (drop all).
+    """
+    with _GDX_POOL_LOCK:
+        if file_path is None:
+            _GDX_POOL.clear()
+            return
+        path = os.path.abspath(file_path)
+        for key in [k for k in _GDX_POOL if k[0] == path]:
+            del _GDX_POOL[key]
+
+
+def _evict_gdx_pool():
+    """drop least recently used containers until within the pool limits (keeps the newest)"""
+    max_bytes = GDX_POOL_LIMITS["max_bytes"]
+    while len(_GDX_POOL) > 1:
+        n_bytes = sum(size for _, size in _GDX_POOL.values())
+        if len(_GDX_POOL) <= GDX_POOL_LIMITS["max_files"] and (
+            max_bytes is None or n_bytes <= max_bytes
+        ):
+            break
+        _GDX_POOL.popitem(last=False)
+
+
+def gdx_container(file_path: os.PathLike, symbols: list[str] = None):
+    """The gamspy Container of a GDX file, through the process-wide pool.
+
+    Args:
+        file_path (os.PathLike): Path to the GDX file.
+        symbols (list[str], optional): only read these symbols (the container is not pooled),
+            unless the whole file is already in the pool. Defaults to None: load the whole
+            file once per process (and per modification time), see `configure_gdx_pool`.
+    Returns:
+        gamspy.Container: the container
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns)
+    with _GDX_POOL_LOCK:
+        if key in _GDX_POOL:
+            _GDX_POOL.move_to_end(key)
+            return _GDX_POOL[key][0]
+        if symbols is None:
+            # the file changed on disk: older versions are stale
+            clear_gdx_pool(path)
+            logger.debug(f"Loading GDX container from {path}")
+            container = _import_gamspy().Container(load_from=path)
+            _GDX_POOL[key] = (container, stat.st_size)
+            _evict_gdx_pool()
+            return container
+    container = _import_gamspy().Container()
+    container.read(os.fspath(file_path), symbol_names=list(symbols))
+    return container
+
+
 @register_reader("remind_gdx")
 def read_gdx(
-    file_path: os.PathLike, variable_name: str, rename_columns={}, error_on_empty=True
+    file_path: os.PathLike,
+    variable_name: str,
+    rename_columns={},
+    error_on_empty=True,
+    regions: list[str] | str = None,
 ) -> pd.DataFrame:
     """
     Auxiliary function for standardised and cached reading of REMIND-EU data
-    files to pandas.DataFrame.
+    files to pandas.DataFrame. The GDX container is loaded once and shared between calls
+    (see `configure_gdx_pool` and `clear_gdx_pool`).
 
     Args:
         file_path (os.PathLike): Path to the GDX file.
         variable_name (str): Name of the symbol (param, var, scalar) to read from the GDX file.
         rename_columns (dict, optional): Dictionary for renaming columns. Defaults to {}.
         error_on_empty (bool, optional): Raise an error if the DataFrame is empty. Defaults to True.
+        regions (list[str] | str, optional): only keep these REMIND regions. Defaults to None (all).
     Returns:
         pd.DataFrame: the symbol table .
     """
+    if isinstance(regions, str):
+        regions = [regions]
 
-    @functools.lru_cache
-    def _read_and_cache_remind_file(fp):
-        return gamspy.Container(load_from=fp)
-
-    data = _read_and_cache_remind_file(file_path)[variable_name]
+    data = gdx_container(file_path)[variable_name]
 
     df = data.records
 
     if error_on_empty and (df is None or df.empty):
         raise ValueError(f"{variable_name} is empty. In: {file_path}")
 
+    df = _filter_regions(df, regions)
+
     df = df.rename(columns=rename_columns, errors="raise")
     df.metdata = data.description
     return df
 
 
+@register_reader("remind_gdx_symbols")
+def read_gdx_symbols(
+    file_path: os.PathLike,
+    symbols: dict[str, str] | list[str],
+    error_on_empty=True,
+    regions: list[str] | str = None,
+    compact: bool | str = False,
+) -> dict[str, pd.DataFrame]:
+    """Read several symbols from a GDX file in one pass, without loading the rest of the file.
+    The tables get the same column names as the csv exports (see `read_remind_csv`). If the
+    whole file is already loaded in the GDX pool (see `read_gdx`), it is used instead.
+
+    Args:
+        file_path (os.PathLike): Path to the GDX file.
+        symbols (dict[str, str] | list[str]): the symbols to read, either as a list of names or
+            as a {key: symbol_name} map (e.g technoecon_etl.REMIND_PARAM_MAP).
+        error_on_empty (bool, optional): Raise an error if a symbol is empty. Defaults to True.
+        regions (list[str] | str, optional): only keep these REMIND regions. Defaults to None (all).
+        compact (bool | str, optional): use the compact schema, see `read_remind_csv`.
+    Returns:
+        dict[str, pd.DataFrame]: the symbol tables by key (or by name if symbols is a list)
+    """
+    if isinstance(regions, str):
+        regions = [regions]
+    if not isinstance(symbols, dict):
+        symbols = {name: name for name in symbols}
+
+    container = gdx_container(file_path, symbols=sorted(set(symbols.values())))
+    frames = {}
+    for key, name in symbols.items():
+        df = container[name].records
+        if error_on_empty and (df is None or df.empty):
+            raise ValueError(f"{name} is empty. In: {file_path}")
+        if df is not None:
+            df = _normalise_remind_table(_filter_regions(df, regions).copy())
+            if compact:
+                df = to_compact_schema(df, value_dtype=_compact_value_dtype(compact))
+        frames[key] = df
+    return frames
+
+
 def validate_file_list(file_list):
     """Validate the file list to ensure all files exist."""
     for file in file_list:
@@ -191,20 +542,78 @@ def validate_file_list(file_list):
             raise FileNotFoundError(f"File {file} does not exist.")
 
 
-def write_cost_data(cost_data: pd.DataFrame, output_dir: os.PathLike, descript: str = None):
-    """Write the cost data to a folder, with one CSV file per year.
+def _serialise_costs(costs: pd.DataFrame, fmt: str, compression: str = None) -> bytes:
+    """the file content of a cost table (deterministic, so it can be compared to existing files)"""
+    buffer = io.BytesIO()
+    if fmt == "csv":
+        # fix the gzip header time stamp so identical data gives identical files
+        if compression == "gzip":
+            compression = {"method": "gzip", "mtime": 0}
+        costs.to_csv(buffer, index=False, compression=compression)
+    elif fmt == "parquet":
+        costs.to_parquet(buffer, index=False, compression=compression or "snappy")
+    else:
+        raise ValueError(f"Unknown cost data format {fmt}. Use 'csv' or 'parquet'.")
+    return buffer.getvalue()
+
+
+def _write_if_changed(content: bytes, path: os.PathLike) -> bool:
+    """Atomically (re)write a file unless its content is unchanged, leaving its time stamp
+    untouched so workflow managers do not rerun downstream rules.
+
+    Returns:
+        bool: whether the file was written
+    """
+    if os.path.isfile(path):
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(content).digest():
+                return False
+    with atomic_write(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(content)
+    return True
+
+
+def write_cost_data(
+    cost_data: pd.DataFrame,
+    output_dir: os.PathLike,
+    descript: str = None,
+    fmt: str = "csv",
+    compression: str = None,
+    n_workers: int = None,
+) -> list[str]:
+    """Write the cost data to a folder, with one file per year. Years are written in
+    parallel and atomically; files whose content did not change are not rewritten.
 
     Args:
         cost_data (pd.DataFrame): The cost data to write.
         output_dir (os.PathLike): The directory to write the file to.
-        descript (str, optional): optioal description to add to the file name
+        descript (str, optional): optional sub-folder name (description of the data)
+        fmt (str, optional): file format, "csv" or "parquet". Defaults to "csv".
+        compression (str, optional): compression, e.g. "gzip" (csv) or "zstd" (parquet).
+            Defaults to None (uncompressed csv, snappy parquet).
+        n_workers (int, optional): number of writer threads. Defaults to None (python default)
+    Returns:
+        list[str]: the paths of the (re)written files
     """
 
     if descript:
-        output_dir += f"{descript}"
-    for year, group in cost_data.groupby("year"):
-        export_p = os.path.join(output_dir, f"costs_{year}.csv")
-        group.to_csv(export_p, index=False)
+        output_dir = os.path.join(output_dir, descript)
+    os.makedirs(output_dir, exist_ok=True)
+
+    suffix = "." + fmt
+    if fmt == "csv" and compression:
+        suffix += COMPRESSION_SUFFIXES.get(compression, "." + compression)
+
+    def write_year(year_group: tuple) -> str | None:
+        year, group = year_group
+        export_p = os.path.join(output_dir, f"costs_{year}{suffix}")
+        changed = _write_if_changed(_serialise_costs(group, fmt, compression), export_p)
+        return export_p if changed else None
+
+    with ThreadPoolExecutor(max_workers=n_workers) as pool:
+        written = [p for p in pool.map(write_year, cost_data.groupby("year")) if p]
+    logger.info(f"Wrote {len(written)} cost files to {output_dir}, others unchanged")
+    return written
 
 
 def expand_years(df: pd.DataFrame, years: list) -> pd.DataFrame:
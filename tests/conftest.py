@@ -103,4 +103,82 @@ def mock_region_mapping(tmp_path):
     df = pd.DataFrame(data)
     file_path = tmp_path / "region_mapping.csv"
     df.to_csv(file_path, index=False)
-    return file_path
\ No newline at end of file
+    return file_path
+
+
+@pytest.fixture
+def remind_cost_frames():
+    """REMIND technoeconomic frames for a single region (as for make_pypsa_like_costs)."""
+    return {
+        "capex": pd.DataFrame({
+            "technology": ["windon", "spv", "gaschp", "gascc"] * 2,
+            "year": [2030] * 4 + [2035] * 4,
+            "value": [1.2, 0.8, 0.6, 0.9, 1.0, 0.6, 0.6, 0.85],  # TUSD/TW
+        }),
+        "tech_data": pd.DataFrame({
+            "technology": ["windon", "windon", "windon", "spv", "spv", "spv", "gaschp", "gascc"],
+            "parameter": ["omv", "omf", "lifetime", "omv", "omf", "lifetime", "omv", "omv"],
+            "value": [0.01, 0.03, 25, 0.005, 0.02, 30, 0.02, 0.015],
+        }),
+        "co2_intensity": pd.DataFrame({
+            "technology": ["gaschp", "gascc"] * 2,
+            "carrier": ["pegas"] * 4,
+            "to_carrier": ["seel"] * 4,
+            "emission_type": ["co2"] * 4,
+            "year": [2030, 2030, 2035, 2035],
+            "value": [0.4, 0.35, 0.4, 0.35],  # Gt_C/TWa
+        }),
+        "eta": pd.DataFrame({
+            "technology": ["windon", "spv", "gaschp", "gascc"] * 2,
+            "year": [2030] * 4 + [2035] * 4,
+            "value": [1.0, 1.0, 0.45, 0.55, 1.0, 1.0, 0.46, 0.58],
+        }),
+        "fuel_costs": pd.DataFrame({
+            "carrier": ["pegas", "pegas"],
+            "year": [2030, 2035],
+            "value": [0.03, 0.035],  # TUSD/TWa
+        }),
+        "discount_r": pd.DataFrame({"year": [2030, 2035], "value": [0.07, 0.07]}),
+        "weights_gen": pd.DataFrame({
+            "carrier": ["gaschp", "gascc"] * 2,
+            "year": [2030, 2030, 2035, 2035],
+            "value": [0.3, 0.7, 0.2, 0.8],
+        }),
+    }
+
+
+@pytest.fixture
+def techno_mappings():
+    """REMIND -> PyPSA mapping covering all mappers for the remind_cost_frames."""
+    rows = [
+        ("onwind", "investment", "use_remind", "windon"),
+        ("onwind", "VOM", "use_remind", "windon"),
+        ("onwind", "FOM", "use_remind", "windon"),
+        ("onwind", "lifetime", "use_remind", "windon"),
+        ("solar", "investment", "use_remind", "spv"),
+        ("solar", "efficiency", "use_remind", "spv"),
+        ("OCGT", "investment", "weigh_remind_by_gen", "[gaschp, gascc]"),
+        ("OCGT", "efficiency", "weigh_remind_by_gen", "[gaschp, gascc]"),
+        ("OCGT", "CO2 intensity", "weigh_remind_by_gen", "[gaschp, gascc]"),
+        ("nuclear", "investment", "set_value", "5000"),
+        ("nuclear", "lifetime", "use_pypsa", ""),
+        ("offwind", "investment", "use_remind_with_learning_from", "windon"),
+    ]
+    return pd.DataFrame(
+        [{"PyPSA_tech": t, "parameter": p, "mapper": m, "reference": r, "unit": "", "comment": ""}
+         for t, p, m, r in rows]
+    )
+
+
+@pytest.fixture
+def techno_pypsa_costs():
+    """PyPSA costs for the techno_mappings."""
+    return pd.DataFrame({
+        "technology": ["nuclear", "offwind", "nuclear", "offwind"],
+        "year": [2030, 2030, 2035, 2035],
+        "parameter": ["lifetime", "investment", "lifetime", "investment"],
+        "value": [40, 1800, 40, 1700],
+        "unit": ["years", "EUR/MW", "years", "EUR/MW"],
+        "source": ["pypsa"] * 4,
+        "further description": [""] * 4,
+    })
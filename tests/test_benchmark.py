@@ -0,0 +1,88 @@
+"""Tests for rpycpl.benchmark module."""
+import os
+
+import pytest
+
+from rpycpl import benchmark
+from rpycpl.benchmark import (
+    BENCHMARKS,
+    _main,
+    compare_results,
+    load_results,
+    run_benchmarks,
+    time_call,
+    write_results,
+)
+from rpycpl.synthetic import SyntheticScale
+
+
+@pytest.fixture
+def tiny_size(monkeypatch):
+    scale = SyntheticScale(n_regions=2, n_years=3, n_techs=10, n_plants=100, n_nodes=4)
+    monkeypatch.setitem(benchmark.BENCHMARK_SIZES, "tiny", scale)
+    return "tiny"
+
+
+def _results(**times):
+    return {"meta": {}, "results": {name: {"min_s": t} for name, t in times.items()}}
+
+
+def test_run_all_benchmarks(tiny_size, tmp_path):
+    """Test every benchmark runs on synthetic data and the results round-trip as json."""
+    results = run_benchmarks([tiny_size], repeat=2, work_dir=tmp_path)
+    assert set(results["results"]) == {f"{name}[tiny]" for name in BENCHMARKS}
+    assert all(r["min_s"] > 0 and r["repeat"] == 2 for r in results["results"].values())
+
+    write_results(results, tmp_path / "baseline.json")
+    assert load_results(tmp_path / "baseline.json") == results
+
+
+def test_without_caches(tmp_path, monkeypatch):
+    """Test the step cache configured in code is disabled and restored with its bounds."""
+    from rpycpl import step_cache, utils
+
+    monkeypatch.setenv(utils.CACHE_DIR_ENV, str(tmp_path / "csv"))
+    step_cache.configure_step_cache(tmp_path / "steps", max_bytes=10**6)
+    utils.configure_gdx_pool(max_files=3)
+    try:
+        with benchmark._without_caches():
+            assert step_cache.step_cache_dir() is None
+            assert utils.CACHE_DIR_ENV not in os.environ
+        assert step_cache.step_cache_dir() == tmp_path / "steps"
+        assert step_cache.STEP_CACHE_LIMITS["max_bytes"] == 10**6
+        assert utils.GDX_POOL_LIMITS["max_files"] == 3
+        assert os.environ[utils.CACHE_DIR_ENV] == str(tmp_path / "csv")
+    finally:
+        step_cache.configure_step_cache()
+        utils.configure_gdx_pool()
+
+
+def test_run_unknown():
+    with pytest.raises(ValueError, match="Unknown"):
+        run_benchmarks(["huge"])
+
+
+def test_time_call_loops_fast_calls():
+    timings = time_call(lambda: None, repeat=3, min_time=0.001)
+    assert timings["number"] > 1
+    assert timings["min_s"] <= timings["median_s"]
+
+
+def test_compare_results():
+    """Test slowdowns beyond the threshold are flagged, new benchmarks ignored."""
+    baseline = _results(a=1.0, b=1.0, c=1.0)
+    current = _results(a=1.1, b=1.5, c=0.5, d=9.0)
+    comparison = compare_results(baseline, current, threshold=0.2)
+    assert list(comparison.index) == ["b", "a", "c"]
+    assert comparison.regression.to_dict() == {"b": True, "a": False, "c": False}
+
+
+def test_compare_command(tmp_path):
+    """Test the compare command fails on regressions only."""
+    write_results(_results(a=1.0), tmp_path / "baseline.json")
+    write_results(_results(a=1.1), tmp_path / "ok.json")
+    write_results(_results(a=2.0), tmp_path / "slow.json")
+    baseline = str(tmp_path / "baseline.json")
+    assert _main(["compare", baseline, str(tmp_path / "ok.json")]) == 0
+    assert _main(["compare", baseline, str(tmp_path / "slow.json")]) == 1
+    assert _main(["compare", baseline, str(tmp_path / "slow.json"), "--threshold", "1.5"]) == 0
@@ -258,3 +258,23 @@ class TestCalcPaidoffCapacity:
         assert wind_paid == 300.0  # 1000 - 700
         assert solar_paid == 200.0  # 800 - 600
         assert nuclear_paid == 0.0  # 500 - 500
+
+
+def test_scale_down_does_not_mutate():
+    """Test the input capacities are not changed."""
+    to_scale = pd.DataFrame({
+        'Type': ['wind', 'solar'],
+        'Capacity': [500.0, 300.0],
+        'tech_group': ['wind', 'solar']
+    })
+    reference = pd.DataFrame({
+        'capacity': [100.0, 600.0],
+        'tech_group': ['wind', 'solar'],
+        'year': [2030, 2030]
+    })
+    original = to_scale.copy()
+
+    result = scale_down_capacities(to_scale, reference)
+
+    pd.testing.assert_frame_equal(to_scale, original)
+    assert result['Capacity'].tolist() == [100.0, 300.0]
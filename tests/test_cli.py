@@ -0,0 +1,169 @@
+"""Tests for rpycpl.cli module."""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rpycpl.cli import WarmState, execute, main, parse_input, send_request, serve
+from rpycpl.synthetic import SyntheticScale, write_synthetic_inputs
+
+CONFIG = """
+etl_steps:
+  - name: loads
+    method: convert_load
+    frames:
+      ac_load: p32_load
+  - name: tech_groups
+    method: build_tech_map
+    dependencies:
+      tech_mapping: tech_mapping
+  - name: capacities
+    method: convert_capacities
+    frames:
+      capacities: p32_cap
+    dependencies:
+      tech_groups: tech_groups
+"""
+
+
+@pytest.fixture
+def request_dict(tmp_path):
+    """A run request for the capacities step on synthetic data."""
+    scale = SyntheticScale(n_regions=2, n_years=3, n_techs=10, n_plants=10)
+    paths = write_synthetic_inputs(tmp_path / "inputs", scale)
+    config = tmp_path / "etl.yaml"
+    config.write_text(CONFIG)
+    return {
+        "command": "run",
+        "config": str(config),
+        "export": paths["remind_export"],
+        "region": "CHA",
+        "steps": ["capacities"],
+        "inputs": [f"tech_mapping={paths['techmapping']}"],
+        "outputs": {"capacities": str(tmp_path / "caps.csv")},
+    }
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """A daemon listening on a socket in a thread."""
+    socket_path = str(tmp_path / "rpycpl.sock")
+    thread = threading.Thread(target=serve, args=(socket_path,), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if send_request(socket_path, {"command": "ping"}):
+            break
+        time.sleep(0.05)
+    yield socket_path
+    send_request(socket_path, {"command": "shutdown"})
+    thread.join(timeout=5)
+
+
+def test_parse_input():
+    assert parse_input("mappings=data/map.csv") == ("mappings", "csv", "data/map.csv")
+    assert parse_input("costs=pypsa_costs:c_*.csv") == ("costs", "pypsa_costs", "c_*.csv")
+    # not a reader
+    assert parse_input("mappings=C:/map.csv") == ("mappings", "csv", "C:/map.csv")
+    with pytest.raises(ValueError, match="Invalid input"):
+        parse_input("mappings")
+
+
+def test_execute_steps_subset(request_dict, tmp_path):
+    """Test only the requested steps and their upstream run, outputs are written."""
+    response = execute(request_dict, WarmState())
+    assert response["ok"]
+    assert response["outputs"] == {"capacities": str(tmp_path / "caps.csv")}
+    caps = pd.read_csv(tmp_path / "caps.csv")
+    assert {"year", "technology", "capacity", "tech_group"} <= set(caps.columns)
+    assert not caps.tech_group.isna().any()
+
+    request_dict["outputs"] = {"loads": str(tmp_path / "loads.csv")}
+    with pytest.raises(ValueError, match="not run"):
+        execute(request_dict, WarmState())
+
+
+def test_warm_state_reloads_changed_inputs(request_dict):
+    """Test inputs are loaded once and reloaded when the file changes."""
+    state = WarmState()
+    spec = request_dict["inputs"][0]
+    _, first = state.read_input(spec)
+    assert state.read_input(spec)[1] is first
+
+    path = parse_input(spec)[2]
+    mapping = pd.read_csv(path)
+    time.sleep(0.01)
+    mapping.iloc[:5].to_csv(path, index=False)
+    assert len(state.read_input(spec)[1]) == 5
+
+
+def test_warm_state_csv_glob(tmp_path):
+    """Test csv inputs matching a glob are concatenated."""
+    for i in range(2):
+        pd.DataFrame({"a": [i, i]}).to_csv(tmp_path / f"part_{i}.csv", index=False)
+    _, parts = WarmState().read_input(f"parts={tmp_path}/part_*.csv")
+    assert parts.a.tolist() == [0, 0, 1, 1]
+
+
+def test_execute_shares_inputs(request_dict, monkeypatch):
+    """Test the steps get the cached input values without copies, column changes stay private."""
+    from rpycpl import cli
+
+    state = WarmState()
+    _, mapping = state.read_input(request_dict["inputs"][0])
+    columns = mapping.columns.tolist()
+    received = []
+
+    def run(self, inputs=None, **kwargs):
+        received.append(inputs["tech_mapping"])
+        inputs["tech_mapping"]["added"] = 1
+        return {}
+
+    monkeypatch.setattr(cli.Pipeline, "run", run)
+    request_dict["outputs"] = {}
+    execute(request_dict, state)
+    first = mapping.columns[0]
+    assert np.shares_memory(received[0][first].to_numpy(), mapping[first].to_numpy())
+    assert mapping.columns.tolist() == columns
+
+
+def test_daemon(daemon, request_dict, tmp_path):
+    """Test the daemon runs requests, keeps the inputs loaded and reports errors."""
+    assert send_request(daemon, request_dict)["ok"]
+    assert send_request(daemon, request_dict)["ok"]
+    stats = send_request(daemon, {"command": "stats"})
+    assert stats["requests"] == 2
+    assert stats["inputs"] == 1
+    assert stats["remind_tables"] == 1
+
+    failed = send_request(daemon, {**request_dict, "steps": ["missing"]})
+    assert not failed["ok"]
+    assert "Unknown steps" in failed["error"]
+    with pytest.raises(RuntimeError, match="already listening"):
+        serve(daemon)
+
+
+def test_main_run(daemon, request_dict, tmp_path):
+    """Test the command line runs through the daemon or in-process without daemon."""
+    args = [
+        "run",
+        "--config", request_dict["config"],
+        "--export", request_dict["export"],
+        "--region", "CHA",
+        "--step", "capacities",
+        "--input", request_dict["inputs"][0],
+        "--output", f"capacities={tmp_path / 'cli_caps.csv'}",
+    ]
+    assert main(args + ["--socket", daemon]) == 0
+    assert send_request(daemon, {"command": "stats"})["requests"] == 1
+    expected = pd.read_csv(tmp_path / "cli_caps.csv")
+
+    (tmp_path / "cli_caps.csv").unlink()
+    assert main(args + ["--socket", str(tmp_path / "none.sock")]) == 0
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "cli_caps.csv"), expected)
+
+
+def test_main_status_without_daemon(tmp_path, capsys):
+    assert main(["status", "--socket", str(tmp_path / "none.sock")]) == 1
+    assert "No rpycpl daemon" in capsys.readouterr().err
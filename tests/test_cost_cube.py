@@ -0,0 +1,154 @@
+"""Tests for rpycpl.cost_cube module."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rpycpl.cost_cube import CostCube
+from rpycpl.mapping_plan import MappingPlan
+from rpycpl.technoecon_etl import make_pypsa_like_costs, map_to_pypsa_tech, validate_remind_data
+
+
+@pytest.fixture
+def remind_costs(remind_cost_frames):
+    """pypsa-like REMIND costs for two regions."""
+    frames = dict(remind_cost_frames)
+    frames["capex"] = pd.concat(
+        [frames["capex"].assign(region=r) for r in ["EUR", "CHA"]], ignore_index=True
+    )
+    return make_pypsa_like_costs(frames, by_region=True)
+
+
+def test_roundtrip(remind_costs, remind_cost_frames):
+    """Test the long layout is rebuilt as it was, with or without regions."""
+    cube = CostCube.from_costs(remind_costs)
+    assert cube.shape == (2, 5, 8, 2)
+    assert len(cube) == len(remind_costs)
+    pd.testing.assert_frame_equal(cube.to_frame(), remind_costs)
+
+    single = make_pypsa_like_costs(remind_cost_frames)
+    pd.testing.assert_frame_equal(CostCube.from_costs(single).to_frame(), single)
+
+
+def test_get_and_sel(remind_costs):
+    """Test the cell lookups and slices."""
+    cube = CostCube.from_costs(remind_costs)
+    assert cube.get("spv", "investment", 2035, region="EUR") == pytest.approx(0.6e6)
+    assert np.isnan(cube.get("spv", "fuel", 2035, region="EUR"))
+
+    sliced = cube.sel(regions=["EUR"], years=[2035], technologies=["spv", "windon"])
+    assert sliced.regions.tolist() == ["EUR"]
+    assert sliced.technologies.tolist() == ["spv", "windon"]
+    expected = remind_costs.query(
+        "region == 'EUR' & year == 2035 & technology in ['spv', 'windon']"
+    )
+    pd.testing.assert_frame_equal(sliced.to_frame(), expected.reset_index(drop=True))
+    with pytest.raises(KeyError, match="not in the year axis"):
+        cube.sel(years=[2050])
+
+
+def test_weigh(remind_costs):
+    """Test the basket mean skips techs without weight."""
+    cube = CostCube.from_costs(remind_costs)
+    weights = pd.DataFrame({
+        "technology": ["gaschp", "gascc", "gaschp"],
+        "year": [2030, 2030, 2035],
+        "weight": [1.0, 3.0, 1.0],
+    })
+    aligned = cube.align(weights, value_col="weight")
+    assert aligned.shape == (2, 5, 2)
+    baskets = [["gaschp", "gascc"], ["gascc"]]
+    means = cube.weigh(baskets, ["investment", "investment"], aligned)
+    assert means.shape == (2, 2, 2)
+    # 2030: (0.6 + 3 * 0.9) / 4, 2035: gaschp only
+    assert means[0, 1] == pytest.approx(np.array([0.825e6, 0.6e6]))
+    assert means[1, 1, 0] == pytest.approx(0.9e6)
+    n_units = cube.n_units(baskets, ["investment", "fuel"])
+    assert n_units.shape == (2, 2, 2)
+    assert (n_units[0] == 1).all() and (n_units[1] == 0).all()
+
+
+def test_take_and_has_data(remind_costs):
+    """Test the lookups of (technology, parameter) pairs by axis position."""
+    cube = CostCube.from_costs(remind_costs)
+    taken = cube.take(["spv", "gascc"], ["investment", "investment"])
+    assert taken.index.tolist() == [0] * 4 + [1] * 4
+    expected = remind_costs.query("technology == 'spv' & parameter == 'investment'")
+    assert taken.loc[0, "value"].tolist() == expected.value.tolist()
+    assert taken.loc[0, "region"].tolist() == expected.region.tolist()
+    with pytest.raises(KeyError, match="not in the technology axis"):
+        cube.take(["nuclear"], ["investment"])
+
+    has_data = cube.has_data(["spv", "spv", "nuclear"], ["investment", "fuel", "investment"])
+    assert has_data.tolist() == [True, False, False]
+
+
+def test_weigh_missing_tech(remind_costs, techno_mappings, techno_pypsa_costs):
+    """Test weighed techs missing in REMIND are reported as such."""
+    mappings = techno_mappings.copy()
+    weighed = mappings.mapper.str.startswith("weigh_remind_by_")
+    mappings.loc[weighed, "reference"] = "[gaschp, gascc, nuclear]"
+    with pytest.raises(ValueError, match="Weighed techs or parameters missing in REMIND"):
+        map_to_pypsa_tech(
+            CostCube.from_costs(remind_costs),
+            pypsa_costs=techno_pypsa_costs,
+            mappings=MappingPlan.compile(mappings),
+            weights=pd.DataFrame(columns=["technology", "year", "weight"]),
+            by_region=True,
+        )
+
+
+def test_inconsistent_units(remind_costs):
+    remind_costs.loc[remind_costs.index[0], "unit"] = "EUR/MW"
+    with pytest.raises(ValueError, match="unit of the REMIND costs varies"):
+        CostCube.from_costs(remind_costs)
+
+
+def test_map_to_pypsa_tech(remind_costs, techno_mappings, techno_pypsa_costs):
+    """Test the cube maps as the long costs."""
+    plan = MappingPlan.compile(techno_mappings)
+    weights = pd.DataFrame({
+        "technology": ["gaschp", "gascc"] * 2,
+        "year": [2030, 2030, 2035, 2035],
+        "weight": [0.3, 0.7, 0.2, 0.8],
+    })
+    kwargs = dict(
+        pypsa_costs=techno_pypsa_costs,
+        mappings=plan,
+        weights=weights,
+        currency_conversion=1.11,
+        by_region=True,
+    )
+    cube = CostCube.from_costs(remind_costs)
+    validate_remind_data(cube, plan)
+    expected = map_to_pypsa_tech(remind_costs, **kwargs)
+    pd.testing.assert_frame_equal(map_to_pypsa_tech(cube, **kwargs), expected)
+
+
+def test_map_partial_basket(remind_costs, techno_mappings, techno_pypsa_costs):
+    """Test baskets with data for only some techs in a region & year are weighed as the
+    long costs: over the techs with data."""
+    partial = remind_costs.query("~(technology == 'gascc' & region == 'EUR' & year == 2035)")
+    kwargs = dict(
+        pypsa_costs=techno_pypsa_costs,
+        mappings=MappingPlan.compile(techno_mappings),
+        weights=pd.DataFrame({"technology": ["gaschp", "gascc"], "year": 2035, "weight": 1.0}),
+        by_region=True,
+    )
+    expected = map_to_pypsa_tech(partial, **kwargs)
+    cube = CostCube.from_costs(partial)
+    pd.testing.assert_frame_equal(map_to_pypsa_tech(cube, **kwargs), expected)
+
+    # no data at all in a region & year
+    empty = partial.query("~(technology == 'gaschp' & region == 'EUR' & year == 2035)")
+    for costs in [empty, CostCube.from_costs(empty)]:
+        with pytest.raises(ValueError, match="Units do not match for weights"):
+            map_to_pypsa_tech(costs, **kwargs)
+
+
+def test_write(remind_costs, tmp_path):
+    cube = CostCube.from_costs(remind_costs)
+    written = cube.sel(years=[2030]).write(tmp_path)
+    assert [os.path.basename(p) for p in written] == ["costs_2030.csv"]
+    assert len(pd.read_csv(written[0])) == len(remind_costs.query("year == 2030"))
@@ -0,0 +1,139 @@
+"""Tests for rpycpl.ensemble module."""
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rpycpl import ensemble
+from rpycpl.ensemble import EnsembleExecutor, share_frame
+from rpycpl.pypsa_costs import PypsaCostDB
+
+CONFIG = {
+    "etl_steps": [
+        {"name": "loads", "method": "convert_load", "frames": {"ac_load": "p32_load"}},
+        {"name": "tech_groups", "method": "build_tech_map",
+         "dependencies": {"tech_mapping": "tech_mapping"}},
+    ]
+}
+
+
+@pytest.fixture
+def shared_table():
+    """Table with numeric, string, categorical, missing and list cells."""
+    return pd.DataFrame({
+        "technology": ["CCGT", "OCGT", np.nan],
+        "year": np.array([2030, 2035, 2040], dtype="int16"),
+        "value": [1.5, np.nan, 3.0],
+        "carrier": pd.Categorical(["gas", "gas", "coal"]),
+        "reference": [["a", "b"], "c", "d"],
+    })
+
+
+@pytest.fixture
+def scenario_exports(tmp_path):
+    """Two scenario exports with loads for two regions."""
+    exports = {}
+    for scale, scenario in enumerate(["SSP2-PkBudg1000", "SSP2-NPi"], start=1):
+        path = tmp_path / scenario
+        path.mkdir()
+        pd.DataFrame({
+            "ttot": [2030, 2035, 2030, 2035],
+            "all_regi": ["CHA", "CHA", "EUR", "EUR"],
+            "value": [1.0 * scale, 1.2 * scale, 0.5 * scale, 0.6 * scale],
+        }).to_csv(path / "p32_load.csv", index=False)
+        exports[scenario] = path
+    return exports
+
+
+def test_share_frame_roundtrip(shared_table):
+    """Test tables are rebuilt identically from shared memory."""
+    handle, shm = share_frame(shared_table)
+    try:
+        pd.testing.assert_frame_equal(handle.to_frame(), shared_table)
+        indexed = shared_table.drop(columns="reference").set_index(["technology", "year"])
+        handle_idx, shm_idx = share_frame(indexed)
+        pd.testing.assert_frame_equal(handle_idx.to_frame(), indexed)
+        shm_idx.close()
+        shm_idx.unlink()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_share_frame_read_only(shared_table):
+    """Test tables are rebuilt once per process as read-only views shared by the jobs."""
+    handle, shm = share_frame(shared_table)
+    try:
+        table = handle.to_frame()
+        assert handle.to_frame() is table
+        job_table = ensemble._job_inputs({"table": handle})["table"]
+        assert np.shares_memory(job_table["value"].to_numpy(), table["value"].to_numpy())
+        with pytest.raises(ValueError, match="read-only"):
+            job_table.loc[0, "value"] = 0.0
+        with pytest.raises(ValueError, match="read-only"):
+            job_table.loc[0, "technology"] = "CHP"
+        # column changes stay private to the job
+        job_table["added"] = 1
+        assert "added" not in table.columns
+        assert table["value"].iloc[0] == 1.5
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_share_pypsa_cost_db():
+    """Test the indexed pypsa costs are rebuilt as PypsaCostDB."""
+    costs = PypsaCostDB(pd.DataFrame({
+        "technology": ["CCGT", "OCGT"],
+        "parameter": ["investment"] * 2,
+        "year": [2030, 2030],
+        "value": [800.0, 400.0],
+    }))
+    handle, shm = share_frame(costs)
+    try:
+        rebuilt = handle.to_frame()
+        assert isinstance(rebuilt, PypsaCostDB)
+        pd.testing.assert_frame_equal(rebuilt.data, costs.data)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_ensemble_run(scenario_exports, sample_tech_map):
+    """Test all (scenario, region) pairs are run with the shared inputs."""
+    context = multiprocessing.get_context("spawn")
+    with EnsembleExecutor(
+        CONFIG, {"tech_mapping": sample_tech_map}, n_workers=2, mp_context=context
+    ) as executor:
+        outputs = executor.run(scenario_exports, regions=["CHA", "EUR"])
+
+    assert set(outputs) == {(s, r) for s in scenario_exports for r in ["CHA", "EUR"]}
+    loads = outputs["SSP2-NPi", "EUR"]["loads"]
+    assert loads.value.tolist() == pytest.approx([1.0 * 365 * 24 * 1e6, 1.2 * 365 * 24 * 1e6])
+    assert not outputs["SSP2-NPi", "CHA"]["tech_groups"].empty
+
+
+def test_ensemble_releases_blocks_on_failure(shared_table, monkeypatch):
+    """Test the blocks shared before a failing input are released."""
+    blocks = []
+
+    def share_or_fail(table):
+        if blocks:
+            raise MemoryError("no shared memory left")
+        handle, shm = share_frame(table)
+        blocks.append(shm)
+        return handle, shm
+
+    monkeypatch.setattr(ensemble, "share_frame", share_or_fail)
+    inputs = {"tech_mapping": shared_table, "other": shared_table}
+    with pytest.raises(MemoryError):
+        EnsembleExecutor(CONFIG, inputs)
+    with pytest.raises(FileNotFoundError):
+        ensemble.shared_memory.SharedMemory(name=blocks[0].name)
+
+
+def test_ensemble_invalid_dependency():
+    """Test unknown dependencies are caught before starting the workers."""
+    with pytest.raises(ValueError, match="is not a step or input"):
+        EnsembleExecutor(CONFIG, {})
@@ -1,5 +1,7 @@
 """Tests for rpycpl.etl module"""
+import numpy as np
 import pandas as pd
+import pytest
 import logging 
 
 from rpycpl.etl import (
@@ -226,3 +228,135 @@ class TestConvertRemindCapacities:
         # Should have tech_group column
         assert 'tech_group' in result.columns
         assert result['tech_group'].iloc[0] == 'wind'
+
+
+def test_technoeconomic_data_compact(remind_cost_frames, techno_mappings, techno_pypsa_costs):
+    """Test the compact schema of the remind frames is kept through the transforms."""
+    from rpycpl.etl import technoeconomic_data
+    from rpycpl.utils import to_compact_schema
+
+    reference = technoeconomic_data(
+        {k: df.copy() for k, df in remind_cost_frames.items()},
+        techno_mappings.copy(),
+        techno_pypsa_costs,
+        currency_conversion=1.11,
+    )
+    compact_frames = {k: to_compact_schema(df, "float32") for k, df in remind_cost_frames.items()}
+    result = technoeconomic_data(
+        compact_frames, techno_mappings.copy(), techno_pypsa_costs, currency_conversion=1.11
+    )
+
+    assert isinstance(result["technology"].dtype, pd.CategoricalDtype)
+    assert result["year"].dtype == "int16"
+    assert result["value"].dtype == "float32"
+    assert result["value"].tolist() == pytest.approx(reference["value"].astype(float).tolist(), rel=1e-6)
+    assert result["technology"].astype(str).tolist() == reference["technology"].tolist()
+
+
+def test_technoeconomic_data_by_region(remind_cost_frames, techno_mappings, techno_pypsa_costs):
+    """Test all regions mapped at once match the region by region results."""
+    from rpycpl.etl import technoeconomic_data
+
+    scales = {"CHA": 1.0, "EUR": 1.5}
+    region_frames = {
+        region: {
+            k: df.assign(value=df.value * scale) if k != "discount_r" else df.copy()
+            for k, df in remind_cost_frames.items()
+        }
+        for region, scale in scales.items()
+    }
+    # the discount rate is region independent
+    all_regions = {
+        k: pd.concat([frames[k].assign(region=r) for r, frames in region_frames.items()])
+        for k in remind_cost_frames
+        if k != "discount_r"
+    }
+    all_regions["discount_r"] = remind_cost_frames["discount_r"].copy()
+
+    result = technoeconomic_data(
+        all_regions, techno_mappings.copy(), techno_pypsa_costs, 1.11, by_region=True
+    )
+
+    assert result["region"].tolist() == sorted(result["region"])
+    for region, frames in region_frames.items():
+        expected = technoeconomic_data(frames, techno_mappings.copy(), techno_pypsa_costs, 1.11)
+        regional = result.query("region == @region").drop(columns="region")
+        pd.testing.assert_frame_equal(
+            regional.reset_index(drop=True).astype({"value": float}),
+            expected.astype({"value": float}),
+        )
+
+
+class TestFramesBundle:
+    """Test cases for the read-only FramesBundle."""
+
+    def test_bundle_read_only(self):
+        """Test the bundle can not be changed by assignment nor by column changes."""
+        from rpycpl.etl import FramesBundle
+
+        load = pd.DataFrame({"year": [2030], "value": [1.0]})
+        bundle = FramesBundle({"ac_load": load})
+
+        with pytest.raises(TypeError):
+            bundle["ac_load"] = load
+        frame = bundle["ac_load"]
+        frame["load"] = "ac"
+        frame.drop(columns="year", inplace=True)
+        frame.rename(columns={"value": "p_set"}, inplace=True)
+
+        assert bundle["ac_load"].columns.tolist() == ["year", "value"]
+        assert load.columns.tolist() == ["year", "value"]
+
+    def test_bundle_shares_buffers(self, remind_cost_frames, monkeypatch):
+        """Test the steps read the stored values, no frame of the bundle is deep-copied."""
+        from rpycpl.etl import FramesBundle
+        from rpycpl.technoecon_etl import make_pypsa_like_costs
+
+        stored = {id(frame) for frame in remind_cost_frames.values()}
+        deep_copies = []
+        copy = pd.DataFrame.copy
+
+        def counting_copy(frame, deep=True):
+            if id(frame) in stored and deep:
+                deep_copies.append(frame)
+            return copy(frame, deep=deep)
+
+        monkeypatch.setattr(pd.DataFrame, "copy", counting_copy)
+        bundle = FramesBundle(remind_cost_frames)
+        make_pypsa_like_costs(bundle)
+        make_pypsa_like_costs(bundle)
+        assert not deep_copies
+
+        for key, frame in remind_cost_frames.items():
+            for col in frame.columns:
+                assert np.shares_memory(bundle[key][col].to_numpy(), frame[col].to_numpy())
+
+    def test_bundle_replace(self):
+        """Test replace returns a new bundle sharing the other frames."""
+        from rpycpl.etl import FramesBundle
+
+        bundle = FramesBundle(a=pd.DataFrame({"value": [1.0]}), b=pd.DataFrame({"value": [2.0]}))
+        replaced = bundle.replace(b=pd.DataFrame({"value": [3.0]}))
+
+        assert bundle["b"]["value"].tolist() == [2.0]
+        assert replaced["b"]["value"].tolist() == [3.0]
+        assert list(replaced) == ["a", "b"]
+
+
+def test_steps_do_not_mutate_inputs(remind_cost_frames, techno_mappings, techno_pypsa_costs):
+    """Test the ETL steps leave their input frames unchanged."""
+    from rpycpl.etl import technoeconomic_data
+
+    loads = {"ac_load": pd.DataFrame({"year": [2030], "region": ["CHA"], "value": [1.0]})}
+    caps = {"capacities": pd.DataFrame({"year": [2030], "technology": ["spv"], "value": [1.0]})}
+    inputs = [loads, caps, remind_cost_frames, {"mappings": techno_mappings}]
+    originals = [{k: df.copy() for k, df in frames.items()} for frames in inputs]
+
+    convert_loads(loads, region="CHA")
+    convert_remind_capacities(caps)
+    technoeconomic_data(remind_cost_frames, techno_mappings, techno_pypsa_costs, 1.11)
+
+    for frames, original in zip(inputs, originals):
+        assert frames.keys() == original.keys()
+        for key, df in frames.items():
+            pd.testing.assert_frame_equal(df, original[key])
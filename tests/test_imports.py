@@ -13,12 +13,24 @@ def test_import_utils():
     assert utils is not None
 
 
+def test_import_ensemble():
+    """Test that ensemble module imports correctly."""
+    from rpycpl import ensemble
+    assert ensemble is not None
+
+
 def test_import_etl():
     """Test that etl module imports correctly."""
     from rpycpl import etl
     assert etl is not None
 
 
+def test_import_benchmark():
+    """Test that benchmark module imports correctly."""
+    from rpycpl import benchmark
+    assert benchmark is not None
+
+
 def test_import_capacities_etl():
     """Test that capacities_etl module imports correctly."""
     from rpycpl import capacities_etl
@@ -31,12 +43,72 @@ def test_import_technoecon_etl():
     assert technoecon_etl is not None
 
 
+def test_import_cost_cube():
+    """Test that cost_cube module imports correctly."""
+    from rpycpl import cost_cube
+    assert cost_cube is not None
+
+
 def test_import_disagg():
     """Test that disagg module imports correctly."""
     from rpycpl import disagg
     assert disagg is not None
 
 
+def test_import_manifest():
+    """Test that manifest module imports correctly."""
+    from rpycpl import manifest
+    assert manifest is not None
+
+
+def test_import_mapping_plan():
+    """Test that mapping_plan module imports correctly."""
+    from rpycpl import mapping_plan
+    assert mapping_plan is not None
+
+
+def test_import_pipeline():
+    """Test that pipeline module imports correctly."""
+    from rpycpl import pipeline
+    assert pipeline is not None
+
+
+def test_import_profiling():
+    """Test that profiling module imports correctly."""
+    from rpycpl import profiling
+    assert profiling is not None
+
+
+def test_import_synthetic():
+    """Test that synthetic module imports correctly."""
+    from rpycpl import synthetic
+    assert synthetic is not None
+
+
+def test_import_readers():
+    """Test that readers module imports correctly."""
+    from rpycpl import readers
+    assert readers is not None
+
+
+def test_import_pypsa_costs():
+    """Test that pypsa_costs module imports correctly."""
+    from rpycpl import pypsa_costs
+    assert pypsa_costs is not None
+
+
+def test_import_step_cache():
+    """Test that step_cache module imports correctly."""
+    from rpycpl import step_cache
+    assert step_cache is not None
+
+
+def test_import_cli():
+    """Test that cli module imports correctly."""
+    from rpycpl import cli
+    assert cli is not None
+
+
 def test_import_coupled_cfg():
     """Test that coupled_cfg module imports correctly."""
     from rpycpl import coupled_cfg
@@ -53,3 +125,39 @@ def test_readers_registry_exists():
     """Test that the readers registry is accessible."""
     from rpycpl.utils import READERS_REGISTRY
     assert isinstance(READERS_REGISTRY, dict)
+
+
+# budget for importing rpycpl on top of its core dependencies (pandas, numpy, yaml)
+IMPORT_BUDGET_S = 0.5
+
+
+def _import_profile(statement: str) -> str:
+    """run an import in a fresh interpreter and return the -X importtime profile"""
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stderr
+
+
+def test_optional_backends_not_imported():
+    """Test that gamspy and country_converter are only imported when needed."""
+    profile = _import_profile("import rpycpl, rpycpl.readers")
+    imported = {line.split("|")[-1].strip() for line in profile.splitlines()}
+    assert "gamspy" not in imported
+    assert "country_converter" not in imported
+
+
+def test_import_time_budget():
+    """Test that importing rpycpl stays within the time budget."""
+    profile = _import_profile("import pandas, numpy, yaml; import rpycpl")
+    # the last entry for the package is its cumulative import time in us
+    cumulative = [
+        int(line.split("|")[1]) for line in profile.splitlines() if line.split("|")[-1].strip() == "rpycpl"
+    ]
+    assert cumulative[-1] / 1e6 < IMPORT_BUDGET_S
@@ -0,0 +1,108 @@
+"""Tests for rpycpl.manifest module."""
+import os
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from rpycpl.manifest import (
+    MANIFEST_FILE,
+    build_manifest,
+    diff_exports,
+    diff_manifests,
+    load_manifest,
+)
+
+
+@pytest.fixture
+def two_iterations(tmp_path):
+    """Exports of two coupling iterations, prices & capacities changed."""
+    table = pd.DataFrame({"ttot": [2030], "all_regi": ["CHA"], "value": [1.0]})
+    exports = []
+    for iteration in [1, 2]:
+        path = tmp_path / f"iteration_{iteration}"
+        path.mkdir()
+        table.to_csv(path / "pm_data.csv", index=False)
+        table.to_csv(path / "pm_emifac.csv", index=False)
+        table.assign(value=iteration).to_csv(path / "p32_PEPriceAvg.csv", index=False)
+        table.assign(value=iteration).to_csv(path / "p32_cap.csv", index=False)
+        exports.append(path)
+    (exports[0] / "p32_old.csv").write_text("ttot,value\n2030,1\n")
+    (exports[1] / "p32_new.csv").write_text("ttot,value\n2030,1\n")
+    return exports
+
+
+def test_diff_exports(two_iterations):
+    """Test changed, added & removed symbols are reported."""
+    diff = diff_exports(*two_iterations)
+
+    assert diff.changed == {"p32_PEPriceAvg", "p32_cap"}
+    assert diff.added == {"p32_new"}
+    assert diff.removed == {"p32_old"}
+    assert diff.symbols == {"p32_PEPriceAvg", "p32_cap", "p32_new", "p32_old"}
+
+
+def test_diff_unchanged(two_iterations):
+    """Test identical exports have no differences."""
+    assert not diff_exports(two_iterations[0], two_iterations[0])
+
+
+def test_manifest_written_and_reused(two_iterations, monkeypatch):
+    """Test the saved manifest is reused for files with unchanged size & mtime."""
+    export = two_iterations[1]
+    manifest = build_manifest(export, write=True)
+    assert load_manifest(os.path.join(export, MANIFEST_FILE)) == manifest
+
+    from rpycpl import manifest as manifest_module
+
+    def fail(path):
+        raise AssertionError(f"re-hashed {path}")
+
+    monkeypatch.setattr(manifest_module, "_file_fingerprint", fail)
+    assert build_manifest(export) == manifest
+
+
+def test_diff_exports_selected_symbols(two_iterations):
+    """Test only the selected symbols are compared."""
+    diff = diff_exports(*two_iterations, symbols=["pm_data", "p32_cap", "p32_new"])
+    assert diff.changed == {"p32_cap"}
+    assert diff.added == {"p32_new"}
+    assert not diff.removed
+
+
+def test_gdx_manifest_reads_selected_symbols(tmp_path, monkeypatch):
+    """Test the gdx fingerprints only read the selected symbols."""
+    from rpycpl import utils
+
+    reads = []
+
+    class FakeContainer:
+        def __init__(self, load_from=None):
+            self.data = {}
+            if load_from:
+                self.read(load_from, ["pm_data", "p32_cap"])
+
+        def read(self, load_from, symbol_names=None):
+            reads.append(sorted(symbol_names))
+            for name in symbol_names:
+                records = pd.DataFrame({"ttot": [2030], "value": [float(len(name))]})
+                self.data[name] = SimpleNamespace(records=records)
+
+    monkeypatch.setitem(sys.modules, "gamspy", SimpleNamespace(Container=FakeContainer))
+    utils.clear_gdx_pool()
+    gdx = tmp_path / "fulldata.gdx"
+    gdx.write_bytes(b"gdx")
+    try:
+        assert set(build_manifest(gdx, symbols=["p32_cap"])) == {"p32_cap"}
+        assert reads == [["p32_cap"]]
+        assert set(build_manifest(gdx)) == {"pm_data", "p32_cap"}
+    finally:
+        utils.clear_gdx_pool()
+
+
+def test_diff_manifests():
+    """Test the diff of in-memory manifests."""
+    old = {"pm_data": {"sha1": "a"}, "p32_cap": {"sha1": "b"}}
+    new = {"pm_data": {"sha1": "a"}, "p32_cap": {"sha1": "c"}}
+    assert diff_manifests(old, new).changed == {"p32_cap"}
@@ -0,0 +1,61 @@
+"""Tests for rpycpl.mapping_plan module."""
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+from rpycpl.etl import technoeconomic_data
+from rpycpl.mapping_plan import MappingPlan, read_mapping_plan
+from rpycpl.technoecon_etl import MAPPING_FUNCTIONS
+from rpycpl.utils import READERS_REGISTRY
+
+MAPPING_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "techmapping_remind2py.csv")
+
+
+def test_compile_csv():
+    """Test the references are split and the rows are indexed by mapper."""
+    plan = MappingPlan.compile(MAPPING_CSV)
+    table = pd.read_csv(MAPPING_CSV)
+    assert len(plan) == len(table)
+    for mapper in MAPPING_FUNCTIONS:
+        expected = table.query("mapper == @mapper")
+        assert plan.rows(mapper).index.tolist() == expected.index.tolist()
+    weighed = plan.rows("weigh_remind_by_gen").reference
+    assert all(isinstance(ref, list) for ref in weighed)
+    assert MappingPlan.compile(plan) is plan
+
+
+def test_rows_several_mappers(techno_mappings):
+    plan = MappingPlan(techno_mappings)
+    rows = plan.rows("use_pypsa", "set_value")
+    assert set(rows.mapper) == {"use_pypsa", "set_value"}
+    assert rows.index.is_monotonic_increasing
+
+
+def test_invalid_mapping(techno_mappings):
+    invalid = techno_mappings.assign(mapper="use_something")
+    with pytest.raises(ValueError, match="Forbidden mappers"):
+        MappingPlan(invalid)
+
+
+def test_save_load(techno_mappings, tmp_path):
+    plan = MappingPlan(techno_mappings)
+    plan.save(tmp_path / "plan.pkl")
+    loaded = read_mapping_plan(tmp_path / "plan.pkl")
+    pd.testing.assert_frame_equal(loaded.to_frame(), plan.to_frame())
+    assert loaded.fingerprint == plan.fingerprint
+    assert READERS_REGISTRY["mapping_plan"] is read_mapping_plan
+
+    with open(tmp_path / "old.pkl", "wb") as f:
+        pickle.dump((0, plan), f)
+    with pytest.raises(ValueError, match="format"):
+        MappingPlan.load(tmp_path / "old.pkl")
+
+
+def test_technoeconomic_data_with_plan(remind_cost_frames, techno_mappings, techno_pypsa_costs):
+    """Test a compiled plan gives the same result as the mapping table."""
+    expected = technoeconomic_data(remind_cost_frames, techno_mappings, techno_pypsa_costs, 1.11)
+    plan = MappingPlan(techno_mappings)
+    result = technoeconomic_data(remind_cost_frames, plan, techno_pypsa_costs, 1.11)
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,136 @@
+"""Tests for rpycpl.pipeline module."""
+import threading
+import graphlib
+import pandas as pd
+import pytest
+
+from rpycpl.etl import Transformation, register_etl
+from rpycpl.pipeline import Pipeline
+
+
+class DictLoader:
+    """loader serving in-memory frames"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def load_frames(self, frames):
+        return {k: self.tables[v].copy() for k, v in frames.items() if v}
+
+
+@pytest.fixture
+def loader():
+    return DictLoader({
+        "p32_load": pd.DataFrame({
+            "year": [2030, 2035, 2030],
+            "region": ["CHA", "CHA", "EUR"],
+            "value": [1.0, 1.2, 0.1],
+        }),
+        "p32_cap": pd.DataFrame({
+            "year": [2030, 2030],
+            "region": ["CHA", "CHA"],
+            "technology": ["spv", "windon"],
+            "value": [0.1, 0.2],
+        }),
+    })
+
+
+CONFIG = {
+    "etl_steps": [
+        {"name": "loads", "method": "convert_load", "frames": {"ac_load": "p32_load"}},
+        {"name": "tech_groups", "method": "build_tech_map",
+         "dependencies": {"tech_mapping": "mapping"}},
+        {"name": "capacities", "method": "convert_capacities", "frames": {"capacities": "p32_cap"},
+         "dependencies": {"tech_groups": "tech_groups"}},
+    ]
+}
+
+
+def test_pipeline_run(loader):
+    """Test running dependent & independent steps with the region argument."""
+    mapping = pd.DataFrame({
+        "PyPSA_tech": ["solar", "onwind"],
+        "parameter": ["investment", "investment"],
+        "mapper": ["use_remind", "use_remind"],
+        "reference": ["spv", "windon"],
+    })
+    pipeline = Pipeline.from_config(CONFIG, loader=loader, n_workers=2)
+    assert pipeline.graph({"mapping": mapping})["capacities"] == {"tech_groups"}
+
+    outputs = pipeline.run(inputs={"mapping": mapping}, region="CHA")
+
+    assert set(outputs) == {"loads", "tech_groups", "capacities"}
+    assert len(outputs["loads"]) == 2
+    assert outputs["capacities"]["tech_group"].tolist() == ["solar", "onwind"]
+
+
+def test_pipeline_filters(loader):
+    """Test the step frame filters use the run arguments."""
+    steps = [Transformation(name="loads", method="convert_load", frames={"ac_load": "p32_load"},
+                            filters={"ac_load": "region == @region"})]
+    outputs = Pipeline(steps, loader=loader).run(region="EUR")
+    assert outputs["loads"]["value"].tolist() == [0.1 * 365 * 24 * 1e6]
+
+
+def test_pipeline_concurrent_steps():
+    """Test independent steps run at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    @register_etl("test_wait_for_other")
+    def wait_for_other(frames):
+        barrier.wait()
+        return True
+
+    steps = [Transformation(name=n, method="test_wait_for_other") for n in ["a", "b"]]
+    assert Pipeline(steps, n_workers=2).run() == {"a": True, "b": True}
+
+
+def test_pipeline_invalid_dependencies():
+    """Test unknown and circular dependencies raise."""
+    unknown = [Transformation(name="a", method="convert_load", dependencies={"x": "missing"})]
+    with pytest.raises(ValueError, match="not a step or input"):
+        Pipeline(unknown).run()
+
+    circular = [
+        Transformation(name="a", method="convert_load", dependencies={"x": "b"}),
+        Transformation(name="b", method="convert_load", dependencies={"x": "a"}),
+    ]
+    with pytest.raises(graphlib.CycleError):
+        Pipeline(circular).run()
+
+
+def test_pipeline_missing_loader():
+    """Test steps with REMIND frames need a loader."""
+    steps = [Transformation(name="loads", method="convert_load", frames={"ac_load": "p32_load"})]
+    with pytest.raises(ValueError, match="no loader"):
+        Pipeline(steps).run()
+
+
+def test_pipeline_affected_steps():
+    """Test changed symbols & inputs propagate to the downstream steps."""
+    pipeline = Pipeline.from_config(CONFIG)
+    assert pipeline.affected_steps({"p32_load"}) == {"loads"}
+    assert pipeline.affected_steps({"mapping"}) == {"tech_groups", "capacities"}
+    assert pipeline.affected_steps({"pm_data"}) == set()
+
+
+def test_pipeline_rerun(loader):
+    """Test only the affected steps are recomputed."""
+    mapping = pd.DataFrame({
+        "PyPSA_tech": ["solar", "onwind"],
+        "parameter": ["investment", "investment"],
+        "mapper": ["use_remind", "use_remind"],
+        "reference": ["spv", "windon"],
+    })
+    pipeline = Pipeline.from_config(CONFIG, loader=loader)
+    previous = pipeline.run(inputs={"mapping": mapping}, region="CHA")
+
+    loader.tables["p32_cap"].loc[:, "value"] = [0.3, 0.4]
+    outputs = pipeline.rerun(previous, {"p32_cap"}, inputs={"mapping": mapping}, region="CHA")
+
+    assert outputs["loads"] is previous["loads"]
+    assert outputs["tech_groups"] is previous["tech_groups"]
+    assert outputs["capacities"]["capacity"].tolist() == [0.3 * 1e6, 0.4 * 1e6]
+
+    with pytest.raises(ValueError, match="No previous output"):
+        pipeline.rerun({}, {"p32_cap"}, inputs={"mapping": mapping})
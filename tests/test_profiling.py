@@ -0,0 +1,77 @@
+"""Tests for rpycpl.profiling module."""
+import csv
+import json
+
+import pandas as pd
+import pytest
+
+from rpycpl import profiling
+from rpycpl.etl import ETL_REGISTRY, convert_loads
+from rpycpl.profiling import TRACE_FIELDS, profile_steps
+
+
+@pytest.fixture
+def loads():
+    return {"ac_load": pd.DataFrame({"year": [2030, 2035], "value": [1.0, 1.2]})}
+
+
+def test_profiling_disabled_by_default(loads, monkeypatch):
+    """Test nothing is recorded outside of a profiled block."""
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    with profile_steps() as profiler:
+        pass
+    convert_loads(loads)
+    assert profiler.records == []
+
+
+def test_profile_steps(loads, tmp_path):
+    """Test the step records and the written traces."""
+    trace = tmp_path / "trace.json"
+    with profile_steps(trace, trace_memory=True) as profiler:
+        ETL_REGISTRY["convert_load"](loads)
+
+    record, = profiler.records
+    assert record["name"] == "convert_load"
+    assert record["in_rows"] == 2 and record["out_rows"] == 2
+    assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+    assert record["tracemalloc_delta_mb"] is not None
+    assert json.loads(trace.read_text()) == profiler.records
+
+    chrome = json.loads((tmp_path / "trace.chrome.json").read_text())
+    event, = chrome["traceEvents"]
+    assert event["ph"] == "X" and event["name"] == "convert_load"
+    assert profiler.summary().loc["convert_load", ("wall_s", "count")] == 1
+
+
+def test_profile_csv_trace(loads, tmp_path):
+    """Test the csv trace has one row per call."""
+    trace = tmp_path / "trace.csv"
+    with profile_steps(trace):
+        convert_loads(loads)
+        convert_loads({k: df.copy() for k, df in loads.items()})
+
+    with open(trace) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2
+    assert list(rows[0]) == TRACE_FIELDS
+
+
+def test_profile_nested_transforms(remind_cost_frames, techno_mappings, techno_pypsa_costs):
+    """Test the main transforms are recorded inside the technoeconomic step."""
+    with profile_steps() as profiler:
+        ETL_REGISTRY["technoeconomic_data"](
+            remind_cost_frames, techno_mappings, techno_pypsa_costs, currency_conversion=1.11
+        )
+
+    names = [rec["name"] for rec in profiler.records]
+    assert names == ["make_pypsa_like_costs", "map_to_pypsa_tech", "technoeconomic_data"]
+
+
+def test_profile_env_variable(loads, tmp_path, monkeypatch):
+    """Test the env variable enables the run-wide profiler."""
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path / "trace.json"))
+    monkeypatch.setattr(profiling, "_ENV_PROFILER", profiling.StepProfiler())
+
+    convert_loads(loads)
+
+    assert [rec["name"] for rec in profiling._ENV_PROFILER.records] == ["convert_load"]
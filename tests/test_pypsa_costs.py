@@ -0,0 +1,69 @@
+"""Tests for rpycpl.pypsa_costs module."""
+import pandas as pd
+import pytest
+
+from rpycpl.pypsa_costs import PypsaCostDB
+
+
+@pytest.fixture
+def cost_dir(tmp_path):
+    """Folder with one pypsa costs file per year."""
+    for year, scale in [(2030, 1.0), (2035, 0.9)]:
+        pd.DataFrame({
+            "technology": ["onwind", "solar", "onwind"],
+            "parameter": ["investment", "investment", "lifetime"],
+            "value": [1200 * scale, 800 * scale, 30],
+            "unit": ["EUR/MW", "EUR/MW", "years"],
+            "source": ["pypsa"] * 3,
+        }).assign(year=year).to_csv(tmp_path / f"costs_{year}.csv", index=False)
+    return tmp_path
+
+
+def test_from_dir(cost_dir):
+    """Test reading all cost files."""
+    db = PypsaCostDB.from_dir(cost_dir)
+    assert sorted(db.years) == [2030, 2035]
+    assert len(db.to_frame()) == 6
+
+
+def test_from_dir_missing(tmp_path):
+    """Test missing cost files raise."""
+    with pytest.raises(FileNotFoundError):
+        PypsaCostDB.from_dir(tmp_path)
+
+
+def test_values(cost_dir):
+    """Test keyed lookup of values."""
+    db = PypsaCostDB.from_dir(cost_dir)
+    values = db.values(["solar", "onwind", "nuclear"], "investment", 2035)
+    assert values["solar"] == pytest.approx(720)
+    assert values["onwind"] == pytest.approx(1080)
+    assert pd.isna(values["nuclear"])
+
+
+def test_lookup_matches_merge(cost_dir):
+    """Test the keyed join gives the same rows as the long-format merge."""
+    db = PypsaCostDB.from_dir(cost_dir)
+    keys = pd.DataFrame({
+        "PyPSA_tech": ["onwind", "nuclear"],
+        "parameter": ["investment", "investment"],
+        "unit": ["", ""],
+    })
+    merged = keys.merge(
+        db.to_frame(), left_on=["PyPSA_tech", "parameter"], right_on=["technology", "parameter"],
+        how="left"
+    )
+    result = db.lookup(keys, tech_col="PyPSA_tech")
+
+    pd.testing.assert_frame_equal(result[merged.columns], merged)
+
+
+def test_duplicates_dropped():
+    """Test duplicated entries are dropped."""
+    costs = pd.DataFrame({
+        "technology": ["onwind", "onwind"],
+        "parameter": ["investment", "investment"],
+        "year": [2030, 2030],
+        "value": [1.0, 2.0],
+    })
+    assert len(PypsaCostDB(costs).data) == 1
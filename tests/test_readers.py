@@ -0,0 +1,47 @@
+"""Tests for rpycpl.readers module."""
+import pandas as pd
+import pytest
+
+from rpycpl.readers import RemindExport
+from rpycpl.technoecon_etl import REMIND_PARAM_MAP
+
+
+@pytest.fixture
+def remind_export_dir(tmp_path):
+    """Minimal csv export with all technoeconomic symbols."""
+    table = pd.DataFrame({
+        "ttot": [2030, 2035],
+        "all_regi": ["CHA", "CHA"],
+        "all_te": ["spv", "spv"],
+        "value": [1.0, 2.0]
+    })
+    for symbol in REMIND_PARAM_MAP.values():
+        table.to_csv(tmp_path / f"{symbol}.csv", index=False)
+    # eta part 2 has a new entry and a duplicate
+    eta_2 = pd.concat([table, table.assign(all_te="windon")])
+    eta_2.to_csv(tmp_path / f"{REMIND_PARAM_MAP['eta_part2']}.csv", index=False)
+    return tmp_path
+
+
+def test_load_frames(remind_export_dir):
+    """Test loading selected symbols, null symbols are skipped."""
+    export = RemindExport(remind_export_dir, n_workers=2)
+    frames = export.load_frames({"capex": "p32_capCost", "tech_data": "pm_data", "other": None})
+
+    assert set(frames) == {"capex", "tech_data"}
+    assert frames["capex"].columns.tolist() == ["year", "region", "technology", "value"]
+
+
+def test_load_frames_missing_symbol(remind_export_dir):
+    """Test missing symbol files raise."""
+    with pytest.raises(FileNotFoundError):
+        RemindExport(remind_export_dir).load_frames({"load": "p32_load"})
+
+
+def test_load_technoeconomic_frames(remind_export_dir):
+    """Test the full technoeconomic bundle with merged efficiencies."""
+    frames = RemindExport(remind_export_dir).load_technoeconomic_frames()
+
+    assert set(frames) == set(REMIND_PARAM_MAP) - {"eta_part2"}
+    assert len(frames["eta"]) == 4
+    assert frames["eta"].index.tolist() == list(range(4))
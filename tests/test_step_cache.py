@@ -0,0 +1,155 @@
+"""Tests for rpycpl.step_cache module."""
+import os
+
+import pandas as pd
+import pytest
+
+from rpycpl import step_cache
+from rpycpl.etl import ETL_REGISTRY, register_etl
+from rpycpl.pypsa_costs import PypsaCostDB
+from rpycpl.step_cache import configure_step_cache, clear_step_cache, fingerprint
+
+
+@pytest.fixture
+def step_cache_dir(tmp_path, monkeypatch):
+    """Enable the step cache in a temporary folder."""
+    monkeypatch.delenv(step_cache.STEP_CACHE_DIR_ENV, raising=False)
+    monkeypatch.setitem(step_cache.STEP_CACHE_LIMITS, "cache_dir", None)
+    monkeypatch.setitem(step_cache.STEP_CACHE_LIMITS, "max_bytes", None)
+    cache_dir = tmp_path / "steps"
+    configure_step_cache(cache_dir, max_bytes=None)
+    return cache_dir
+
+
+@pytest.fixture
+def counted_step():
+    """Registered ETL step counting its calls."""
+    calls = []
+
+    @register_etl("test_counted_step")
+    def counted(frames, scale: float = 1.0):
+        calls.append(scale)
+        return frames["load"].assign(value=frames["load"].value * scale)
+
+    yield counted, calls
+    ETL_REGISTRY.pop("test_counted_step")
+
+
+@pytest.fixture
+def load_frames():
+    return {"load": pd.DataFrame({"year": [2030, 2035], "value": [1.0, 2.0]})}
+
+
+def test_cache_disabled_by_default(counted_step, load_frames, monkeypatch):
+    """Test the steps are always computed without a cache dir."""
+    monkeypatch.delenv(step_cache.STEP_CACHE_DIR_ENV, raising=False)
+    monkeypatch.setitem(step_cache.STEP_CACHE_LIMITS, "cache_dir", None)
+    func, calls = counted_step
+
+    func(load_frames)
+    func(load_frames)
+
+    assert len(calls) == 2
+
+
+def test_cache_hit_unchanged_inputs(step_cache_dir, counted_step, load_frames):
+    """Test unchanged inputs are served from the cache."""
+    func, calls = counted_step
+
+    first = ETL_REGISTRY["test_counted_step"](load_frames, scale=2.0)
+    second = ETL_REGISTRY["test_counted_step"]({"load": load_frames["load"].copy()}, scale=2.0)
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert len(list(step_cache_dir.glob("*.pkl"))) == 1
+
+
+def test_cache_miss_changed_inputs(step_cache_dir, counted_step, load_frames):
+    """Test changed frames or kwargs are recomputed."""
+    func, calls = counted_step
+
+    func(load_frames, scale=2.0)
+    func(load_frames, scale=3.0)
+    changed = load_frames["load"].assign(value=[1.0, 2.5])
+    result = func({"load": changed}, scale=2.0)
+
+    assert len(calls) == 3
+    assert result.value.tolist() == [2.0, 5.0]
+
+
+def test_fingerprint_argument_binding(counted_step, load_frames):
+    """Test positional and keyword arguments give the same key."""
+    func, _ = counted_step
+    original = func.__wrapped__
+
+    key = fingerprint(original, (load_frames, 2.0), {})
+    assert key == fingerprint(original, (), {"frames": load_frames, "scale": 2.0})
+    assert key != fingerprint(original, (load_frames, 2.0), {}, version="2")
+
+
+def test_fingerprint_pypsa_cost_db():
+    """Test indexed cost tables are fingerprinted by content."""
+    costs = pd.DataFrame({
+        "technology": ["CCGT", "OCGT"],
+        "parameter": ["investment"] * 2,
+        "year": [2030, 2030],
+        "value": [800.0, 400.0],
+    })
+
+    def step(pypsa_costs):
+        return pypsa_costs
+
+    key = fingerprint(step, (PypsaCostDB(costs),), {})
+    assert key == fingerprint(step, (PypsaCostDB(costs.copy()),), {})
+    assert key != fingerprint(step, (PypsaCostDB(costs.assign(value=[1.0, 2.0])),), {})
+
+
+def test_cache_eviction(step_cache_dir, counted_step, load_frames):
+    """Test the oldest entries are evicted beyond the size bound, the newest is kept."""
+    func, _ = counted_step
+    func(load_frames, scale=1.0)
+    entry_size = sum(p.stat().st_size for p in step_cache_dir.glob("*.pkl"))
+
+    configure_step_cache(step_cache_dir, max_bytes=int(entry_size * 1.5))
+    for scale in [2.0, 3.0]:
+        func(load_frames, scale=scale)
+
+    assert len(list(step_cache_dir.glob("*.pkl"))) == 1
+    clear_step_cache()
+    assert not list(step_cache_dir.glob("*.pkl"))
+
+
+def test_cache_env_variable(tmp_path, counted_step, load_frames, monkeypatch):
+    """Test the cache can be enabled with the env variable."""
+    monkeypatch.setitem(step_cache.STEP_CACHE_LIMITS, "cache_dir", None)
+    monkeypatch.setenv(step_cache.STEP_CACHE_DIR_ENV, str(tmp_path))
+    func, calls = counted_step
+
+    func(load_frames)
+    func(load_frames)
+
+    assert len(calls) == 1
+    assert os.listdir(tmp_path)
+
+
+def test_technoeconomic_data_cached(
+    step_cache_dir, remind_cost_frames, techno_mappings, techno_pypsa_costs, monkeypatch
+):
+    """Test the technoeconomic data is not recomputed for unchanged inputs."""
+    from rpycpl import etl
+
+    def run():
+        return ETL_REGISTRY["technoeconomic_data"](
+            {k: df.copy() for k, df in remind_cost_frames.items()},
+            techno_mappings.copy(),
+            techno_pypsa_costs,
+            currency_conversion=1.11,
+        )
+
+    reference = run()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recomputed")
+
+    monkeypatch.setattr(etl, "map_to_pypsa_tech", fail)
+    pd.testing.assert_frame_equal(run(), reference)
@@ -0,0 +1,93 @@
+"""Tests for rpycpl.synthetic module."""
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+from rpycpl.etl import harmonize_capacities_all_years, technoeconomic_data
+from rpycpl.readers import RemindExport
+from rpycpl.synthetic import (
+    SyntheticScale,
+    make_powerplants,
+    make_remind_frames,
+    make_techmapping,
+    write_synthetic_inputs,
+)
+from rpycpl.technoecon_etl import validate_mappings
+from rpycpl.utils import build_tech_map, read_pypsa_costs
+
+SMALL = SyntheticScale(n_regions=3, n_years=4, n_techs=15, n_plants=200, n_nodes=5)
+
+
+@pytest.fixture(scope="module")
+def synthetic_inputs(tmp_path_factory):
+    return write_synthetic_inputs(tmp_path_factory.mktemp("synthetic"), SMALL)
+
+
+def test_scale():
+    """Test the scale sets the sizes, also beyond the known REMIND names."""
+    scale = SyntheticScale(n_regions=25, n_years=3, n_techs=50, start_year=2030, year_step=10)
+    assert len(set(scale.regions)) == 25
+    assert scale.years == [2030, 2040, 2050]
+    assert len(scale.techs) == 50
+    frames = make_remind_frames(scale)
+    assert frames["p32_capCost"].shape == (25 * 3 * 50, 4)
+
+
+def test_deterministic():
+    """Test the same seed gives the same data."""
+    first, second = make_remind_frames(SMALL), make_remind_frames(SMALL)
+    for symbol, df in first.items():
+        pd.testing.assert_frame_equal(df, second[symbol])
+    other = make_remind_frames(SyntheticScale(n_regions=3, n_years=4, n_techs=15, seed=1))
+    assert not other["p32_capCost"].equals(first["p32_capCost"])
+
+
+def test_mapping_valid():
+    """Test the mapping validates and covers all REMIND techs."""
+    mappings = make_techmapping(SMALL)
+    validate_mappings(mappings)
+    assert set(mappings.mapper) == {
+        "use_remind",
+        "weigh_remind_by_gen",
+        "use_pypsa",
+        "set_value",
+        "use_remind_with_learning_from",
+    }
+    tech_groups = build_tech_map(mappings)
+    assert set(tech_groups.index) == set(SMALL.techs)
+
+
+def test_technoeconomic_data(synthetic_inputs):
+    """Test the synthetic export loads and maps end-to-end, per region and for all regions."""
+    mappings = pd.read_csv(synthetic_inputs["techmapping"])
+    costs = read_pypsa_costs(sorted(glob.glob(os.path.join(synthetic_inputs["pypsa_costs"], "*"))))
+    export = RemindExport(synthetic_inputs["remind_export"], regions="CHA")
+    assert export.read_version() == "3.5.0-synthetic"
+
+    result = technoeconomic_data(export.load_technoeconomic_frames(), mappings, costs, 1.11)
+    assert not result.value.isna().any()
+    assert set(mappings.PyPSA_tech) <= set(result.technology)
+
+    frames = RemindExport(synthetic_inputs["remind_export"]).load_technoeconomic_frames()
+    by_region = technoeconomic_data(frames, mappings, costs, 1.11, by_region=True)
+    assert set(by_region.region) == set(SMALL.regions)
+
+
+def test_powerplants_harmonize():
+    """Test the power plants are assigned to the tech groups and can be harmonized."""
+    mappings = make_techmapping(SMALL)
+    plants = make_powerplants(SMALL, mappings)
+    assert len(plants) == SMALL.n_plants
+    assert set(plants.tech_group) <= set(build_tech_map(mappings).group)
+
+    remind_caps = make_remind_frames(SMALL)["p32_cap"].query("all_regi == 'CHA'")
+    remind_caps = pd.DataFrame({
+        "year": remind_caps.ttot,
+        "capacity": remind_caps.value * 1e6,
+        "tech_group": remind_caps.all_te.map(build_tech_map(mappings).group),
+    })
+    harmonized = harmonize_capacities_all_years(plants, remind_caps)
+    assert set(harmonized.remind_year) <= set(SMALL.years)
+    assert not harmonized.Capacity.isna().any()
@@ -191,3 +191,228 @@ class TestETLIntegration:
         # Should validate both mappings and REMIND data
         validate_mappings(mappings)
         validate_remind_data(costs_remind, mappings)
+
+
+@pytest.mark.parametrize("transform, key, query", [
+    ("transform_capex", "capex", None),
+    ("transform_fom", "tech_data", "parameter == 'omf'"),
+    ("transform_vom", "tech_data", "parameter == 'omv'"),
+    ("transform_fuels", "fuel_costs", None),
+])
+def test_transforms_do_not_mutate(remind_cost_frames, transform, key, query):
+    """Test the transforms leave the REMIND frames unchanged."""
+    from rpycpl import technoecon_etl
+
+    frame = remind_cost_frames[key]
+    frame = frame.query(query) if query else frame
+    original = frame.copy()
+
+    result = getattr(technoecon_etl, transform)(frame)
+
+    pd.testing.assert_frame_equal(frame, original)
+    assert not result["value"].equals(original["value"])
+
+
+class TestMakePypsaLikeCosts:
+    """Test the assembly of the pypsa-like REMIND costs."""
+
+    def test_broadcast_and_order(self, remind_cost_frames):
+        """Test time-indep & tech agnostic data is broadcast and rows come sorted."""
+        from rpycpl.technoecon_etl import make_pypsa_like_costs
+        from rpycpl.utils import key_sort
+
+        costs = make_pypsa_like_costs(remind_cost_frames)
+        keys = ["technology", "year", "parameter"]
+        assert not costs.duplicated(keys).any()
+        assert costs.index.equals(pd.RangeIndex(len(costs)))
+        expected = costs.sort_values(keys, key=key_sort)
+        pd.testing.assert_frame_equal(costs, expected.reset_index(drop=True))
+        # lifetime from tech_data applies to all years, discount rate to all capex techs
+        lifetime = costs.query("parameter == 'lifetime'")
+        assert lifetime.groupby("technology").year.apply(list).to_dict() == {
+            "spv": [2030, 2035], "windon": [2030, 2035]
+        }
+        discount = costs.query("parameter == 'discount rate'")
+        assert len(discount) == 4 * 2
+        assert set(discount.technology) == {"windon", "spv", "gaschp", "gascc"}
+
+    def test_by_region(self, remind_cost_frames):
+        """Test region agnostic data applies to all capex regions."""
+        from rpycpl.technoecon_etl import make_pypsa_like_costs
+
+        frames = dict(remind_cost_frames)
+        frames["capex"] = pd.concat(
+            [frames["capex"].assign(region=r) for r in ["EUR", "CHA"]], ignore_index=True
+        )
+        costs = make_pypsa_like_costs(frames, by_region=True)
+        single = make_pypsa_like_costs(remind_cost_frames)
+        assert costs.region.tolist() == ["CHA"] * len(single) + ["EUR"] * len(single)
+        pd.testing.assert_frame_equal(
+            costs.query("region == 'EUR'").drop(columns="region").reset_index(drop=True), single
+        )
+
+    def test_duplicate_entries(self, remind_cost_frames):
+        from rpycpl.technoecon_etl import make_pypsa_like_costs
+
+        frames = dict(remind_cost_frames)
+        frames["eta"] = pd.concat([frames["eta"], frames["eta"].head(1)])
+        with pytest.raises(ValueError, match="Duplicate cost entries"):
+            make_pypsa_like_costs(frames)
+
+
+def test_expand_regions():
+    """Test region-independent rows are broadcast to all regions, region by region."""
+    from rpycpl.technoecon_etl import _expand_regions
+
+    df = pd.DataFrame({"technology": ["spv", "windon"], "value": [1.0, 2.0]})
+    expanded = _expand_regions(df, pd.Index(["CHA", "EUR"]))
+    assert expanded.region.tolist() == ["CHA", "CHA", "EUR", "EUR"]
+    assert expanded.technology.tolist() == ["spv", "windon"] * 2
+    assert "region" not in df.columns
+    assert _expand_regions(expanded, ["USA"]) is expanded
+
+
+class TestWeighRemindBy:
+    """Test the weighted REMIND tech baskets."""
+
+    @pytest.fixture
+    def basket(self):
+        mappings = pd.DataFrame({
+            'PyPSA_tech': ['CCGT'],
+            'parameter': ['investment'],
+            'mapper': ['weigh_remind_by_gen'],
+            'reference': [['ngcc', 'ngt']],
+            'unit': ['USD/MW'],
+            'comment': [''],
+        })
+        costs = pd.DataFrame({
+            'technology': ['ngcc', 'ngt', 'ngcc', 'ngt'],
+            'year': [2030, 2030, 2035, 2035],
+            'parameter': ['investment'] * 4,
+            'value': [100.0, 200.0, 100.0, 200.0],
+            'unit': ['USD/MW'] * 4,
+        })
+        weights = pd.DataFrame({
+            'technology': ['ngcc', 'ngt', 'ngcc', 'ngt'],
+            'year': [2030, 2030, 2035, 2035],
+            'weight': [3.0, 1.0, 0.0, 1.0],
+        })
+        return mappings, costs, weights
+
+    def test_weighted_mean(self, basket):
+        """Test the value is the weighted mean, by year, with or without merged weights."""
+        from rpycpl.technoecon_etl import _weigh_remind_by
+
+        mappings, costs, weights = basket
+        merged = costs.merge(weights, on=['technology', 'year'])
+        for remind_costs in [merged, costs]:
+            result = _weigh_remind_by(remind_costs, weights, mappings)
+            assert result.year.tolist() == [2030, 2035]
+            assert result.value.tolist() == pytest.approx([125.0, 200.0])
+
+    def test_unit_mismatch(self, basket):
+        from rpycpl.technoecon_etl import _weigh_remind_by
+
+        mappings, costs, weights = basket
+        costs.loc[1, 'unit'] = 'USD/MWh'
+        with pytest.raises(ValueError, match="Units do not match"):
+            _weigh_remind_by(costs, weights, mappings)
+
+
+class TestLearnInvestmentFromProxy:
+    """Test the proxy learning of techs missing in REMIND."""
+
+    @pytest.fixture
+    def proxy_data(self):
+        mappings = pd.DataFrame({
+            'PyPSA_tech': ['offwind'],
+            'parameter': ['investment'],
+            'mapper': ['use_remind_with_learning_from'],
+            'reference': ['windon'],
+        })
+        pypsa_costs = pd.DataFrame({
+            'technology': ['offwind'] * 2,
+            'parameter': ['investment'] * 2,
+            'year': [2030, 2040],
+            'value': [1000.0, 900.0],
+            'unit': ['EUR/MW'] * 2,
+        })
+        # shuffled years, two regions with different learning
+        remind = pd.DataFrame({
+            'region': ['CHA'] * 3 + ['EUR'] * 3,
+            'technology': ['windon'] * 6,
+            'parameter': ['investment'] * 6,
+            'year': [2040, 2030, 2050, 2030, 2040, 2050],
+            'value': [80.0, 100.0, 50.0, 200.0, 100.0, 100.0],
+            'unit': ['USD/MW'] * 6,
+        })
+        return mappings, pypsa_costs, remind
+
+    @staticmethod
+    def _values(result):
+        return result.set_index(['region', 'year']).value.sort_index().tolist()
+
+    def test_ratio(self, proxy_data):
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        mappings, pypsa_costs, remind = proxy_data
+        result = _learn_investment_from_proxy(mappings, pypsa_costs, remind, 2030, by_region=True)
+        assert set(result.technology) == {'offwind'}
+        assert self._values(result) == pytest.approx([1000, 800, 500, 1000, 500, 500])
+
+    def test_several_reference_years(self, proxy_data):
+        """Test the learning is re-anchored to the pypsa cost at each reference year."""
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        mappings, pypsa_costs, remind = proxy_data
+        result = _learn_investment_from_proxy(
+            mappings, pypsa_costs, remind, [2030, 2040], by_region=True
+        )
+        assert self._values(result) == pytest.approx([1000, 900, 562.5, 1000, 900, 900])
+
+    def test_delta(self, proxy_data):
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        mappings, pypsa_costs, remind = proxy_data
+        result = _learn_investment_from_proxy(
+            mappings, pypsa_costs, remind, 2030, by_region=True, mode="delta",
+            currency_conversion=0.5,
+        )
+        assert self._values(result) == pytest.approx([1000, 990, 975, 1000, 950, 950])
+        assert set(result.unit) == {'EUR/MW'}
+
+    def test_delta_unit_conversion(self, proxy_data):
+        """Test the USD/MW delta is converted to the pypsa unit or rejected."""
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        mappings, pypsa_costs, remind = proxy_data
+        pypsa_costs = pypsa_costs.assign(value=[1.0, 0.9], unit='EUR/kW')
+        result = _learn_investment_from_proxy(
+            mappings, pypsa_costs, remind, 2030, by_region=True, mode="delta"
+        )
+        assert self._values(result) == pytest.approx([1, 0.98, 0.95, 1, 0.9, 0.9])
+        assert set(result.unit) == {'EUR/kW'}
+
+        with pytest.raises(ValueError, match="USD/MW investment delta to a pypsa EUR/kWh"):
+            _learn_investment_from_proxy(
+                mappings, pypsa_costs.assign(unit='EUR/kWh'), remind, 2030, mode="delta"
+            )
+
+    def test_missing_reference_year(self, proxy_data):
+        """Test missing pypsa or REMIND investment at a reference year is an error."""
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        mappings, pypsa_costs, remind = proxy_data
+        with pytest.raises(ValueError, match="No pypsa investment(.|\n)*offwind +2050"):
+            _learn_investment_from_proxy(
+                mappings, pypsa_costs, remind, [2030, 2050], by_region=True
+            )
+        remind.loc[remind.year == 2030, 'value'] = float('nan')
+        with pytest.raises(ValueError, match="No REMIND investment(.|\n)*windon +2030"):
+            _learn_investment_from_proxy(mappings, pypsa_costs, remind, 2030, by_region=True)
+
+    def test_unknown_mode(self, proxy_data):
+        from rpycpl.technoecon_etl import _learn_investment_from_proxy
+
+        with pytest.raises(ValueError, match="Unknown proxy learning mode"):
+            _learn_investment_from_proxy(*proxy_data, 2030, mode="log")
@@ -1,5 +1,7 @@
 
 """Tests for rpycpl.utils module."""
+import os
+import sys
 import pandas as pd
 import pytest
 
@@ -10,7 +12,9 @@ from rpycpl.utils import (
     build_tech_map,
     expand_years,
     to_list,
+    atomic_write,
     _fix_repeated_columns,
+    is_compact,
     REMIND_NAME_MAP
 )
 
@@ -92,6 +96,136 @@ def test_read_remind_csv_with_duplicate_columns(tmp_path):
     assert "technology_1" in result.columns
     
 
+def test_read_remind_csv_cached(tmp_path):
+    """Test the columnar cache serves the normalised table and tracks file changes."""
+    pytest.importorskip("pyarrow")
+    data = pd.DataFrame({
+        "ttot": [2030, 2035],
+        "all_regi": ["CHA", "CHA"],
+        "all_te": ["wind", "solar"],
+        "value": [100.0, 150.0]
+    })
+    file_path = tmp_path / "remind_data.csv"
+    data.to_csv(file_path, index=False)
+    cache_dir = tmp_path / "cache"
+
+    first = read_remind_csv(file_path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("remind_data-*.parquet"))) == 1
+
+    cached = read_remind_csv(file_path, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(first, cached)
+
+    # changed file gets a new cache entry
+    data.assign(value=[1.0, 2.0]).to_csv(file_path, index=False)
+    os.utime(file_path, ns=(0, 10**9))
+    changed = read_remind_csv(file_path, cache_dir=cache_dir)
+    assert changed["value"].tolist() == [1.0, 2.0]
+    assert len(list(cache_dir.glob("remind_data-*.parquet"))) == 2
+
+
+def test_read_remind_csv_cache_code_change(tmp_path, monkeypatch):
+    """Test a change of the normalisation code invalidates the csv cache."""
+    pytest.importorskip("pyarrow")
+    from rpycpl import utils
+
+    file_path = tmp_path / "remind_data.csv"
+    pd.DataFrame({"ttot": [2030], "all_regi": ["CHA"], "value": [1.0]}).to_csv(
+        file_path, index=False
+    )
+    cache_dir = tmp_path / "cache"
+    read_remind_csv(file_path, cache_dir=cache_dir)
+
+    monkeypatch.setattr(utils, "package_fingerprint", lambda: "changed")
+    read_remind_csv(file_path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("remind_data-*.parquet"))) == 2
+
+
+def test_atomic_write(tmp_path):
+    """Test the target is only replaced on success and no temporary file is left."""
+    path = tmp_path / "out.txt"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as tmp:
+            with open(tmp, "w") as f:
+                f.write("partial")
+            raise RuntimeError("failed")
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+    with atomic_write(path) as tmp:
+        with open(tmp, "w") as f:
+            f.write("new")
+    assert path.read_text() == "new"
+    assert os.listdir(tmp_path) == ["out.txt"]
+
+
+@pytest.mark.parametrize("chunksize", [1, 100])
+def test_read_remind_csv_regions(tmp_path, monkeypatch, chunksize):
+    """Test the region filter while parsing (chunked)."""
+    from rpycpl import utils
+
+    monkeypatch.setattr(utils, "REGION_FILTER_CHUNKSIZE", chunksize)
+    data = pd.DataFrame({
+        "ttot": [2030, 2030, 2035],
+        "all_regi": ["CHA", "EUR", "CHA"],
+        "value": [1.0, 2.0, 3.0]
+    })
+    file_path = tmp_path / "remind_data.csv"
+    data.to_csv(file_path, index=False)
+
+    result = read_remind_csv(file_path, regions="CHA")
+    assert result["region"].tolist() == ["CHA", "CHA"]
+    assert result.index.tolist() == [0, 1]
+    assert read_remind_csv(file_path, regions=["USA"]).empty
+
+
+def test_read_remind_csv_regions_cached(tmp_path):
+    """Test the region filter on cached tables."""
+    pytest.importorskip("pyarrow")
+    data = pd.DataFrame({
+        "ttot": [2030, 2030, 2035],
+        "all_regi": ["CHA", "EUR", "CHA"],
+        "value": [1.0, 2.0, 3.0]
+    })
+    file_path = tmp_path / "remind_data.csv"
+    data.to_csv(file_path, index=False)
+    cache_dir = tmp_path / "cache"
+
+    first = read_remind_csv(file_path, cache_dir=cache_dir, regions=["EUR"])
+    cached = read_remind_csv(file_path, cache_dir=cache_dir, regions=["EUR"])
+    pd.testing.assert_frame_equal(first, cached)
+    assert cached["value"].tolist() == [2.0]
+    # cache holds all regions
+    assert len(read_remind_csv(file_path, cache_dir=cache_dir)) == 3
+
+
+def test_read_remind_csv_regions_no_region_column(tmp_path):
+    """Test tables without region are not filtered."""
+    file_path = tmp_path / "remind_data.csv"
+    pd.DataFrame({"ttot": [2030, 2035], "value": [1.0, 2.0]}).to_csv(file_path, index=False)
+    assert len(read_remind_csv(file_path, regions=["CHA"])) == 2
+
+
+def test_read_remind_csv_compact(tmp_path):
+    """Test the opt-in compact schema."""
+    data = pd.DataFrame({
+        "ttot": [2030, 2035],
+        "all_regi": ["CHA", "CHA"],
+        "all_te": ["wind", "solar"],
+        "value": [100.0, 150.0]
+    })
+    file_path = tmp_path / "remind_data.csv"
+    data.to_csv(file_path, index=False)
+
+    result = read_remind_csv(file_path, compact="float32")
+    assert isinstance(result["region"].dtype, pd.CategoricalDtype)
+    assert isinstance(result["technology"].dtype, pd.CategoricalDtype)
+    assert result["year"].dtype == "int16"
+    assert result["value"].dtype == "float32"
+    assert is_compact(result)
+    assert not is_compact(read_remind_csv(file_path))
+
+
 def test_read_pypsa_costs(tmp_path):
     """Test reading and stitching PyPSA cost files."""
     # Create first cost file
@@ -211,3 +345,152 @@ class TestRegistryDecorators:
             
         assert "test_reader" in READERS_REGISTRY
         assert READERS_REGISTRY["test_reader"] == dummy_reader
+
+
+class TestGdxReaders:
+    """Test the GDX readers and container pool (gamspy container faked)."""
+
+    class FakeSymbol:
+        def __init__(self, name):
+            self.records = pd.DataFrame({"all_regi": ["CHA"], "value": [1.0]})
+            self.description = f"{name} [TW]"
+
+    @pytest.fixture
+    def fake_gamspy(self, monkeypatch):
+        from types import SimpleNamespace
+        from rpycpl import utils
+
+        loads = []
+
+        class FakeContainer(dict):
+            def __init__(self, load_from=None):
+                if load_from:
+                    loads.append(load_from)
+
+            def read(self, load_from, symbol_names=None):
+                loads.append((load_from, sorted(symbol_names)))
+
+            def __getitem__(self, key):
+                return TestGdxReaders.FakeSymbol(key)
+
+        monkeypatch.setitem(sys.modules, "gamspy", SimpleNamespace(Container=FakeContainer))
+        utils.clear_gdx_pool()
+        yield loads
+        utils.clear_gdx_pool()
+        utils.configure_gdx_pool()
+
+    def test_container_loaded_once(self, tmp_path, fake_gamspy):
+        from rpycpl.utils import read_gdx
+
+        gdx = tmp_path / "fulldata.gdx"
+        gdx.write_bytes(b"gdx")
+        for symbol in ["pm_data", "p32_capCost", "pm_emifac"]:
+            read_gdx(gdx, symbol)
+        assert len(fake_gamspy) == 1
+
+        # modified file is reloaded
+        os.utime(gdx, ns=(0, 10**9))
+        read_gdx(gdx, "pm_data")
+        assert len(fake_gamspy) == 2
+
+    def test_pool_bounds_and_invalidation(self, tmp_path, fake_gamspy):
+        from rpycpl.utils import read_gdx, configure_gdx_pool, clear_gdx_pool, _GDX_POOL
+
+        configure_gdx_pool(max_files=1)
+        files = [tmp_path / f"run{i}.gdx" for i in range(2)]
+        for f in files:
+            f.write_bytes(b"gdx")
+            read_gdx(f, "pm_data")
+        assert len(_GDX_POOL) == 1
+
+        clear_gdx_pool(files[1])
+        assert len(_GDX_POOL) == 0
+        read_gdx(files[1], "pm_data")
+        assert len(fake_gamspy) == 3
+
+    def test_read_selected_symbols(self, tmp_path, fake_gamspy):
+        from rpycpl.utils import read_gdx, read_gdx_symbols
+
+        gdx = tmp_path / "fulldata.gdx"
+        gdx.write_bytes(b"gdx")
+        frames = read_gdx_symbols(gdx, {"capex": "p32_capCost", "tech_data": "pm_data"})
+
+        # one read restricted to the requested symbols
+        assert fake_gamspy == [(str(gdx), ["p32_capCost", "pm_data"])]
+        assert set(frames) == {"capex", "tech_data"}
+        assert frames["capex"].columns.tolist() == ["region", "value"]
+
+        # a file fully loaded in the pool is not read again
+        read_gdx(gdx, "pm_data")
+        read_gdx_symbols(gdx, ["pm_emifac"])
+        assert fake_gamspy == [(str(gdx), ["p32_capCost", "pm_data"]), str(gdx)]
+
+    def test_read_gdx_regions(self, tmp_path, fake_gamspy):
+        from rpycpl.utils import read_gdx
+
+        gdx = tmp_path / "fulldata.gdx"
+        gdx.write_bytes(b"gdx")
+        assert len(read_gdx(gdx, "pm_data", regions="CHA")) == 1
+        assert read_gdx(gdx, "pm_data", regions=["EUR"], error_on_empty=False).empty
+
+
+def test_iso3_to_iso2(monkeypatch):
+    """Test the ISO lookup table, with country_converter as fallback for unknown codes."""
+    from rpycpl import utils
+
+    monkeypatch.setattr(utils, "_ISO2_FALLBACK", {})
+    codes = pd.Series(["DEU", "GBR", "CHN", "Kosovo"])
+    result = utils.iso3_to_iso2(codes)
+
+    assert result.tolist()[:3] == ["DE", "GB", "CN"]
+    assert utils._ISO2_FALLBACK == {"Kosovo": result.iloc[3]}
+
+
+class TestWriteCostData:
+    """Test the per-year cost data writer."""
+
+    @pytest.fixture
+    def cost_data(self):
+        return pd.DataFrame({
+            "technology": ["wind", "solar", "wind"],
+            "year": [2030, 2030, 2035],
+            "parameter": ["investment"] * 3,
+            "value": [1200.0, 800.0, 1100.0],
+        })
+
+    def test_write_csv(self, tmp_path, cost_data):
+        from rpycpl.utils import write_cost_data
+
+        written = write_cost_data(cost_data, str(tmp_path), descript="run1")
+        assert sorted(os.path.basename(p) for p in written) == ["costs_2030.csv", "costs_2035.csv"]
+        pd.testing.assert_frame_equal(
+            pd.read_csv(tmp_path / "run1" / "costs_2035.csv"),
+            cost_data.query("year == 2035").reset_index(drop=True),
+        )
+
+    def test_unchanged_files_not_rewritten(self, tmp_path, cost_data):
+        from rpycpl.utils import write_cost_data
+
+        write_cost_data(cost_data, tmp_path, compression="gzip")
+        path = tmp_path / "costs_2030.csv.gz"
+        os.utime(path, ns=(0, 10**9))
+
+        cost_data.loc[2, "value"] = 1000.0
+        written = write_cost_data(cost_data, tmp_path, compression="gzip")
+        assert [os.path.basename(p) for p in written] == ["costs_2035.csv.gz"]
+        assert path.stat().st_mtime_ns == 10**9
+        assert pd.read_csv(tmp_path / "costs_2035.csv.gz")["value"].tolist() == [1000.0]
+
+    def test_write_parquet(self, tmp_path, cost_data):
+        pytest.importorskip("pyarrow")
+        from rpycpl.utils import write_cost_data
+
+        write_cost_data(cost_data, tmp_path, fmt="parquet")
+        assert len(pd.read_parquet(tmp_path / "costs_2030.parquet")) == 2
+        assert write_cost_data(cost_data, tmp_path, fmt="parquet") == []
+
+    def test_unknown_format(self, tmp_path, cost_data):
+        from rpycpl.utils import write_cost_data
+
+        with pytest.raises(ValueError, match="Unknown cost data format"):
+            write_cost_data(cost_data, tmp_path, fmt="xlsx")